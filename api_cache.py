@@ -0,0 +1,105 @@
+"""
+On-disk cache for FPL API responses, keyed by endpoint.
+
+Every response is stored as one JSON file under the cache root, e.g.
+    .fpl_cache/bootstrap-static.json
+    .fpl_cache/element-summary/123.json
+holding the parsed body together with the ETag / Last-Modified validators and the time it was fetched.
+
+- inside its TTL an entry is served straight from disk, no request made
+- past its TTL the entry is revalidated with If-None-Match / If-Modified-Since; a 304 only refreshes
+  the timestamp, so an unchanged player costs a tiny round trip instead of the full history
+"""
+
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+CACHE_DIR = ".fpl_cache"
+
+# Seconds an entry is trusted without asking the server again, by endpoint (first path segment).
+# element-summary is always revalidated: data_loader only asks for players it knows are behind.
+DEFAULT_TTLS = {
+    "bootstrap-static": 300,
+    "fixtures": 3600,
+    "element-summary": 0,
+}
+
+
+class ResponseCache:
+    def __init__(self, root: str = CACHE_DIR, ttls: Optional[Dict[str, float]] = None):
+        self.root = Path(root)
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+
+    @staticmethod
+    def endpoint(url: str) -> str:
+        """'https://.../api/element-summary/123/' -> 'element-summary/123'"""
+        path = re.sub(r"^[a-z]+://[^/]+", "", url)
+        path = re.sub(r"^/api/", "", path).strip("/")
+        return path or "root"
+
+    def _path(self, url: str) -> Path:
+        key = re.sub(r"[^\w\-/]+", "_", self.endpoint(url))
+        return self.root / f"{key}.json"
+
+    def ttl(self, url: str) -> float:
+        return float(self.ttls.get(self.endpoint(url).split("/")[0], 0))
+
+    def load(self, url: str) -> Optional[dict]:
+        path = self._path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, url: str, entry: dict) -> bool:
+        return time.time() - entry.get("fetched_at", 0) < self.ttl(url)
+
+    @staticmethod
+    def validators(entry: Optional[dict]) -> dict:
+        """Conditional request headers for a cached entry."""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, body, headers) -> None:
+        entry = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "body": body,
+        }
+        self._write(self._path(url), entry)
+
+    def revalidated(self, url: str, entry: dict, headers) -> None:
+        """Server answered 304: keep the body, refresh timestamp (and validators, if sent again)."""
+        entry["fetched_at"] = time.time()
+        entry["etag"] = headers.get("ETag", entry.get("etag"))
+        entry["last_modified"] = headers.get("Last-Modified", entry.get("last_modified"))
+        self._write(self._path(url), entry)
+
+    @staticmethod
+    def _write(path: Path, entry: dict) -> None:
+        # write-then-rename so a crash (or a parallel worker) never sees a half-written file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(entry, fh)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
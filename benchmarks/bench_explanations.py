@@ -0,0 +1,88 @@
+"""
+Explaining a gameweek (explanations.py): one booster call per row vs batched pred_contribs, exact
+TreeSHAP vs approx_contribs, pred_interactions, and a cache hit.
+
+Uses the saved model (run model.py first) and the GW's rows of the cached feature matrix; checks
+that every row's contributions add up to its prediction.
+
+Usage:
+  python benchmarks/bench_explanations.py --store /path/to/store --season 2526 --gw 7 --per-row 50
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from explanations import contributions, explain, explain_gw, group_interactions, group_matrix  # noqa: E402
+from matrix_cache import MatrixCache  # noqa: E402
+from model_store import ModelStore  # noqa: E402
+from panel_store import STORE_DIR  # noqa: E402
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--store", default=STORE_DIR)
+    ap.add_argument("--models", default=None, help="default: <store>/models")
+    ap.add_argument("--season", type=int, default=2526)
+    ap.add_argument("--gw", type=int, default=7)
+    ap.add_argument("--per-row", type=int, default=50, help="rows explained one call at a time (extrapolated)")
+    ap.add_argument("--interactions", type=int, default=10, help="rows for pred_interactions")
+    args = ap.parse_args()
+
+    model = ModelStore(args.models or os.path.join(args.store, "models")).load_model()
+    booster = model.get_booster()
+    matrix, _ = MatrixCache(args.store).matrix()
+    rows = np.flatnonzero(((matrix.meta["season"] == args.season) & (matrix.meta["gw"] == args.gw)).to_numpy())
+    X_test = pd.DataFrame(matrix.X[rows], columns=matrix.features)[booster.feature_names]
+    test_df = matrix.meta.iloc[rows].reset_index(drop=True)
+    test_df["predicted_points_next"] = model.predict(X_test)
+    X = np.ascontiguousarray(X_test.to_numpy(dtype=np.float32))
+    features = list(X_test.columns)
+    n = len(X)
+    print(f"[INFO] {n} rows of {args.season} GW{args.gw}, {booster.num_boosted_rounds()} trees, {len(features)} features")
+
+    k = min(args.per_row, n)
+    _, t_row = timed(lambda: [booster.predict(xgb.DMatrix(X[i:i + 1], feature_names=features), pred_contribs=True)
+                              for i in range(k)])
+    exact, t_batch = timed(lambda: contributions(booster, X, features))
+    _, t_approx = timed(lambda: contributions(booster, X, features, approx=True))
+    _, G = group_matrix(features)
+    m = min(args.interactions, n)
+    _, t_inter = timed(lambda: group_interactions(booster, X[:m], features, G))
+    err = np.abs(exact.sum(axis=1) - test_df["predicted_points_next"].to_numpy()).max()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _, t_miss = timed(lambda: explain_gw(model, test_df, X_test, args.season, args.gw, tmp))
+        (_, hit), t_hit = timed(lambda: explain_gw(model, test_df, X_test, args.season, args.gw, tmp))
+    _, t_group = timed(lambda: explain(model, test_df, X_test, approx=True))
+
+    print(f"{'step':<44}{'seconds':>9}")
+    for name, t in [(f"exact, one call per row (x{n} / {k})", t_row * n / k),
+                    ("exact, batched", t_batch),
+                    ("approx_contribs, batched", t_approx),
+                    (f"interactions, {m} rows batched", t_inter),
+                    ("explain (approx) incl. grouping", t_group),
+                    ("explain_gw, miss (exact)", t_miss),
+                    (f"explain_gw, {'hit' if hit else 'MISS'}", t_hit)]:
+        print(f"{name:<44}{t:>9.3f}")
+    print(f"[OK] contributions add up to the predictions (max error {err:.1e})")
+
+
+if __name__ == "__main__":
+    main()
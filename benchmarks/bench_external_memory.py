@@ -0,0 +1,99 @@
+"""
+In-memory vs out-of-core training (external_training.py) as the number of seasons grows: peak RSS,
+training time and next-GW RMSE.
+
+The seasons are copies of the store's past seasons (engineered panel + team strength tables, under
+new season ids) in front of the latest one, so --seasons 2 4 8 16 trains on ~2x ... 16x the rows of
+two seasons. Both modes train on every row up to --until and are scored on the next GW:
+- in memory: read the whole panel, build the feature matrix (feature_matrix), fit XGBRegressor
+- out of core: train_external, one season's batch at a time, binned pages on disk
+Every run is a fresh process, so its peak RSS (instrument.peak_rss_mb) is its own. Works on a
+copy of --store.
+
+Usage:
+  python benchmarks/bench_external_memory.py --store /path/to/store --until 2526 5 --seasons 2 4 8 16
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from external_training import panel_frame, train_external  # noqa: E402
+from instrument import peak_rss_mb, rss_mb  # noqa: E402
+from matrix_cache import PANELS_ENGINEERED, TARGET, feature_matrix, load_panel  # noqa: E402
+from model import make_model  # noqa: E402
+from panel_store import STORE_DIR, list_seasons, read_panel, write_panel  # noqa: E402
+from team_strength import STRENGTH, TEAM_FIXTURES  # noqa: E402
+
+
+def make_store(source: str, store: str, latest: int, n: int) -> None:
+    """n seasons: copies of the seasons before `latest` (new ids 1001, 1002, ...), then `latest` itself."""
+    past = [s for s in list_seasons(source, PANELS_ENGINEERED) if s < latest]
+    for dataset in (PANELS_ENGINEERED, STRENGTH, TEAM_FIXTURES):
+        write_panel(read_panel(source, dataset, seasons=[latest]), store, dataset)
+        for i in range(n - 1):
+            write_panel(read_panel(source, dataset, seasons=[past[i % len(past)]]), store, dataset, season=1001 + i)
+
+
+def child(mode: str, store: str, until: tuple, rounds: int) -> dict:
+    base = rss_mb()
+    model = make_model().set_params(n_estimators=rounds)
+    t0 = time.perf_counter()
+    if mode == "memory":
+        df = load_panel(store, PANELS_ENGINEERED)
+        df = df[(df["season"] < until[0]) | ((df["season"] == until[0]) & (df["gw"] <= until[1]))]
+        X, y, _, features = feature_matrix(df[df[TARGET].notna()])
+        del df
+        model.fit(pd.DataFrame(X, columns=features, copy=False), y)
+        rows = len(X)
+    else:
+        with tempfile.TemporaryDirectory() as models:
+            model, report = train_external(model, store, until, root=models, retrain=True)
+        rows = report["rows"]
+    seconds, peak = time.perf_counter() - t0, peak_rss_mb()
+
+    test = panel_frame(store, PANELS_ENGINEERED, [until[0]], True, gw_max=until[1] + 1)
+    X_test, y_test, _, features = feature_matrix(test[(test["gw"] == until[1] + 1) & test[TARGET].notna()])
+    X_test = pd.DataFrame(X_test, columns=features).reindex(columns=model.get_booster().feature_names, fill_value=0)
+    rmse = float(np.sqrt(np.mean((model.predict(X_test) - y_test) ** 2)))
+    return {"rows": rows, "seconds": seconds, "peak_rss_mb": peak, "base_rss_mb": base, "rmse": rmse}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--store", default=STORE_DIR)
+    ap.add_argument("--until", type=int, nargs=2, default=[2526, 5], metavar=("SEASON", "GW"))
+    ap.add_argument("--seasons", type=int, nargs="+", default=[2, 4, 8, 16])
+    ap.add_argument("--rounds", type=int, default=100, help="trees per fit")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child, args.store, tuple(args.until), args.rounds)))
+        return
+
+    print(f"{'seasons':>8}{'rows':>10}{'mode':>13}{'seconds':>9}{'peak RSS MB':>13}{'  (over imports)':>17}{'RMSE':>8}")
+    for n in args.seasons:
+        with tempfile.TemporaryDirectory() as tmp:
+            make_store(args.store, tmp, args.until[0], n)
+            for mode in ("memory", "external"):
+                out = subprocess.run([sys.executable, __file__, "--child", mode, "--store", tmp, "--rounds",
+                                      str(args.rounds), "--until", *map(str, args.until)],
+                                     capture_output=True, text=True, check=True)
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{n:>8}{r['rows']:>10}{mode:>13}{r['seconds']:>9.1f}{r['peak_rss_mb']:>13.0f}"
+                      f"{r['peak_rss_mb'] - r['base_rss_mb']:>17.0f}{r['rmse']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Feature store: full recompute vs incremental update when a gameweek is added.
+
+Takes the synthetic panel from bench_features.py (--scale x the repo CSVs), fills the store up to
+the --from gameweek of --season (default: the latest), then adds one gameweek at a time, and last
+runs the final gameweek again (nothing new). Every update's frame and the store read back are checked
+against a full recompute of the same panel. "recompute + save" is what model.py did on every run
+before the store: build all features, write the whole engineered panel. The update is that recompute
+plus a hash per gameweek and a rewrite of the changed gameweeks' files only ("rows written": the
+new gameweek and the one before, whose total_points_next is filled); the run fails if it is not
+faster than recompute + save, or not identical. The "DGW rows" column counts the added GW's rows
+of players with two fixtures in it; 23/24 has double gameweeks at GW25, 28, 34-37 (--season 2324
+--from 20), 25/26 has none yet.
+
+Usage:
+  python benchmarks/bench_feature_store.py --scale 10 --from 4
+  python benchmarks/bench_feature_store.py --scale 10 --season 2324 --from 20
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from bench_features import DEFAULT_CSVS, make_panel  # noqa: E402
+from feature_store import FeatureStore, build_features  # noqa: E402
+from panel_store import write_panel  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--csv", nargs="+", default=[str(ROOT / c) for c in DEFAULT_CSVS])
+    ap.add_argument("--scale", type=int, default=10)
+    ap.add_argument("--season", type=int, default=None, help="Season the gameweeks are added to (default: the latest)")
+    ap.add_argument("--from", dest="first", type=int, default=4, help="Gameweeks already in the store")
+    args = ap.parse_args()
+
+    panel = make_panel(args.csv, args.scale)
+    latest = args.season or panel["season"].max()
+    panel = panel[panel["season"] <= latest].reset_index(drop=True)
+    last_gw = int(panel.loc[panel["season"] == latest, "gw"].max())
+    double = panel.duplicated(["element", "season", "gw"], keep=False)
+    print(f"[INFO] panel: {len(panel):,} rows, season {latest} up to GW{last_gw}\n")
+
+    def upto(gw):
+        return panel[(panel["season"] != latest) | (panel["gw"] <= gw)].reset_index(drop=True)
+
+    slower = []
+    with tempfile.TemporaryDirectory() as tmp:
+        fs = FeatureStore(store=tmp)
+        fs.update(upto(args.first))
+        last = args.first
+        print(f"{'gameweek':<10}{'new rows':>10}{'DGW rows':>10}{'recompute (s)':>15}{'+ save (s)':>12}"
+              f"{'update (s)':>12}{'rows written':>15}  identical")
+        for gw in list(range(args.first + 1, last_gw + 1)) + [last_gw]:  # last: nothing new
+            current = upto(gw)
+            t0 = time.perf_counter()
+            full = build_features(current)
+            full_s = time.perf_counter() - t0
+            write_panel(full, str(Path(tmp) / "full"), "engineered")
+            save_s = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            df, written = fs.update(current)
+            update_s = time.perf_counter() - t0
+            try:
+                pd.testing.assert_frame_equal(df, full, check_exact=True)
+                pd.testing.assert_frame_equal(fs.read(current), full, check_exact=True)
+                same = "yes"
+            except AssertionError as e:
+                same = "no: " + str(e).splitlines()[0]
+            added = (panel["season"] == latest) & (panel["gw"] == gw) & (gw > last)
+            last = gw
+            print(f"GW{gw:<8}{int(added.sum()):>10,}{int((double & added).sum()):>10,}{full_s:>15.2f}{save_s:>12.2f}"
+                  f"{update_s:>12.2f}{written:>15,}  {same}")
+            if update_s >= save_s or same != "yes":
+                slower.append(gw)
+    if slower:
+        raise SystemExit(f"[FAIL] update not faster than recompute + save, or not identical: GW {slower}")
+    print("\n[OK] every update is faster than recompute + save, and stores the same rows")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Rolling form features: the old per-player groupby/rolling lambdas vs features.add_form_features.
+
+The panel is the repo's three season CSVs (one element id per player name) tiled --scale times (new element ids for every copy, float
+stats jittered so the copies differ), cast to the panel store dtypes like model.py reads them. Both
+groupings are checked: across seasons (model.py's default) and restarting every season.
+
+Usage:
+  python benchmarks/bench_features.py --scale 10
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from features import FORM_COLS, LAGS, MOMENTUM, WINDOWS, add_form_features  # noqa: E402
+from panel_store import apply_schema  # noqa: E402
+
+DEFAULT_CSVS = ["players_2324_panel.csv", "players_2425_panel.csv", "players2526_panel.csv"]
+KEEP = ["element", "season", "gw", "fixture", "full_name", "total_points"] + FORM_COLS
+
+
+def make_panel(csvs, scale: int, seed: int = 0) -> pd.DataFrame:
+    base = pd.concat([pd.read_csv(p, usecols=lambda c: c in KEEP, low_memory=False) for p in csvs],
+                     ignore_index=True)
+    base["season"] = base["season"].astype(str).str.replace("/", "", regex=False).astype(int)
+    # one id per player across seasons, like feature_engineering.py
+    base = base[base["full_name"].notna()]
+    base["element"] = pd.factorize(base["full_name"], sort=True)[0] + 1
+    rng = np.random.default_rng(seed)
+    step = int(base["element"].max()) + 1
+    copies = []
+    for k in range(scale):
+        part = base.copy()
+        part["element"] += k * step
+        if k:
+            part["full_name"] = part["full_name"] + f" ({k})"
+            for col in ("expected_goal_involvements", "ict_index", "expected_goals", "expected_assists",
+                        "creativity"):
+                part[col] = (part[col] * rng.uniform(0.5, 1.5, len(part))).round(2)
+        copies.append(part)
+    panel = apply_schema(pd.concat(copies, ignore_index=True))
+    panel["season"] = panel["season"].astype(int)
+    panel["gw"] = panel["gw"].astype(int)
+    return panel.sort_values(["element", "season", "gw"]).reset_index(drop=True)
+
+
+def old_form_features(df: pd.DataFrame, season_reset: bool) -> pd.DataFrame:
+    """What model.py did before features.py (by=['element'])."""
+    by = ["element", "season"] if season_reset else "element"
+    for n in WINDOWS:
+        for col in FORM_COLS:
+            df[f"{col}_mean{n}"] = df.groupby(by)[col].transform(lambda x: x.rolling(n, min_periods=1).mean())
+    for name, (col, short, long) in MOMENTUM.items():
+        df[name] = df[f"{col}_mean{short}"] - df[f"{col}_mean{long}"]
+    for name, col in LAGS.items():
+        df[name] = df.groupby(by)[col].shift(1)
+    return df
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--csv", nargs="+", default=[str(ROOT / c) for c in DEFAULT_CSVS])
+    ap.add_argument("--scale", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    panel = make_panel(args.csv, args.scale)
+    print(f"[INFO] panel: {len(panel):,} rows, {panel['element'].nunique():,} players\n")
+    print(f"{'grouping':<20}{'old (s)':>10}{'new (s)':>10}{'speedup':>9}  identical")
+    for season_reset in (False, True):
+        timings = {}
+        for label, fn in (("old", old_form_features), ("new", add_form_features)):
+            best = float("inf")
+            for _ in range(args.repeat):
+                df = panel.copy()
+                t0 = time.perf_counter()
+                fn(df, season_reset=season_reset)
+                best = min(best, time.perf_counter() - t0)
+            timings[label] = (best, df)
+        try:
+            pd.testing.assert_frame_equal(timings["new"][1], timings["old"][1], check_exact=True)
+            same = "yes"
+        except AssertionError as e:
+            same = "no: " + str(e).splitlines()[0]
+        grouping = "per season" if season_reset else "across seasons"
+        old_s, new_s = timings["old"][0], timings["new"][0]
+        print(f"{grouping:<20}{old_s:>10.3f}{new_s:>10.3f}{old_s / new_s:>8.0f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
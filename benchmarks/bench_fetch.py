@@ -0,0 +1,65 @@
+"""
+Wall-clock comparison: the old serial element-summary loop vs fpl_fetch.fetch_element_summaries.
+
+Runs against benchmarks/fake_fpl_api.py, so no traffic goes to the real FPL servers.
+
+Usage:
+  python benchmarks/bench_fetch.py --players 700 --latency 0.05 --workers 4 8 16
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fake_fpl_api import FakeFPLServer  # noqa: E402
+from fpl_fetch import FetchConfig, fetch_element_summaries, make_session  # noqa: E402
+
+
+def serial_loop(api: str, pids: list) -> tuple:
+    """The loop data_loader.py used to run: one request at a time, failures silently skipped."""
+    session = requests.Session()
+    ok = 0
+    start = time.perf_counter()
+    for pid in pids:
+        try:
+            resp = session.get(f"{api}/element-summary/{int(pid)}/", timeout=15)
+            resp.raise_for_status()
+            resp.json().get("history", [])
+            ok += 1
+        except requests.exceptions.RequestException:
+            continue
+        except ValueError:
+            continue
+    return time.perf_counter() - start, ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--players", type=int, default=700)
+    ap.add_argument("--latency", type=float, default=0.05, help="Simulated server latency per call (seconds)")
+    ap.add_argument("--fail-rate", type=float, default=0.02, help="Fraction of calls answering 503")
+    ap.add_argument("--workers", type=int, nargs="+", default=[4, 8, 16])
+    ap.add_argument("--rate", type=float, default=1000.0, help="Token bucket rate for the concurrent runs")
+    args = ap.parse_args()
+
+    with FakeFPLServer(args.players, latency=args.latency, fail_rate=args.fail_rate) as server:
+        pids = list(range(1, args.players + 1))
+
+        serial_s, serial_ok = serial_loop(server.api, pids)
+        print(f"{'mode':<16}{'wall (s)':>10}{'ok':>8}{'failed':>8}{'requests':>10}{'speedup':>9}")
+        print(f"{'serial':<16}{serial_s:>10.2f}{serial_ok:>8}{len(pids) - serial_ok:>8}{len(pids):>10}{1.0:>8.1f}x")
+
+        for w in args.workers:
+            config = FetchConfig(workers=w, rate=args.rate, burst=w, retries=3, backoff=0.05)
+            res = fetch_element_summaries(pids, api=server.api, config=config, session=make_session(w))
+            print(f"{f'workers={w}':<16}{res.elapsed:>10.2f}{len(res.ok):>8}{len(res.failed):>8}"
+                  f"{res.requests:>10}{serial_s / res.elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Full refresh vs incremental refresh of the current-season panel, against benchmarks/fake_fpl_api.py.
+
+  1. cold full refresh (empty cache)
+  2. the next gameweek finishes -> incremental refresh
+  3. nothing changed -> incremental refresh again
+  4. a full refresh without cache, to check the incremental panel is identical
+
+Usage:
+  python benchmarks/bench_incremental.py --players 700 --gws 8 --latency 0.05
+"""
+
+import argparse
+import filecmp
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fake_fpl_api import FakeFPLServer  # noqa: E402
+from data_loader import refresh  # noqa: E402
+from fpl_fetch import FetchConfig  # noqa: E402
+
+# always ask the stand-in server, so the timings show the revalidation cost rather than TTL hits
+NO_TTL = {"bootstrap-static": 0, "fixtures": 0, "element-summary": 0}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--players", type=int, default=700)
+    ap.add_argument("--gws", type=int, default=8)
+    ap.add_argument("--latency", type=float, default=0.05)
+    ap.add_argument("--workers", type=int, default=8)
+    args = ap.parse_args()
+
+    config = FetchConfig(workers=args.workers, rate=1000.0, burst=args.workers)
+    timings = []
+    with tempfile.TemporaryDirectory() as tmp, FakeFPLServer(args.players, args.gws, args.latency) as server:
+        panel_path = str(Path(tmp) / "players2526_panel.csv")
+        cache_dir = str(Path(tmp) / "cache")
+
+        def run(label, **kw):
+            before = server.requests
+            t0 = time.perf_counter()
+            panel = refresh(panel_path, api=server.api, config=config, cache_dir=cache_dir, cache_ttls=NO_TTL, **kw)
+            timings.append((label, time.perf_counter() - t0, server.requests - before, len(panel)))
+
+        run("full (cold cache)")
+        server.advance()
+        run("incremental +1 GW", incremental=True)
+        run("incremental, no change", incremental=True)
+
+        check_path = str(Path(tmp) / "full_check.csv")
+        refresh(check_path, api=server.api, config=config, cache_dir=None)
+        identical = filecmp.cmp(panel_path, check_path, shallow=False)
+
+    print()
+    print(f"{'run':<26}{'wall (s)':>10}{'requests':>10}{'rows':>8}")
+    for label, secs, reqs, rows in timings:
+        print(f"{label:<26}{secs:>10.2f}{reqs:>10}{rows:>8}")
+    print(f"\nincremental panel identical to a full refresh: {identical}")
+
+
+if __name__ == "__main__":
+    main()
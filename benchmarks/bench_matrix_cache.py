@@ -0,0 +1,81 @@
+"""
+Feature matrix cache (matrix_cache.py): time and peak memory to get model.py's training / test matrices.
+
+- rebuild: split + design_matrices on the engineered panel already in memory (model.py without the cache)
+- cache miss: read the panel from the store, build the walk-forward matrix and write the entry
+- cache hit: open the entry memory-mapped and slice the training / test rows (model.matrices)
+
+Peak memory is what tracemalloc sees allocated by the step (numpy / pandas buffers included; the
+memmapped pages are file cache, not counted). Works on a copy of --store.
+
+Usage:
+  python benchmarks/bench_matrix_cache.py --store /path/to/store --repeat 3
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import model  # noqa: E402
+from matrix_cache import MatrixCache  # noqa: E402
+from panel_store import STORE_DIR  # noqa: E402
+
+
+def measure(fn, repeat: int):
+    """(best seconds, peak MB of the last call)."""
+    best = float("inf")
+    for i in range(repeat):
+        if i == repeat - 1:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--store", default=STORE_DIR)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = str(Path(tmp) / "store")
+        shutil.copytree(args.store, store, ignore=shutil.ignore_patterns("matrices", "models", "_predictions"))
+        df = model.engineer(model.load_data(store), store)
+        cache = MatrixCache(store, model.panels_engineered)
+
+        def rebuild():
+            train_df, test_df = model.split(df)
+            return model.design_matrices(train_df, test_df)
+
+        def miss():
+            shutil.rmtree(cache.root, ignore_errors=True)
+            return cache.matrix(model.team_features, model.drop_cols + ["was_home"])
+
+        def hit():
+            return model.matrices(df, store)
+
+        rows = [("rebuild (split + design_matrices)", *measure(rebuild, args.repeat)),
+                ("cache miss (read + build + write)", *measure(miss, args.repeat))]
+        miss()
+        rows.append(("cache hit (memmap + slice)", *measure(hit, args.repeat)))
+        X_train = hit()[2]
+        print(f"\n[INFO] {X_train.shape[0]} training rows x {X_train.shape[1]} features, "
+              f"{cache.entries()[0].name}")
+        print(f"{'step':<36}{'seconds':>9}{'peak MB':>9}")
+        for name, seconds, peak in rows:
+            print(f"{name:<36}{seconds:>9.3f}{peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
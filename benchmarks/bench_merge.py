@@ -0,0 +1,66 @@
+"""
+merge_folder over a synthetic per-player / per-GW folder: serial vs process pool vs pyarrow engine.
+
+The synthetic folder (synthetic.make_folder) mimics the archive layout (ROOT/123_First_Last/gw5.csv, one
+row per file) and mixes the header variants merge_folder has to cope with.
+
+Usage:
+  python benchmarks/bench_merge.py --files 20000 --workers 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from merge_fpl_gw_to_panel import merge_folder  # noqa: E402
+from synthetic import make_folder  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--files", type=int, default=20000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--skip-pyarrow", action="store_true")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "players"
+        t0 = time.perf_counter()
+        make_folder(root, args.files)
+        print(f"[INFO] wrote {args.files:,} files in {time.perf_counter() - t0:.1f}s")
+
+        runs = [("serial", dict(workers=1)), (f"workers={args.workers}", dict(workers=args.workers))]
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            args.skip_pyarrow = True
+        if not args.skip_pyarrow:
+            runs.append((f"workers={args.workers} pyarrow", dict(workers=args.workers, engine="pyarrow")))
+
+        results = {}
+        print(f"{'mode':<24}{'wall (s)':>10}{'rows':>9}{'speedup':>9}  identical")
+        for label, kw in runs:
+            t0 = time.perf_counter()
+            panel = merge_folder(str(root), **kw)
+            secs = time.perf_counter() - t0
+            results[label] = (secs, panel)
+            base_secs, base = results["serial"]
+            try:
+                pd.testing.assert_frame_equal(panel, base)
+                same = "yes"
+            except AssertionError:
+                # pyarrow infers ISO timestamps (kickoff_time) as datetimes; name the columns that differ
+                diff = [c for c in base.columns if c not in panel.columns or not base[c].equals(panel[c])]
+                same = "no: " + ", ".join(diff)
+            print(f"{label:<24}{secs:>10.2f}{len(panel):>9,}{base_secs / secs:>8.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
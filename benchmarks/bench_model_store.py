@@ -0,0 +1,87 @@
+"""
+Model persistence: full retrain vs warm start when a gameweek is added, and vs loading on unchanged data.
+
+Reads the engineered panel model.py keeps in the panel store (run model.py once first) and builds the
+same training matrix as model.py for train_gw_until = --from, --from + 1, ... For every step the
+model is trained from scratch and, separately, brought up to date with model_store.fit_or_load (first
+step: full fit, then a warm start per added gameweek); both are scored on the following gameweek.
+
+Usage:
+  FPL_STORE=/path/to/store python benchmarks/bench_model_store.py --from 3
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from model import xgb_params  # noqa: E402
+from model_store import fit_or_load  # noqa: E402
+from panel_store import STORE_DIR, read_panel  # noqa: E402
+
+# as in model.py
+TRAIN_SEASONS, CURR_SEASON = [2324, 2425], 2526
+DROP_COLS = ["total_points_next", "total_points", "full_name", "team_name_current", "team_name_gw",
+             "opponent_team_name", "season", "fixture", "element", "gw", "team_id_current", "team_id_gw",
+             "opponent_team", "position", "was_home"]
+PARAMS = xgb_params
+
+
+def matrices(df: pd.DataFrame, until: int):
+    train = df[df["season"].isin(TRAIN_SEASONS) | ((df["season"] == CURR_SEASON) & (df["gw"] <= until))]
+    train = train.dropna(subset=["total_points_next"])
+    test = df[(df["season"] == CURR_SEASON) & (df["gw"] == until + 1)].dropna(subset=["total_points_next"])
+    train = pd.get_dummies(train.assign(position_copy=train["position"]), columns=["position_copy"], drop_first=True)
+    test = pd.get_dummies(test.assign(position_copy=test["position"]), columns=["position_copy"], drop_first=True)
+    test = test.reindex(columns=train.columns, fill_value=0)
+    features = [c for c in train.columns if c not in DROP_COLS]
+    period = train["season"].astype(int) * 100 + train["gw"].astype(int)
+    return (train[features].fillna(0), train["total_points_next"].astype(float), period,
+            test[features].fillna(0), test["total_points_next"].astype(float))
+
+
+def rmse(model, X, y) -> float:
+    return float(np.sqrt(np.mean((model.predict(X) - y) ** 2)))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--store", default=STORE_DIR)
+    ap.add_argument("--dataset", default="all_panels_engineered")
+    ap.add_argument("--from", dest="first", type=int, default=3)
+    ap.add_argument("--warm-rounds", type=int, default=50)
+    args = ap.parse_args()
+
+    df = read_panel(args.store, args.dataset, seasons=TRAIN_SEASONS + [CURR_SEASON])
+    df["season"] = df["season"].astype(int)
+    df["gw"] = df["gw"].astype(int)
+    # the last GW has no total_points_next yet, and every step needs a following GW to score on
+    last = int(df.loc[df["season"] == CURR_SEASON, "gw"].max()) - 2
+
+    print(f"{'train to GW':>12}{'rows':>8}{'full fit (s)':>14}{'store':>12}{'(s)':>7}{'trees':>7}"
+          f"{'RMSE full':>11}{'RMSE store':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for until in range(args.first, last + 1):
+            X, y, period, X_test, y_test = matrices(df, until)
+            t0 = time.perf_counter()
+            full = xgb.XGBRegressor(**PARAMS).fit(X, y)
+            full_s = time.perf_counter() - t0
+            stored, report = fit_or_load(xgb.XGBRegressor(**PARAMS), X, y, period, tmp, warm_rounds=args.warm_rounds)
+            print(f"{until:>12}{len(X):>8,}{full_s:>14.2f}{report['action']:>12}{report['seconds']:>7.2f}"
+                  f"{report['trees']:>7}{rmse(full, X_test, y_test):>11.3f}{rmse(stored, X_test, y_test):>12.3f}")
+        # and once more with nothing changed
+        stored, report = fit_or_load(xgb.XGBRegressor(**PARAMS), X, y, period, tmp, warm_rounds=args.warm_rounds)
+        print(f"{last:>12}{len(X):>8,}{full_s:>14.2f}{report['action']:>12}{report['seconds']:>7.2f}"
+              f"{report['trees']:>7}{rmse(full, X_test, y_test):>11.3f}{rmse(stored, X_test, y_test):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
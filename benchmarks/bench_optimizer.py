@@ -0,0 +1,63 @@
+"""
+Greedy XI picker (model.py's old iterrows loop) vs the exact MILP in squad_optimizer.py.
+
+Historical gameweeks of the current season panel (players2526_panel.csv): the "prediction" for a GW
+is each player's mean total_points over their previous 5 GWs, so both pickers see only what was known
+before the GW, and the XI is then scored on the points actually scored. Prices are price_now (the
+panel has no price history). Both solve the same problem: an XI in --formation, budget and club cap
+on the XI, no captain. The last column is the full 15-man squad + XI + captain solve.
+
+Usage:
+  python benchmarks/bench_optimizer.py --budget 83
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from squad_optimizer import greedy_xi, pick_squad  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--csv", default=str(ROOT / "players2526_panel.csv"))
+    ap.add_argument("--budget", type=float, default=100.0)
+    ap.add_argument("--max-per-team", type=int, default=3)
+    ap.add_argument("--formation", default="1-3-4-3", help="GK-DEF-MID-FWD")
+    args = ap.parse_args()
+
+    formation = dict(zip(["Goalkeeper", "Defender", "Midfielder", "Forward"],
+                         (int(k) for k in args.formation.split("-"))))
+    df = pd.read_csv(args.csv, low_memory=False).sort_values(["element", "gw"])
+    df["predicted_points_next"] = df.groupby("element")["total_points"].transform(
+        lambda x: x.shift(1).rolling(5, min_periods=1).mean())
+    df["team_name_current"] = df["team_name_current"].astype(str)
+
+    print(f"{'gw':>3}{'pool':>6}{'greedy pred':>13}{'milp pred':>11}{'greedy pts':>12}{'milp pts':>10}"
+          f"{'greedy (ms)':>13}{'milp (ms)':>11}{'squad (ms)':>12}")
+    totals = [0.0, 0.0, 0.0, 0.0]
+    for gw in sorted(df["gw"].unique())[1:]:
+        pool = df[(df["gw"] == gw) & df["predicted_points_next"].notna() & (df["price_now"] > 0)]
+
+        t0 = time.perf_counter()
+        greedy = greedy_xi(pool, formation, args.budget, args.max_per_team)
+        greedy_ms = (time.perf_counter() - t0) * 1000
+        exact = pick_squad(pool, formation, args.budget, args.max_per_team, squad_size=None, captain=False)
+        squad = pick_squad(pool, formation, args.budget, args.max_per_team)
+
+        row = [greedy["predicted_points_next"].sum(), exact.points,
+               greedy["total_points"].sum(), exact.xi["total_points"].sum()]
+        totals = [t + r for t, r in zip(totals, row)]
+        print(f"{gw:>3}{len(pool):>6}{row[0]:>13.1f}{row[1]:>11.1f}{row[2]:>12.0f}{row[3]:>10.0f}"
+              f"{greedy_ms:>13.1f}{exact.solve_time * 1000:>11.1f}{squad.solve_time * 1000:>12.1f}")
+    print(f"{'all':>3}{'':>6}{totals[0]:>13.1f}{totals[1]:>11.1f}{totals[2]:>12.0f}{totals[3]:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
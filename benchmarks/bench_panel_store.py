@@ -0,0 +1,80 @@
+"""
+Load time and memory: the panel CSVs vs the season-partitioned Parquet store (panel_store.py).
+
+Uses the panel CSVs shipped in the repo by default. The "CSV round-trip" row is what
+feature_engineering.py + model.py used to do: read every panel with dtype=str, concat, write
+all_panels.csv, read it back with type inference.
+
+Usage:
+  python benchmarks/bench_panel_store.py
+  python benchmarks/bench_panel_store.py --csv a.csv b.csv --repeat 5
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from panel_store import RAW, read_panel, write_panel  # noqa: E402
+
+DEFAULT_CSVS = ["players_2324_panel.csv", "players_2425_panel.csv", "players2526_panel.csv"]
+MODEL_COLS = ["element", "season", "gw", "total_points", "minutes", "expected_goal_involvements", "bps",
+              "ict_index", "expected_goals", "expected_assists", "creativity", "position", "price_now",
+              "team_name_current", "full_name"]
+
+
+def best_of(fn, repeat: int):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--csv", nargs="+", default=[str(ROOT / c) for c in DEFAULT_CSVS])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = str(Path(tmp) / "store")
+        for path in args.csv:
+            write_panel(pd.read_csv(path, low_memory=False), store, RAW)
+        all_csv = Path(tmp) / "all_panels.csv"
+
+        def csv_round_trip():
+            merged = pd.concat([pd.read_csv(p, dtype=str, low_memory=False) for p in args.csv], ignore_index=True)
+            merged.to_csv(all_csv, index=False)
+            return pd.read_csv(all_csv, low_memory=False)
+
+        seasons = sorted(read_panel(store, RAW, columns=["season"])["season"].unique())
+        runs = [
+            ("CSV round-trip (old)", csv_round_trip),
+            ("CSV read_csv", lambda: pd.concat([pd.read_csv(p, low_memory=False) for p in args.csv],
+                                               ignore_index=True)),
+            ("store, all columns", lambda: read_panel(store, RAW)),
+            ("store, model columns", lambda: read_panel(store, RAW, columns=MODEL_COLS)),
+            (f"store, model cols, {seasons[-1]} gw>=3",
+             lambda: read_panel(store, RAW, columns=MODEL_COLS, seasons=[seasons[-1]], gw_min=3)),
+        ]
+
+        csv_bytes = sum(Path(p).stat().st_size for p in args.csv)
+        store_bytes = sum(p.stat().st_size for p in Path(store).rglob("*.parquet"))
+        print(f"on disk: CSV {csv_bytes / 1e6:.1f} MB, store {store_bytes / 1e6:.1f} MB\n")
+        print(f"{'load':<32}{'time (ms)':>10}{'rows':>9}{'cols':>6}{'memory (MB)':>13}")
+        for label, fn in runs:
+            secs, df = best_of(fn, args.repeat)
+            mem = df.memory_usage(deep=True).sum() / 1e6
+            print(f"{label:<32}{secs * 1000:>10.0f}{len(df):>9,}{df.shape[1]:>6}{mem:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Transfer planner scaling: runtime, squads scored and peak memory for H = 1..6 and growing pools.
+
+Players come from the last gameweek of players2526_panel.csv (position, club, price_now), tiled
+--scale times with renamed copies for the bigger pools. Each player gets a forecast per gameweek
+(their 5-GW points mean times a random per-week factor), and the starting squad is the MILP pick for
+a differently-noised forecast, so there is something to fix. With H=1 and one transfer the beam
+result is checked against trying every single transfer in the full pool.
+
+Usage:
+  python benchmarks/bench_planner.py --scale 1 2 5 --horizons 1 2 4 6
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from squad_optimizer import pick_squad  # noqa: E402
+from transfer_planner import HIT_COST, MAX_PER_TEAM, SLOTS, plan_transfers, xi_points  # noqa: E402
+
+
+def make_players(csv: str, scale: int, horizon: int, seed: int = 0) -> pd.DataFrame:
+    df = pd.read_csv(csv, low_memory=False).sort_values(["element", "gw"])
+    df["form"] = df.groupby("element")["total_points"].transform(lambda x: x.rolling(5, min_periods=1).mean())
+    base = df[df["gw"] == df["gw"].max()]
+    base = base[base["price_now"].notna() & (base["price_now"] > 0)]
+    base = base[["full_name", "position", "team_name_current", "price_now", "form"]].reset_index(drop=True)
+    copies = []
+    for k in range(scale):
+        part = base.copy()
+        if k:
+            part["full_name"] = part["full_name"] + f" ({k})"
+        copies.append(part)
+    players = pd.concat(copies, ignore_index=True)
+    rng = np.random.default_rng(seed)
+    for h in range(horizon):
+        players[f"gw{h + 1}"] = players["form"] * rng.uniform(0.5, 1.5, len(players))
+    players["start_pred"] = players["form"] * rng.uniform(0.2, 1.8, len(players))
+    return players
+
+
+def brute_force_one(players: pd.DataFrame, squad, bank: float) -> float:
+    """Best GW1 XI points over every single transfer (and none), no pruning."""
+    names = players["full_name"].to_numpy()
+    pts = players["gw1"].to_numpy()
+    price = players["price_now"].to_numpy()
+    team = pd.factorize(players["team_name_current"])[0]
+    pos = players["position"].to_numpy()
+    lookup = {n: i for i, n in enumerate(names)}
+    idx = np.concatenate([[lookup[n] for n in squad if pos[lookup[n]] == p] for p, _ in SLOTS]).astype(int)
+    options = [idx]
+    for slot, out in enumerate(idx):
+        for c in np.flatnonzero(pos == pos[out]):
+            if c in idx or bank + price[out] - price[c] < -1e-9:
+                continue
+            new = idx.copy()
+            new[slot] = c
+            if np.bincount(team[new]).max() <= MAX_PER_TEAM:
+                options.append(new)
+    squads = np.stack(options)
+    return float(xi_points(pts[squads][:, :, None]).max())
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--csv", default=str(ROOT / "players2526_panel.csv"))
+    ap.add_argument("--scale", type=int, nargs="+", default=[1, 2, 5])
+    ap.add_argument("--horizons", type=int, nargs="+", default=[1, 2, 4, 6])
+    ap.add_argument("--beam", type=int, default=50)
+    args = ap.parse_args()
+
+    print(f"{'pool':>6}{'H':>3}{'plan':>9}{'no moves':>10}{'squads':>9}{'time (s)':>10}{'peak (MB)':>11}")
+    for scale in args.scale:
+        players = make_players(args.csv, scale, max(args.horizons))
+        start = pick_squad(players, None, 100.0, MAX_PER_TEAM, points_col="start_pred", captain=False)
+        squad = start.squad["full_name"].tolist()
+        bank = round(100.0 - start.cost, 1)
+        for h in args.horizons:
+            cols = [f"gw{i + 1}" for i in range(h)]
+            t0 = time.perf_counter()
+            plan = plan_transfers(players, cols, squad, bank, free_transfers=1, beam=args.beam)
+            secs = time.perf_counter() - t0
+            # separate run for memory: tracemalloc slows the search down several times
+            tracemalloc.start()
+            plan_transfers(players, cols, squad, bank, free_transfers=1, beam=args.beam)
+            peak = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+            print(f"{len(players):>6}{h:>3}{plan.total:>9.1f}{plan.baseline:>10.1f}{plan.evaluated:>9,}"
+                  f"{secs:>10.2f}{peak:>11.1f}")
+
+        one = plan_transfers(players, ["gw1"], squad, bank, free_transfers=1, max_transfers=1, hit_cost=HIT_COST)
+        exact = brute_force_one(players, squad, bank)
+        print(f"{'':>6}H=1, one transfer: beam {one.total:.2f} vs every transfer {exact:.2f}"
+              f" -> {'same' if abs(one.total - exact) < 1e-9 else 'DIFFERENT'}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Single model vs per-position models (position_models.py): accuracy and training wall time.
+
+Walk-forward on the engineered panel in the store (run model.py first): for every --gws GW of
+--season, train on everything before it (model.py's train_gw_until = GW - 1 / test_gw = GW split) and
+score next-GW predictions of the GW's rows. The single model is model.py's; the per-position models
+use the same params and features, once per --workers count (1 = one after the other in this process).
+Every fit is from scratch (a temporary model directory).
+
+Usage:
+  python benchmarks/bench_position_models.py --season 2526 --gws 4 5 6 --workers 1 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import model  # noqa: E402
+from panel_store import STORE_DIR  # noqa: E402
+from position_models import player_positions, train_by_position  # noqa: E402
+from squad_optimizer import POSITIONS  # noqa: E402
+
+
+def errors(pred: np.ndarray, test_df: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({"position": test_df["position"].astype(str).to_numpy(),
+                         "err": pred - test_df["total_points_next"].to_numpy(dtype=float)})
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--store", default=STORE_DIR)
+    ap.add_argument("--season", type=int, default=model.curr_season)
+    ap.add_argument("--gws", type=int, nargs="+", default=[4, 5, 6])
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = ap.parse_args()
+
+    df = model.engineer(model.load_data(args.store), args.store)
+    position = player_positions(df)
+    params = model.make_model().get_params()
+    results = {"single": []}
+    times = {"single": 0.0}
+    for w in args.workers:
+        results[f"per position x{w}"], times[f"per position x{w}"] = [], 0.0
+
+    for gw in args.gws:
+        before = (df["season"] < args.season) | ((df["season"] == args.season) & (df["gw"] < gw))
+        train_df = df[before].dropna(subset=["total_points_next"])
+        test_df = df[(df["season"] == args.season) & (df["gw"] == gw)].dropna(subset=["total_points_next"])
+        X_train, y_train, X_test, _, period = model.design_matrices(train_df, test_df)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            t0 = time.perf_counter()
+            single = model.make_model().fit(X_train, y_train)
+            times["single"] += time.perf_counter() - t0
+            results["single"].append(errors(single.predict(X_test), test_df))
+            for w in args.workers:
+                t0 = time.perf_counter()
+                models, _ = train_by_position(X_train, y_train, period, position.loc[train_df.index],
+                                              os.path.join(tmp, f"x{w}"), params, workers=w, retrain=True)
+                times[f"per position x{w}"] += time.perf_counter() - t0
+                pred = models.predict(X_test, position.loc[test_df.index])
+                results[f"per position x{w}"].append(errors(pred, test_df))
+        print(f"[INFO] GW{gw}: {len(X_train)} train / {len(X_test)} test rows")
+
+    print(f"\n{'model':<18}" + "".join(f"{p + ' RMSE':>10}" for p in ["GK", "DEF", "MID", "FWD"])
+          + f"{'RMSE':>8}{'MAE':>8}{'fit (s)':>9}")
+    for name, parts in results.items():
+        e = pd.concat(parts)
+        by_pos = e.groupby("position")["err"].apply(lambda x: np.sqrt(np.mean(x ** 2)))
+        print(f"{name:<18}" + "".join(f"{by_pos.get(p, np.nan):>10.3f}" for p in POSITIONS)
+              + f"{np.sqrt(np.mean(e['err'] ** 2)):>8.3f}{np.mean(np.abs(e['err'])):>8.3f}{times[name]:>9.1f}")
+    print(f"\n[INFO] {os.cpu_count()} core(s); the per-position workers split them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+What-if squad re-selection (selection_service.py): latency of random squad edits, in process and over
+HTTP with N concurrent clients, vs a cold full solve (model.py's pick: pick_squad on the whole pool).
+
+Every client is one session doing a random walk of edits: lock a top player, unlock, ban a player of
+its current squad, unban, ban / unban a club, budget 95-100.5, another formation. Latency is
+measured by the client (HTTP round trip included) and split by how the service answered (solve,
+previous squad reused, cache). The answers of --check distinct requests are checked against
+pick_squad on the full pool: the same objective (XI + captain + bench weight x bench), up to HiGHS'
+relative gap (the full-pool solve can stop that far short of the optimum).
+
+Usage:
+  python benchmarks/bench_selection_service.py --predictions curr_gw_predictions.csv --clients 1 4 16 --requests 40
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from selection_service import SelectionService, make_server  # noqa: E402
+from squad_optimizer import pick_squad, selectable  # noqa: E402
+
+GAP = 1e-4  # HiGHS' default mip_rel_gap
+FORMATIONS = ["3-4-3", "3-5-2", "4-4-2", "4-3-3", "4-5-1", "5-3-2", "5-4-1"]
+
+
+class Walk:
+    """One client's random sequence of edits (no locked player at a banned club, a few of each at most)."""
+
+    def __init__(self, pool: pd.DataFrame, seed: int):
+        self.rng = np.random.default_rng(seed)
+        top = pool.sort_values("predicted_points_next", ascending=False).head(60)
+        self.top = dict(zip(top["full_name"], top["team_name_current"]))
+        self.clubs = sorted(pool["team_name_current"].unique())
+        self.locked, self.banned, self.banned_clubs = {}, set(), set()
+        self.squad = []
+
+    def next(self) -> dict:
+        rng = self.rng
+        kind = rng.choice(["lock", "unlock", "ban", "unban", "ban_club", "unban_club", "budget", "formation"])
+        if kind == "lock" and len(self.locked) < 3:
+            name = rng.choice([n for n, c in self.top.items() if c not in self.banned_clubs and n not in self.locked])
+            self.locked[name] = self.top[name]
+            self.banned.discard(name)
+            return {"lock": [name]}
+        if kind == "unlock" and self.locked:
+            name = rng.choice(sorted(self.locked))
+            del self.locked[name]
+            return {"unlock": [name]}
+        if kind == "ban" and len(self.banned) < 3 and self.squad:
+            name = rng.choice([n for n in self.squad if n not in self.locked] or self.squad)
+            self.banned.add(name)
+            self.locked.pop(name, None)
+            return {"ban": [name]}
+        if kind == "unban" and self.banned:
+            name = rng.choice(sorted(self.banned))
+            self.banned.discard(name)
+            return {"unban": [name]}
+        if kind == "ban_club" and len(self.banned_clubs) < 2:
+            club = rng.choice([c for c in self.clubs if c not in self.locked.values()])
+            self.banned_clubs.add(club)
+            return {"ban_club": [club]}
+        if kind == "unban_club" and self.banned_clubs:
+            club = rng.choice(sorted(self.banned_clubs))
+            self.banned_clubs.discard(club)
+            return {"unban_club": [club]}
+        if kind == "formation":
+            return {"formation": str(rng.choice(FORMATIONS))}
+        return {"budget": float(rng.choice(np.arange(95.0, 101.0, 0.5)))}
+
+
+def http(url: str):
+    def call(body: dict) -> dict:
+        req = urllib.request.Request(url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req) as resp:
+            return json.loads(resp.read())
+    return call
+
+
+def in_process(service: SelectionService):
+    def call(body: dict) -> dict:
+        body = dict(body)
+        session = body.pop("session")
+        if body.pop("reset", False):
+            service.reset(session)
+        return service.solve(body, session).to_json()
+    return call
+
+
+def objective(answer: dict, bench_weight: float = 0.1) -> float:
+    pts = [(r["predicted_points_next"], r["starting"], r["captain"]) for r in answer["squad"]]
+    return sum(p * (1 if s else bench_weight) + p * c for p, s, c in pts)
+
+
+def run_clients(call, pool: pd.DataFrame, clients: int, requests: int, seed: int) -> list:
+    """[(seconds, source, answer)] of every request of every client."""
+    out, lock = [], threading.Lock()
+
+    def client(i: int):
+        walk = Walk(pool, seed + i)
+        answer = call({"session": f"c{i}", "reset": True})
+        walk.squad = [r["full_name"] for r in answer["squad"]]
+        for _ in range(requests):
+            body = {"session": f"c{i}", **walk.next()}
+            t0 = time.perf_counter()
+            answer = call(body)
+            seconds = time.perf_counter() - t0
+            walk.squad = [r["full_name"] for r in answer["squad"]]
+            with lock:
+                out.append((seconds, answer["source"], answer))
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+
+def stats(ms: np.ndarray) -> str:
+    if not len(ms):
+        return f"{'-':>8}{'-':>8}{'-':>8}"
+    return f"{np.percentile(ms, 50):>8.1f}{np.percentile(ms, 95):>8.1f}{ms.max():>8.1f}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--predictions", required=True, help="model.py's curr_gw_predictions.csv")
+    ap.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    ap.add_argument("--requests", type=int, default=40, help="edits per client")
+    ap.add_argument("--check", type=int, default=20, help="distinct requests re-solved on the full pool")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    df = pd.read_csv(args.predictions)
+    pool = selectable(df)
+    print(f"[INFO] {len(pool)} players in the pool")
+    print(f"{'':<30}{'requests':>9}{'p50 ms':>8}{'p95 ms':>8}{'max ms':>8}{'req/s':>8}   solve / previous / cache")
+
+    solved = {}
+    for n in [0] + args.clients:  # 0: one client, in process
+        service = SelectionService(df)  # fresh cache per run
+        if n:
+            server = make_server(service, port=0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            call = http(f"http://127.0.0.1:{server.server_address[1]}/solve")
+        else:
+            call = in_process(service)
+        t0 = time.perf_counter()
+        out = run_clients(call, pool, max(n, 1), args.requests, args.seed)
+        wall = time.perf_counter() - t0
+        if n:
+            server.shutdown()
+            server.server_close()
+        ms = np.array([s for s, _, _ in out]) * 1000
+        sources = [src for _, src, _ in out]
+        name = f"HTTP, {n} client(s)" if n else "in process, 1 client"
+        print(f"{name:<30}{len(out):>9}{stats(ms)}{len(out) / wall:>8.1f}   "
+              + " / ".join(str(sources.count(s)) for s in ("solve", "previous", "cache")))
+        for src in ("solve", "previous", "cache"):
+            part = np.array([s for s, k, _ in out if k == src]) * 1000
+            print(f"{f'  {src}':<30}{len(part):>9}{stats(part)}")
+        for _, src, answer in out:
+            if src == "solve":
+                solved[json.dumps(answer["request"], sort_keys=True)] = answer
+
+    # the same requests solved cold, model.py's way: the whole pool, presolve on
+    cold, bad = [], 0
+    for key in list(solved)[:args.check]:
+        req, answer = json.loads(key), solved[key]
+        rows = pool[~pool["team_name_current"].isin(req["banned_clubs"])]
+        selection = pick_squad(rows, req["formation"], req["budget"], req["max_per_team"],
+                               squad_size=req["squad_size"], locked=req["locked"], banned=req["banned"])
+        cold.append(selection.solve_time * 1000)
+        full = objective({"squad": selection.squad.to_dict("records")})
+        if objective(answer) < full - GAP * abs(full) - 1e-9:
+            bad += 1
+            print(f"[WARN] {req}: service {objective(answer):.4f}, full pool {full:.4f}")
+    print(f"{'cold pick_squad, full pool':<30}{len(cold):>9}{stats(np.array(cold))}")
+    if bad:
+        print(f"[FAIL] {bad} of {len(cold)} answers below the full-pool optimum")
+    else:
+        print(f"[OK] {len(cold)} service answers reach the full-pool optimum (within HiGHS' gap)")
+
+
+if __name__ == "__main__":
+    main()
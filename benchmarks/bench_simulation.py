@@ -0,0 +1,82 @@
+"""
+Monte Carlo lineup evaluation (squad_simulation.py): time to draw the scenarios and to score lineups.
+
+A synthetic pool (--players, 20 clubs, predictions ~ gamma) and a residual model fitted on synthetic
+out-of-sample rows. Per scenario count: simulate() for a 15-man squad, evaluate() of all of its ~6k
+legal XI / captain lineups, and evaluate() of --random random XIs drawn from the whole pool.
+
+Usage:
+  python benchmarks/bench_simulation.py --scenarios 5000 20000 50000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from squad_optimizer import POSITIONS  # noqa: E402
+from squad_simulation import ResidualModel, evaluate, simulate, squad_lineups  # noqa: E402
+
+
+def synthetic_pool(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "position": rng.choice(POSITIONS, n, p=[0.1, 0.35, 0.4, 0.15]),
+        "team_name_current": rng.integers(0, 20, n).astype(str),
+        "predicted_points_next": rng.gamma(1.5, 1.5, n),
+    })
+
+
+def synthetic_residuals(n: int, seed: int = 1) -> pd.DataFrame:
+    df = synthetic_pool(n, seed)
+    rng = np.random.default_rng(seed)
+    df["season"], df["gw"] = 2526, rng.integers(1, 39, n)
+    df["total_points_next"] = np.maximum(rng.poisson(df["predicted_points_next"]) - 1, -2)
+    return df
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--players", type=int, default=700)
+    ap.add_argument("--scenarios", type=int, nargs="+", default=[5000, 20000, 50000])
+    ap.add_argument("--random", type=int, default=10000, help="random pool lineups per run")
+    args = ap.parse_args()
+
+    model = ResidualModel.fit(synthetic_residuals(20000))
+    pool = synthetic_pool(args.players)
+    squad = pd.concat([pool[pool["position"] == p].head(k) for p, k in zip(POSITIONS, [2, 5, 5, 3])])
+    xi, captain = squad_lineups(squad["position"].to_numpy())
+    rng = np.random.default_rng(2)
+    rand_xi = np.array([rng.choice(args.players, 11, replace=False) for _ in range(args.random)])
+    rand_cap = rand_xi[np.arange(args.random), rng.integers(0, 11, args.random)]
+
+    print(f"{'scenarios':>10}{'sim squad (s)':>15}{'squad lineups':>15}{'eval (s)':>10}"
+          f"{'sim pool (s)':>14}{'pool lineups':>14}{'eval (s)':>10}{'MB':>8}")
+    for s in args.scenarios:
+        t0 = time.perf_counter()
+        sims = simulate(model, squad["predicted_points_next"].to_numpy(), squad["position"],
+                        squad["team_name_current"], s)
+        t_sim = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        evaluate(sims, xi, captain)
+        t_eval = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        sims = simulate(model, pool["predicted_points_next"].to_numpy(), pool["position"],
+                        pool["team_name_current"], s)
+        t_psim = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        evaluate(sims, rand_xi, rand_cap)
+        t_peval = time.perf_counter() - t0
+        print(f"{s:>10}{t_sim:>15.3f}{len(captain):>15}{t_eval:>10.3f}"
+              f"{t_psim:>14.3f}{args.random:>14}{t_peval:>10.3f}{sims.nbytes / 1e6:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
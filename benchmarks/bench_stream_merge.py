@@ -0,0 +1,75 @@
+"""
+Peak memory of merge_folder (in memory) vs merge_folder_streaming (--stream) as the input grows.
+
+Every run happens in a fresh subprocess, so the reported peak RSS belongs to that mode alone.
+Uses the synthetic folder from synthetic.py.
+
+Usage:
+  python benchmarks/bench_stream_merge.py --files 5000 10000 20000 --run-rows 20000
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from merge_fpl_gw_to_panel import merge_folder, merge_folder_streaming  # noqa: E402
+from synthetic import make_folder  # noqa: E402
+
+DEMO_COLS = ["element", "gw", "full_name", "minutes", "expected_goal_involvements", "ict_index", "expected_goals",
+             "expected_assists", "bps", "fixture", "starts", "clean_sheets", "assists", "creativity",
+             "total_points", "bonus", "opponent_team", "season"]
+
+
+def child(mode: str, root: str, demo: str, output: str, run_rows: int) -> None:
+    t0 = time.perf_counter()
+    if mode == "stream":
+        rows = merge_folder_streaming(root, output, demo, run_rows=run_rows)
+    else:
+        panel = merge_folder(root, demo_csv=demo)
+        panel.to_csv(output, index=False)
+        rows = len(panel)
+    secs = time.perf_counter() - t0
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    print(json.dumps({"rows": rows, "secs": secs, "peak_mb": peak_mb}))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--files", type=int, nargs="+", default=[5000, 10000, 20000])
+    ap.add_argument("--run-rows", type=int, default=20_000)
+    ap.add_argument("--child", nargs=5, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        mode, root, demo, output, run_rows = args.child
+        child(mode, root, demo, output, int(run_rows))
+        return
+
+    print(f"{'files':>8}{'mode':>10}{'rows':>9}{'wall (s)':>10}{'peak RSS (MB)':>15}")
+    for n in args.files:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "players"
+            make_folder(root, n)
+            demo = Path(tmp) / "demo.csv"
+            pd.DataFrame(columns=DEMO_COLS).to_csv(demo, index=False)
+            for mode in ("memory", "stream"):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, str(root), str(demo),
+                     str(Path(tmp) / f"{mode}.csv"), str(args.run_rows)],
+                    capture_output=True, text=True, check=True,
+                )
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{n:>8}{mode:>10}{r['rows']:>9,}{r['secs']:>10.1f}{r['peak_mb']:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Benchmark suite: time and peak memory of every pipeline stage on synthetic panels, checked against a
+stored baseline.
+
+Stages (each in a fresh subprocess, so its peak RSS is its own, xgboost's native memory included):
+- merge     merge_folder on a synthetic archive folder (players x --merge-gws files)
+- features  feature_store.build_features (target + rolling form block) on the consolidated panel
+- train     XGBRegressor with model.py's params on every row before the second half of the last season
+- predict   the trained model on the second half of the last season
+- pick      squad_optimizer.pick_squad (15-man squad + XI + captain) on the last GW's predictions
+
+Runs are PLAYERSxSEASONS of synthetic.make_panel (38 GWs a season): 700x1 is about one real season,
+7000x1 / 70000x1 are 10x / 100x the player count and 700x10 / 700x100 10x / 100x the seasons.
+
+Every stage also returns a result (row count, checksum, RMSE, squad points) that must match the
+baseline, so a faster stage that computes something else fails too. Baselines are per machine:
+record one with --save-baseline before changing code, then rerun without it; the exit code is 1 on
+any regression (slower / more memory than the tolerances allow, or a different result). The stored
+benchmarks/baseline.json comes from a 1-CPU Linux box.
+Peak memory needs the resource module (Linux / macOS).
+
+Usage:
+  python benchmarks/bench_suite.py --save-baseline          # record benchmarks/baseline.json
+  python benchmarks/bench_suite.py                          # compare against it
+  python benchmarks/bench_suite.py --runs 70000x1 700x100 --stages features train
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from synthetic import make_folder, make_panel  # noqa: E402
+
+STAGES = ["merge", "features", "train", "predict", "pick"]
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def _peak_mb():
+    # Linux: VmHWM, since ru_maxrss keeps the parent's high-water mark across fork + exec
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB on Linux
+
+
+def _checksum(df: pd.DataFrame) -> float:
+    return float(np.nansum(df.select_dtypes("number").to_numpy(dtype=np.float64)))
+
+
+#----------
+#stages: run in a child process, inputs from / outputs to the work dir
+def child(stage: str, work: str, trees: int) -> dict:
+    import xgboost as xgb
+
+    from feature_store import build_features
+    from matrix_cache import feature_matrix
+    from merge_fpl_gw_to_panel import merge_folder
+    from model_evaluation import PARAMS
+    from panel_store import read_panel, write_panel
+    from squad_optimizer import pick_squad
+
+    work = Path(work)
+    inputs = {}
+    if stage == "features":
+        inputs["panel"] = read_panel(str(work / "store"), "all_panels")
+    elif stage in ("train", "predict", "pick"):
+        split = json.loads((work / "split.json").read_text())
+        if stage == "pick":
+            inputs["pool"] = pd.read_parquet(work / "pool.parquet")
+        else:
+            df = read_panel(str(work / "store"), "all_panels_engineered")
+            X, y, meta, _ = feature_matrix(df)
+            key = meta["season"].to_numpy(dtype=np.int64) * 100 + meta["gw"].to_numpy(dtype=np.int64)
+            inputs.update(X=X, y=y, meta=meta, key=key, split=split["key"])
+    peak_inputs = _peak_mb()
+
+    t0 = time.perf_counter()
+    if stage == "merge":
+        panel = merge_folder(str(work / "folder"))
+        seconds = time.perf_counter() - t0
+        result = {"rows": len(panel), "checksum": _checksum(panel)}
+    elif stage == "features":
+        df = build_features(inputs["panel"])
+        seconds = time.perf_counter() - t0
+        write_panel(df, str(work / "store"), "all_panels_engineered")
+        result = {"rows": len(df), "checksum": _checksum(df.drop(columns=["season", "gw", "element"]))}
+    elif stage == "train":
+        train = (inputs["key"] < inputs["split"]) & ~np.isnan(inputs["y"])
+        model = xgb.XGBRegressor(**{**PARAMS, "n_estimators": trees})
+        model.fit(inputs["X"][train], inputs["y"][train])
+        seconds = time.perf_counter() - t0
+        model.save_model(work / "model.ubj")
+        result = {"rows": int(train.sum()), "trees": model.get_booster().num_boosted_rounds()}
+    elif stage == "predict":
+        model = xgb.XGBRegressor()
+        model.load_model(work / "model.ubj")
+        rows = inputs["key"] >= inputs["split"]
+        t0 = time.perf_counter()
+        pred = model.predict(inputs["X"][rows])
+        seconds = time.perf_counter() - t0
+        y = inputs["y"][rows]
+        ok = ~np.isnan(y)
+        # the last GW's rows are the pick stage's pool
+        meta = inputs["meta"][rows].assign(predicted_points_next=pred).drop(columns=["_no_target"])
+        last = meta[inputs["key"][rows] == inputs["key"].max()]
+        last.to_parquet(work / "pool.parquet")
+        result = {"rows": int(rows.sum()), "rmse": float(np.sqrt(np.mean((pred[ok] - y[ok]) ** 2)))}
+    else:
+        pool = inputs["pool"]
+        pool = pool[pool["price_now"].notna() & (pool["price_now"] > 0)]
+        selection = pick_squad(pool)
+        seconds = time.perf_counter() - t0
+        result = {"squad": len(selection.squad), "points": round(selection.points, 6), "cost": round(selection.cost, 1)}
+    peak = _peak_mb()
+    return {"seconds": seconds, "peak_mb": peak,
+            "stage_mb": None if peak is None else max(peak - peak_inputs, 0.0), "result": result}
+
+
+def prepare(work: Path, players: int, seasons: int, merge_gws: int, seed: int) -> None:
+    """Synthetic inputs for one run: the consolidated panel in a store, the merge folder, the split."""
+    from panel_store import write_panel
+
+    panel = make_panel(players, seasons, seed=seed)
+    # as feature_engineering.py does: one element id per name across the seasons
+    panel["element"] = pd.factorize(panel["full_name"].astype(str))[0] + 1
+    write_panel(panel, str(work / "store"), "all_panels")
+    make_folder(work / "folder", players * merge_gws, n_gws=merge_gws, seed=seed)
+    last = int(panel["season"].max())
+    (work / "split.json").write_text(json.dumps({"key": last * 100 + int(panel["gw"].max()) // 2 + 1}))
+
+
+def run_stage(stage: str, work: Path, trees: int) -> dict:
+    out = subprocess.run([sys.executable, __file__, "--child", stage, str(work), str(trees)],
+                         capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"stage {stage} failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _same_result(a: dict, b: dict, rel: float) -> bool:
+    if a.keys() != b.keys():
+        return False
+    for k in a:
+        if isinstance(a[k], (int, float)) and isinstance(b[k], (int, float)):
+            if abs(a[k] - b[k]) > rel * max(abs(a[k]), abs(b[k]), 1.0):
+                return False
+        elif a[k] != b[k]:
+            return False
+    return True
+
+
+def compare(run: str, stage: str, now: dict, base: dict, args) -> list:
+    """Regressions of one stage vs its baseline, as messages (empty: fine)."""
+    fails = []
+    slower = now["seconds"] - base["seconds"]
+    if slower > args.time_tolerance * base["seconds"] and slower > args.min_seconds:
+        fails.append(f"{now['seconds']:.2f}s vs {base['seconds']:.2f}s (+{slower / base['seconds']:.0%})")
+    if now["peak_mb"] is not None and base.get("peak_mb") is not None \
+            and now["peak_mb"] > base["peak_mb"] * (1 + args.memory_tolerance):
+        fails.append(f"peak {now['peak_mb']:.0f} MB vs {base['peak_mb']:.0f} MB")
+    if not _same_result(now["result"], base["result"], args.result_tolerance):
+        fails.append(f"result {now['result']} vs {base['result']}")
+    return fails
+
+
+def machine() -> dict:
+    import xgboost as xgb
+    return {"platform": platform.platform(), "cpus": os.cpu_count(), "python": platform.python_version(),
+            "pandas": pd.__version__, "xgboost": xgb.__version__}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", nargs="+", default=["700x1", "7000x1", "700x10"], help="PLAYERSxSEASONS")
+    ap.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    ap.add_argument("--trees", type=int, default=500, help="n_estimators for the train stage (model.py: 500)")
+    ap.add_argument("--merge-gws", type=int, default=1, help="Files per player in the merge folder")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=1, help="Runs per stage; the fastest counts (use 3 on noisy machines)")
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--save-baseline", action="store_true", help="Record these runs as the baseline")
+    ap.add_argument("--time-tolerance", type=float, default=0.25, help="Allowed slowdown (fraction)")
+    ap.add_argument("--min-seconds", type=float, default=0.05, help="Ignore slowdowns smaller than this")
+    ap.add_argument("--memory-tolerance", type=float, default=0.15, help="Allowed peak RSS growth (fraction)")
+    ap.add_argument("--result-tolerance", type=float, default=1e-6, help="Relative tolerance on stage results")
+    ap.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child[0], args.child[1], int(args.child[2]))))
+        return
+
+    baseline = {"machine": machine(), "runs": {}}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        if not args.save_baseline and baseline["machine"] != machine():
+            print(f"[WARN] baseline recorded on {baseline['machine']}; timings may not be comparable here")
+
+    stages = [s for s in STAGES if s in args.stages]
+    needs = {"features": ["features"], "train": ["features", "train"], "predict": ["features", "train", "predict"],
+             "pick": ["features", "train", "predict", "pick"], "merge": ["merge"]}
+    todo = [s for s in STAGES if any(s in needs[x] for x in stages)]  # upstream stages produce the inputs
+
+    failures = []
+    print(f"{'run':>10}{'stage':>10}{'time (s)':>10}{'base (s)':>10}{'peak MB':>9}{'stage MB':>10}  result")
+    for run in args.runs:
+        players, seasons = (int(v) for v in run.lower().split("x"))
+        key = f"{players}x{seasons},trees={args.trees},merge_gws={args.merge_gws},seed={args.seed}"
+        with tempfile.TemporaryDirectory(prefix="fpl_bench_") as tmp:
+            t0 = time.perf_counter()
+            prepare(Path(tmp), players, seasons, args.merge_gws, args.seed)
+            print(f"[INFO] {run}: synthetic inputs in {time.perf_counter() - t0:.1f}s")
+            for stage in todo:
+                if stage not in stages:
+                    run_stage(stage, Path(tmp), args.trees)  # only for its outputs
+                    continue
+                now = min((run_stage(stage, Path(tmp), args.trees) for _ in range(max(args.repeat, 1))),
+                          key=lambda r: r["seconds"])
+                base = baseline["runs"].get(key, {}).get(stage)
+                peak = "" if now["peak_mb"] is None else f"{now['peak_mb']:.0f}"
+                stage_mb = "" if now["stage_mb"] is None else f"{now['stage_mb']:.0f}"
+                base_s = "" if base is None else f"{base['seconds']:.2f}"
+                print(f"{run:>10}{stage:>10}{now['seconds']:>10.2f}{base_s:>10}{peak:>9}{stage_mb:>10}  {now['result']}")
+                if args.save_baseline:
+                    baseline["runs"].setdefault(key, {})[stage] = now
+                elif base is not None:
+                    failures += [f"{run} {stage}: {msg}" for msg in compare(run, stage, now, base, args)]
+
+    if args.save_baseline:
+        baseline["machine"] = machine()
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(baseline, fh, indent=1)
+        print(f"[Saved] Baseline -> {args.baseline}")
+        return
+    for msg in failures:
+        print(f"[FAIL] {msg}")
+    if failures:
+        sys.exit(1)
+    print("[OK] no regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Team strength tables (team_strength.py): build time, incremental update, and the join onto the panel.
+
+- build: every season's tables from the raw panels (what a first run / --rebuild does)
+- update: nothing changed / one season's panel rewritten (a new gameweek)
+- join: add_team_features on the engineered panel, vs a per-row dict lookup of the same values
+  (and checks both give the same columns)
+
+Works on a copy of --store, so the store itself is not touched.
+
+Usage:
+  python benchmarks/bench_team_strength.py --store /path/to/store
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from panel_store import RAW, STORE_DIR, list_seasons, read_panel, write_panel  # noqa: E402
+from team_strength import TeamStrength, add_team_features  # noqa: E402
+
+
+def per_row(df: pd.DataFrame, strength: pd.DataFrame, team_fixtures: pd.DataFrame) -> pd.DataFrame:
+    """The same join one row at a time (dict lookups)."""
+    pairs = team_fixtures.groupby(["season", "fixture"])["team"].sum().to_dict()
+    cols = [c for c in strength.columns if c not in ("season", "team", "gw")]
+    table = {(int(r.season), int(r.team), int(r.gw)): r for r in strength.itertuples(index=False)}
+    out = {c: [] for c in cols}
+    for season, fixture, opp, gw in zip(df["season"], df["fixture"], df["opponent_team"], df["gw"]):
+        pair = pairs.get((int(season), int(fixture)))
+        row = table.get((int(season), int(pair - opp), int(gw))) if pair is not None else None
+        for c in cols:
+            out[c].append(np.nan if row is None else getattr(row, c))
+    return pd.DataFrame(out, index=df.index).astype("float32")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--store", default=STORE_DIR)
+    ap.add_argument("--dataset", default="all_panels_engineered")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = str(Path(tmp) / "store")
+        shutil.copytree(args.store, store)
+        ts = TeamStrength(store)
+
+        t0 = time.perf_counter()
+        strength, team_fixtures, rebuilt = ts.update(rebuild=True)
+        print(f"build ({len(rebuilt)} seasons, {len(strength)} rows): {time.perf_counter() - t0:.3f}s")
+        t0 = time.perf_counter()
+        _, _, rebuilt = ts.update()
+        print(f"update, nothing changed (rebuilt {rebuilt}): {time.perf_counter() - t0:.3f}s")
+        last = list_seasons(store, RAW)[-1]
+        write_panel(read_panel(store, RAW, seasons=[last]).iloc[:-1], store, RAW)  # the season's panel changed
+        t0 = time.perf_counter()
+        strength, team_fixtures, rebuilt = ts.update()
+        print(f"update, {last} changed (rebuilt {rebuilt}): {time.perf_counter() - t0:.3f}s")
+
+        df = read_panel(store, args.dataset)
+        t0 = time.perf_counter()
+        joined = add_team_features(df.copy(), strength, team_fixtures)
+        t_join = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        slow = per_row(df, strength, team_fixtures)
+        t_slow = time.perf_counter() - t0
+        pd.testing.assert_frame_equal(joined[slow.columns], slow)
+        print(f"join {len(df):,} rows: indexed {t_join:.3f}s | per row {t_slow:.3f}s ({t_slow / t_join:.0f}x), "
+              f"identical")
+
+
+if __name__ == "__main__":
+    main()
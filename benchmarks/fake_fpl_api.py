@@ -0,0 +1,230 @@
+"""
+Local stand-in for the FPL API, for benchmarks and offline runs of data_loader.py.
+
+Serves synthetic data on the endpoints data_loader.py uses:
+  /api/bootstrap-static/
+  /api/fixtures/
+  /api/element-summary/{id}/
+  /api/event/{gw}/live/
+
+Every element-summary response is delayed by `latency` seconds to mimic the real round trip, and
+`fail_rate` of them answer 503 so the retry path gets exercised. Responses carry an ETag and honour
+If-None-Match with 304, and `advance()` plays the next gameweek.
+
+Usage:
+  python benchmarks/fake_fpl_api.py --port 8000 --players 700 --latency 0.08
+  python data_loader.py --api http://127.0.0.1:8000/api --output /tmp/players2526_panel.csv
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+N_TEAMS = 20
+POSITIONS = [(1, "Goalkeeper", "Goalkeepers"), (2, "Defender", "Defenders"),
+             (3, "Midfielder", "Midfielders"), (4, "Forward", "Forwards")]
+
+
+def _fixtures(n_gws: int, seed: int) -> list:
+    rng = random.Random(seed)
+    fixtures = []
+    fid = 1
+    for gw in range(1, n_gws + 1):
+        teams = list(range(1, N_TEAMS + 1))
+        rng.shuffle(teams)
+        for h, a in zip(teams[0::2], teams[1::2]):
+            fixtures.append({"id": fid, "event": gw, "team_h": h, "team_a": a,
+                             "team_h_score": rng.randint(0, 4), "team_a_score": rng.randint(0, 3),
+                             "finished": True})
+            fid += 1
+    return fixtures
+
+
+def _history(pid: int, team: int, fixtures: list, n_gws: int, seed: int) -> list:
+    rng = random.Random(seed * 100003 + pid)
+    hist = []
+    for fx in fixtures:
+        if fx["event"] > n_gws or team not in (fx["team_h"], fx["team_a"]):
+            continue
+        was_home = fx["team_h"] == team
+        minutes = rng.choice([0, 0, 12, 45, 63, 90, 90, 90])
+        xg, xa = round(rng.random() * 0.6, 2), round(rng.random() * 0.4, 2)
+        hist.append({
+            "element": pid, "fixture": fx["id"], "round": fx["event"], "was_home": was_home,
+            "opponent_team": fx["team_a"] if was_home else fx["team_h"],
+            "team_h_score": fx["team_h_score"], "team_a_score": fx["team_a_score"],
+            "minutes": minutes, "starts": int(minutes >= 60),
+            "total_points": rng.randint(0, 12) if minutes else 0,
+            "goals_scored": rng.choice([0, 0, 0, 1]), "assists": rng.choice([0, 0, 0, 1]),
+            "clean_sheets": rng.choice([0, 1]), "goals_conceded": rng.randint(0, 3),
+            "penalties_missed": 0, "yellow_cards": rng.choice([0, 0, 0, 1]), "red_cards": 0,
+            "saves": 0, "bonus": rng.choice([0, 0, 1, 2, 3]), "bps": rng.randint(0, 40),
+            "influence": f"{rng.random() * 50:.1f}", "creativity": f"{rng.random() * 40:.1f}",
+            "threat": f"{rng.random() * 60:.1f}", "ict_index": f"{rng.random() * 12:.1f}",
+            "expected_goals": f"{xg:.2f}", "expected_assists": f"{xa:.2f}",
+            "expected_goal_involvements": f"{xg + xa:.2f}",
+            "expected_goals_conceded": f"{rng.random() * 2:.2f}",
+        })
+    return hist
+
+
+class FakeFPLServer:
+    """Threaded HTTP server; use as a context manager or call start()/stop(). `api` is the base URL."""
+
+    def __init__(self, n_players: int = 700, n_gws: int = 8, latency: float = 0.05, fail_rate: float = 0.0,
+                 port: int = 0, seed: int = 0):
+        self.n_players = n_players
+        self.n_gws = n_gws
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.seed = seed
+        self.requests = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self.fixtures = _fixtures(38, seed)
+        self.players = [
+            {"id": pid, "first_name": f"Player{pid}", "second_name": f"Surname{pid}",
+             "points_per_game": f"{self._rng.random() * 6:.1f}", "team": (pid - 1) % N_TEAMS + 1,
+             "element_type": self._rng.choice([1, 2, 2, 3, 3, 3, 4]), "now_cost": self._rng.randint(40, 130)}
+            for pid in range(1, n_players + 1)
+        ]
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def api(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def bootstrap(self) -> dict:
+        return {
+            "elements": self.players,
+            "teams": [{"id": t, "name": f"Team {t}", "short_name": f"T{t:02d}"} for t in range(1, N_TEAMS + 1)],
+            "element_types": [{"id": i, "singular_name": s, "plural_name": p} for i, s, p in POSITIONS],
+            "events": [{"id": gw, "finished": gw <= self.n_gws, "is_current": gw == self.n_gws}
+                       for gw in range(1, 39)],
+        }
+
+    def advance(self, gws: int = 1) -> None:
+        """Finish the next `gws` gameweeks."""
+        with self._lock:
+            self.n_gws = min(38, self.n_gws + gws)
+
+    def element_summary(self, pid: int) -> Optional[dict]:
+        if not 1 <= pid <= self.n_players:
+            return None
+        team = self.players[pid - 1]["team"]
+        return {"history": _history(pid, team, self.fixtures, self.n_gws, self.seed)}
+
+    def event_live(self, gw: int) -> Optional[dict]:
+        if not 1 <= gw <= self.n_gws:
+            return None
+        elements = []
+        for p in self.players:
+            rows = [h for h in _history(p["id"], p["team"], self.fixtures, gw, self.seed) if h["round"] == gw]
+            # one fixture per team and gameweek here, so per-GW stats are that fixture's stats
+            stats = {k: v for k, v in rows[0].items()
+                     if k not in ("element", "fixture", "round", "was_home", "opponent_team",
+                                  "team_h_score", "team_a_score")} if rows else {}
+            elements.append({"id": p["id"], "stats": stats,
+                             "explain": [{"fixture": h["fixture"], "stats": []} for h in rows]})
+        return {"elements": elements}
+
+    def _route(self, path: str):
+        """-> (status, payload)"""
+        if path.rstrip("/").endswith("/bootstrap-static"):
+            return 200, self.bootstrap()
+        if path.rstrip("/").endswith("/fixtures"):
+            # like the real endpoint: the whole season, unplayed fixtures without a score
+            return 200, [f if f["event"] <= self.n_gws else {**f, "team_h_score": None, "team_a_score": None,
+                                                              "finished": False} for f in self.fixtures]
+        m = re.search(r"/event/(\d+)/live/?$", path)
+        if m:
+            body = self.event_live(int(m.group(1)))
+            return (200, body) if body is not None else (404, {"detail": "Not found."})
+        m = re.search(r"/element-summary/(\d+)/?$", path)
+        if m:
+            if self.latency:
+                time.sleep(self.latency)
+            with self._lock:
+                fail = self._rng.random() < self.fail_rate
+            if fail:
+                return 503, {"detail": "Service unavailable"}
+            body = self.element_summary(int(m.group(1)))
+            return (200, body) if body is not None else (404, {"detail": "Not found."})
+        return 404, {"detail": "Not found."}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                status, payload = server._route(self.path)
+                body = json.dumps(payload).encode()
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    with server._lock:
+                        server.not_modified += 1
+                    status, body = 304, b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status in (200, 304):
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeFPLServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run a local stand-in FPL API.")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--players", type=int, default=700)
+    ap.add_argument("--gws", type=int, default=8, help="Gameweeks played so far")
+    ap.add_argument("--latency", type=float, default=0.05, help="Delay per element-summary response (seconds)")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of element-summary calls answering 503")
+    args = ap.parse_args()
+
+    server = FakeFPLServer(args.players, args.gws, args.latency, args.fail_rate, port=args.port)
+    print(f"[OK] Fake FPL API on {server.api}  (Ctrl+C to stop)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Synthetic FPL panels for the benchmarks: any number of players, seasons and gameweeks, same columns
+as players_2425_panel.csv (plus the team / position / price columns the 25/26 panel has).
+
+Each season is a double round robin between 20 clubs with per-club attack / defence strengths; match
+scores are Poisson. Players belong to a club and position and have a quality and a chance of playing /
+starting; their xG / xA follow position, quality, minutes and the club's attack, goals / assists are
+Poisson on those, and total_points, bonus (top 3 bps per fixture), bps and ICT follow FPL's rules
+closely enough for the feature / model / picking code to see realistic distributions. Names carry
+over between seasons (about 10% of the players are replaced each season); element ids do not, as in
+the real data.
+
+make_folder() writes the per-player / per-GW CSV archive layout merge_folder reads.
+
+Usage:
+  python benchmarks/synthetic.py --players 7000 --seasons 3 --out synthetic_panel.csv
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from panel_store import apply_schema  # noqa: E402
+
+# players_2425_panel.csv, in its column order
+PANEL_2425_COLS = ["element", "gw", "minutes", "expected_goal_involvements", "ict_index", "expected_goals",
+                   "expected_assists", "bps", "fixture", "starts", "clean_sheets", "assists", "transfers_in",
+                   "creativity", "total_points", "bonus", "penalties_missed", "opponent_team", "influence", "saves",
+                   "expected_goals_conceded", "red_cards", "team_a_score", "threat", "yellow_cards",
+                   "goals_conceded", "goals_scored", "full_name", "season"]
+# what the 25/26 panel (data_loader.OUT_COLS) has on top
+EXTRA_COLS = ["team_h_score", "points_per_game", "team_id_current", "team_name_current", "team_id_gw",
+              "team_name_gw", "opponent_team_name", "was_home", "price_now", "position"]
+
+N_TEAMS = 20
+POSITIONS = np.array(["Goalkeeper", "Defender", "Midfielder", "Forward"])
+POSITION_SHARE = [0.11, 0.33, 0.40, 0.16]
+XG90 = np.array([0.0, 0.03, 0.09, 0.22])     # per 90 for an average player, by position
+XA90 = np.array([0.005, 0.04, 0.08, 0.06])
+GOAL_POINTS = np.array([10, 6, 5, 4])
+CS_POINTS = np.array([4, 4, 1, 0])
+GOAL_BPS = np.array([12, 12, 18, 24])
+BASE_PRICE = np.array([4.0, 4.0, 4.5, 4.5])
+FIRST = ["Alex", "Ben", "Callum", "Dan", "Eddie", "Fabio", "Gabriel", "Harvey", "Ivan", "Jack", "Kai", "Luis",
+         "Mo", "Nico", "Oli", "Pedro", "Quinn", "Rico", "Sam", "Tom", "Umar", "Victor", "Will", "Xavi", "Yves", "Zak"]
+LAST = ["Adams", "Barnes", "Costa", "Diaz", "Evans", "Fernandes", "Gomes", "Hughes", "Iwobi", "James", "King",
+        "Lopez", "Martins", "Nunes", "Owen", "Pereira", "Quansah", "Reed", "Silva", "Turner", "Udoh", "Vieira",
+        "Walker", "Xhaka", "Young", "Zouma"]
+
+
+def season_codes(n: int) -> list:
+    """n consecutive season codes (2324 style) ending at 2425; 0001 ... 9900 for longer histories."""
+    if not 1 <= n <= 100:
+        raise ValueError("seasons must be 1..100")
+    first = 2025 - n if n <= 25 else 2000
+    return [(y % 100) * 100 + (y + 1) % 100 for y in range(first, first + n)]
+
+
+def _fixtures(rng: np.random.Generator, gws: int):
+    """Per GW: opponent, home flag and fixture id for every club (double round robin, circle method)."""
+    teams = list(range(N_TEAMS))
+    rounds = []
+    for _ in range(N_TEAMS - 1):
+        rounds.append([(teams[i], teams[N_TEAMS - 1 - i]) for i in range(N_TEAMS // 2)])
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    rounds += [[(a, h) for h, a in r] for r in rounds]
+    order = rng.permutation(len(rounds))
+    opp = np.zeros((gws, N_TEAMS), dtype=np.int64)
+    home = np.zeros((gws, N_TEAMS), dtype=bool)
+    fixture = np.zeros((gws, N_TEAMS), dtype=np.int64)
+    for g in range(gws):
+        for k, (h, a) in enumerate(rounds[order[g % len(rounds)]]):
+            opp[g, h], opp[g, a] = a, h
+            home[g, h] = True
+            fixture[g, h] = fixture[g, a] = g * (N_TEAMS // 2) + k + 1
+    return opp, home, fixture
+
+
+def _names(rng: np.random.Generator, n: int, seen: dict) -> list:
+    """n new names; repeats of a first + last combination get a number ("Sam Reed 2"), so all are unique."""
+    out = []
+    for name in (f"{f} {l}" for f, l in zip(rng.choice(FIRST, n), rng.choice(LAST, n))):
+        seen[name] = seen.get(name, 0) + 1
+        out.append(name if seen[name] == 1 else f"{name} {seen[name]}")
+    return out
+
+
+def make_panel(players: int = 700, seasons: int = 1, gws: int = 38, seed: int = 0,
+               extended: bool = True) -> pd.DataFrame:
+    """
+    A synthetic panel with `players` players per season over `seasons` seasons of `gws` gameweeks,
+    typed with panel_store's schema. extended=False keeps only the players_2425_panel.csv columns.
+    """
+    rng = np.random.default_rng(seed)
+    team_names = np.array([f"{c} FC" for c in ["Ashford", "Bramley", "Carlton", "Dunmore", "Elmstead", "Fairfield",
+                                               "Glenwood", "Hartley", "Ironbridge", "Kingsbury", "Langford",
+                                               "Milbrook", "Northam", "Oakridge", "Penrith", "Queensway",
+                                               "Redhill", "Stanton", "Thornbury", "Westfield"]])
+    # the player pool: names, position, quality persist across seasons
+    seen = {}
+    names = _names(rng, players, seen)
+    pos = rng.choice(4, players, p=POSITION_SHARE)
+    quality = rng.lognormal(0.0, 0.5, players)
+    appear = rng.beta(1.2, 1.5, players)
+
+    frames = []
+    for season in season_codes(seasons):
+        if frames:  # churn: ~10% leave, as many arrive
+            out = rng.random(players) < 0.1
+            n_new = int(out.sum())
+            new_names = _names(rng, n_new, seen)
+            names = [n if not o else new_names.pop() for n, o in zip(names, out)]
+            pos[out] = rng.choice(4, n_new, p=POSITION_SHARE)
+            quality[out] = rng.lognormal(0.0, 0.5, n_new)
+            appear[out] = rng.beta(1.2, 1.5, n_new)
+            quality *= rng.lognormal(0.0, 0.1, players)  # form changes between seasons
+        team = rng.integers(0, N_TEAMS, players)
+        attack = rng.normal(0.0, 0.25, N_TEAMS)
+        defence = rng.normal(0.0, 0.25, N_TEAMS)
+        opp, home, fixture = _fixtures(rng, gws)
+
+        # club-level match results, (gws, teams)
+        exp_for = np.exp(0.25 + attack[None, :] - defence[opp] + 0.15 * home)
+        goals_for = rng.poisson(exp_for)
+        goals_against = np.take_along_axis(goals_for, opp, axis=1)
+        exp_against = np.take_along_axis(exp_for, opp, axis=1)
+
+        # player-level, (players, gws)
+        t = team[:, None]
+        g_idx = np.arange(gws)[None, :]
+        plays = rng.random((players, gws)) < appear[:, None]
+        starts = plays & (rng.random((players, gws)) < np.clip(appear[:, None] * 1.1, 0, 1))
+        minutes = np.where(starts, np.where(rng.random((players, gws)) < 0.75, 90, rng.integers(55, 90, (players, gws))),
+                           np.where(plays, rng.integers(1, 35, (players, gws)), 0))
+        share = minutes / 90.0
+        club_att = np.exp(attack)[t]
+        xg = XG90[pos][:, None] * quality[:, None] * club_att * share * rng.lognormal(0, 0.6, (players, gws))
+        xa = XA90[pos][:, None] * quality[:, None] * club_att * share * rng.lognormal(0, 0.6, (players, gws))
+        goals = rng.poisson(xg)
+        assists = rng.poisson(xa)
+        conceded_club = goals_against[g_idx, t]
+        conceded = np.where(plays, rng.binomial(conceded_club, np.clip(share, 0, 1)), 0)
+        clean = (minutes >= 60) & (conceded_club == 0)
+        is_gk = (pos == 0)[:, None]
+        saves = np.where(is_gk & plays, rng.poisson(2.5 * share), 0)
+        yellow = (plays & (rng.random((players, gws)) < 0.06)).astype(int)
+        red = (plays & (rng.random((players, gws)) < 0.002)).astype(int)
+        pen_missed = (plays & (rng.random((players, gws)) < 0.0005)).astype(int)
+        xgc = np.where(plays, exp_against[g_idx, t] * share, 0.0)
+
+        bps = (plays * 3 + (minutes >= 60) * 3 + goals * GOAL_BPS[pos][:, None] + assists * 9
+               + clean * np.where(pos <= 1, 12, 0)[:, None] + saves // 3 * 2 - yellow * 3 - red * 9
+               - conceded * np.where(pos <= 1, 2, 0)[:, None]
+               + np.where(plays, rng.normal(0, 4, (players, gws)), 0).round()).astype(int)
+        points = (np.where(minutes >= 60, 2, np.where(plays, 1, 0)) + goals * GOAL_POINTS[pos][:, None]
+                  + assists * 3 + clean * CS_POINTS[pos][:, None] + saves // 3
+                  - np.where((pos <= 1)[:, None], conceded // 2, 0)
+                  - yellow - red * 3 - pen_missed * 2)
+        influence = np.where(plays, np.maximum(bps * 1.2 + rng.normal(0, 2, (players, gws)), 0), 0).round(1)
+        creativity = np.where(plays, np.maximum(xa * 90 + rng.gamma(0.8, 3.0, (players, gws)), 0), 0).round(1)
+        threat = np.where(plays, np.maximum(xg * 60 + rng.gamma(0.6, 2.5, (players, gws)), 0), 0).round(1)
+
+        element = rng.permutation(players) + 1  # ids are reassigned every season
+        df = pd.DataFrame({
+            "element": np.repeat(element, gws),
+            "gw": np.tile(np.arange(1, gws + 1), players),
+            "minutes": minutes.ravel(),
+            "expected_goal_involvements": (xg + xa).round(2).ravel(),
+            "ict_index": ((influence + creativity + threat) / 10).round(1).ravel(),
+            "expected_goals": xg.round(2).ravel(),
+            "expected_assists": xa.round(2).ravel(),
+            "bps": bps.ravel(),
+            "fixture": fixture[g_idx, t].ravel(),
+            "starts": starts.astype(int).ravel(),
+            "clean_sheets": clean.astype(int).ravel(),
+            "assists": assists.ravel(),
+            "transfers_in": (rng.lognormal(7.0, 2.2, (players, gws)) * quality[:, None]
+                             * (rng.random((players, gws)) < 0.8)).astype(int).ravel(),
+            "creativity": creativity.ravel(),
+            "total_points": points.ravel(),
+            "penalties_missed": pen_missed.ravel(),
+            "opponent_team": (opp[g_idx, t] + 1).ravel(),
+            "influence": influence.ravel(),
+            "saves": saves.ravel(),
+            "expected_goals_conceded": xgc.round(2).ravel(),
+            "red_cards": red.ravel(),
+            "team_a_score": np.where(home[g_idx, t], conceded_club, goals_for[g_idx, t]).ravel(),
+            "threat": threat.ravel(),
+            "yellow_cards": yellow.ravel(),
+            "goals_conceded": conceded.ravel(),
+            "goals_scored": goals.ravel(),
+            "full_name": np.repeat(np.asarray(names, dtype=object), gws),
+            "season": season,
+            "team_h_score": np.where(home[g_idx, t], goals_for[g_idx, t], conceded_club).ravel(),
+            "team_id_current": np.repeat(team + 1, gws),
+            "team_name_current": np.repeat(team_names[team], gws),
+            "team_id_gw": np.repeat(team + 1, gws),
+            "team_name_gw": np.repeat(team_names[team], gws),
+            "opponent_team_name": team_names[opp[g_idx, t]].ravel(),
+            "was_home": home[g_idx, t].ravel(),
+            "price_now": np.repeat(np.clip(np.round(BASE_PRICE[pos] + 2.5 * (quality - 0.6), 1), 3.8, 15.0), gws),
+            "position": np.repeat(POSITIONS[pos], gws),
+        })
+        # bonus: 3 / 2 / 1 for the top bps of each fixture among the players who played
+        rank = df["bps"].where(df["minutes"] > 0).groupby([df["gw"], df["fixture"]]).rank(method="first",
+                                                                                           ascending=False)
+        df["bonus"] = (4 - rank).clip(lower=0).fillna(0).astype(int)
+        df["total_points"] += df["bonus"]
+        played = df["minutes"] > 0
+        df["points_per_game"] = (df["total_points"].where(played).groupby(df["element"]).transform("mean")
+                                 .fillna(0).round(1))
+        frames.append(df)
+
+    panel = pd.concat(frames, ignore_index=True)
+    cols = PANEL_2425_COLS + (EXTRA_COLS if extended else [])
+    return apply_schema(panel[cols].copy())
+
+
+STATS = ["minutes", "expected_goal_involvements", "ict_index", "expected_goals", "expected_assists", "bps",
+         "fixture", "starts", "clean_sheets", "assists", "creativity", "team_h_score", "total_points", "bonus",
+         "penalties_missed", "opponent_team", "influence", "saves", "expected_goals_conceded", "red_cards",
+         "team_a_score", "threat", "yellow_cards", "goals_conceded", "goals_scored", "transfers_in"]
+
+
+def make_folder(root: Path, n_files: int, n_gws: int = 38, seed: int = 0) -> None:
+    """
+    Archive layout for merge_folder (ROOT/123_First_Last/gw5.csv, one row per file), mixing the header
+    variants it has to cope with: 'round' instead of 'gw', no element column (id comes from the folder
+    name), no gw column (taken from the file name), first/second name instead of full_name.
+    """
+    rng = random.Random(seed)
+    n_players = max(1, n_files // n_gws)
+    written = 0
+    for pid in range(1, n_players + 1):
+        first, last = f"Name{pid}", f"Surname{pid}"
+        folder = root / f"{pid}_{first}_{last}"
+        folder.mkdir(parents=True, exist_ok=True)
+        variant = pid % 4
+        for gw in range(1, n_gws + 1):
+            if written >= n_files:
+                return
+            row = {"minutes": rng.choice([0, 45, 90]), "expected_goals": f"{rng.random():.2f}",
+                   **{c: rng.randint(0, 30) for c in STATS if c not in ("minutes", "expected_goals")}}
+            if variant == 0:      # archive export: element + round + name
+                row = {"name": f"{first} {last}", "element": pid, "round": gw, **row}
+            elif variant == 1:    # id only in the folder name
+                row = {"name": f"{first} {last}", "GW": gw, **row}
+            elif variant == 2:    # gw only in the file name
+                row = {"Player ID": pid, "first_name": first, "second_name": last, **row}
+            else:                 # nothing but stats; everything from the path
+                row = {"round": gw, "kickoff_time": f"2024-08-{gw % 28 + 1:02d}T14:00:00Z", **row}
+            with open(folder / f"gw{gw}.csv", "w", encoding="utf-8") as fh:
+                fh.write(",".join(row) + "\n" + ",".join(str(v) for v in row.values()) + "\n")
+            written += 1
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--players", type=int, default=700)
+    ap.add_argument("--seasons", type=int, default=1)
+    ap.add_argument("--gws", type=int, default=38)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--schema", default="2526", choices=["2425", "2526"],
+                    help="2425: only the players_2425_panel.csv columns")
+    ap.add_argument("--out", required=True)
+    args = ap.parse_args()
+    panel = make_panel(args.players, args.seasons, args.gws, args.seed, extended=args.schema == "2526")
+    panel.to_csv(args.out, index=False)
+    print(f"[OK] {len(panel):,} rows x {panel.shape[1]} cols -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,32 @@
 """
 Used for processing data currently from the official FPL API (25/26 season)
+
+Usage (examples):
+  python data_loader.py
+  python data_loader.py --workers 16 --rate 30 --output "C:/path/to/players2526_panel.csv"
+  python data_loader.py --workers 1      # old behaviour: one player at a time
+  python data_loader.py --incremental    # after a gameweek: fetch only what changed, append new rows
 """
 
-import requests
+import argparse
+import io
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
 import pandas as pd
 import unicodedata as ud
 
-SESSION = requests.Session()
+from api_cache import CACHE_DIR, DEFAULT_TTLS, ResponseCache
+from panel_store import FIXTURES, RAW, STORE_DIR, write_panel
+from fpl_fetch import FetchConfig, FetchError, fetch_element_summaries, fetch_json, make_session
+from instrument import PROFILERS, Run
+
 API = "https://fantasy.premierleague.com/api"
+OUT_PATH = r"C:\Users\Asus\Desktop\fpl_data\archive\panels\players2526_panel.csv"
+SEASON = "2526"
+STATE_FILE = "ingest_state.json"   # element -> last gw ingested, kept next to the response cache
+MAX_LIVE_GWS = 3                   # catch up through event/{gw}/live/ when at most this many GWs are missing
 
 OUT_COLS = [
     "element", "gw", "minutes", "expected_goal_involvements", "ict_index",
@@ -30,122 +49,362 @@ def strip_accents(s: str) -> str:
         return ""
     return ud.normalize("NFKD", s).encode("ASCII", "ignore").decode("ASCII")
 
+
 # --- bootstrap: players + teams + positions ---
-boot = SESSION.get(f"{API}/bootstrap-static/").json()
-elems = pd.json_normalize(boot["elements"])
-teams = pd.json_normalize(boot["teams"])[["id","name","short_name"]].rename(columns={"id":"team_id"})
-positions = pd.json_normalize(boot["element_types"])[["id","singular_name","plural_name"]].rename(columns={"id":"pos_id"})
+def load_players_meta(boot: dict) -> Tuple[pd.DataFrame, Dict[int, str]]:
+    """Player metadata (current team, position, price) and the team_id -> team name map."""
+    elems = pd.json_normalize(boot["elements"])
+    teams = pd.json_normalize(boot["teams"])[["id","name","short_name"]].rename(columns={"id":"team_id"})
+    positions = pd.json_normalize(boot["element_types"])[["id","singular_name","plural_name"]].rename(columns={"id":"pos_id"})
+
+    # Player metadata with CURRENT team + pos_id
+    players_meta = (
+        elems[["id", "first_name", "second_name", "points_per_game", "team", "element_type","now_cost"]]
+        .rename(columns={"id": "element", "team": "team_id_current", "element_type": "pos_id"})
+        .copy()
+    )
 
-# Player metadata with CURRENT team + pos_id
-players_meta = (
-    elems[["id", "first_name", "second_name", "points_per_game", "team", "element_type","now_cost"]]
-    .rename(columns={"id": "element", "team": "team_id_current", "element_type": "pos_id"})
-    .copy()
-)
+    # full_name
+    players_meta["full_name"] = (
+        players_meta["first_name"].astype(str).str.strip().fillna("") + " " +
+        players_meta["second_name"].astype(str).str.strip().fillna("")
+    ).str.replace(r"\s+", " ", regex=True).str.strip()
+    players_meta["full_name"] = players_meta["full_name"].map(strip_accents)
 
-# full_name
-players_meta["full_name"] = (
-    players_meta["first_name"].astype(str).str.strip().fillna("") + " " +
-    players_meta["second_name"].astype(str).str.strip().fillna("")
-).str.replace(r"\s+", " ", regex=True).str.strip()
-players_meta["full_name"] = players_meta["full_name"].map(strip_accents)
+    players_meta["price_now"] = (players_meta["now_cost"].astype("Int64") / 10).astype("Float64")
 
-players_meta["price_now"] = (players_meta["now_cost"].astype("Int64") / 10).astype("Float64")
+    players_meta = players_meta[["element", "points_per_game", "full_name", "team_id_current", "pos_id", "price_now"]]
 
-players_meta = players_meta[["element", "points_per_game", "full_name", "team_id_current", "pos_id", "price_now"]]
+    # Maps
+    team_name_map = dict(zip(teams["team_id"], teams["name"]))
+    pos_name_map = dict(zip(positions["pos_id"], positions["singular_name"]))
 
-# Maps
-team_name_map = dict(zip(teams["team_id"], teams["name"]))
-pos_name_map = dict(zip(positions["pos_id"], positions["singular_name"]))
+    players_meta["team_name_current"] = players_meta["team_id_current"].map(team_name_map)
+    players_meta["position"] = players_meta["pos_id"].map(pos_name_map)
+    return players_meta, team_name_map
 
-players_meta["team_name_current"] = players_meta["team_id_current"].map(team_name_map)
-players_meta["position"] = players_meta["pos_id"].map(pos_name_map)
 
 # --- fixtures (for per-GW team inference) ---
-# We’ll fetch all fixtures once; map fixture_id -> (team_h, team_a)
-fixtures = SESSION.get(f"{API}/fixtures/").json()
-fx_df = pd.json_normalize(fixtures)
-if not fx_df.empty:
-    fx_map = fx_df.set_index("id")[["team_h","team_a"]].to_dict(orient="index")
-else:
-    fx_map = {}
+def load_fixture_map(fixtures: list) -> Dict[int, dict]:
+    """We fetch all fixtures once; map fixture_id -> (team_h, team_a) (+ scores, used by the live path)"""
+    fx_df = pd.json_normalize(fixtures)
+    if not fx_df.empty:
+        cols = [c for c in ["team_h", "team_a", "team_h_score", "team_a_score"] if c in fx_df.columns]
+        return fx_df.set_index("id")[cols].to_dict(orient="index")
+    return {}
+
+
+def fixtures_frame(fixtures: list) -> pd.DataFrame:
+    """The whole fixture list (played and to come) for the store; team_strength.py reads the future fixtures from it"""
+    fx_df = pd.json_normalize(fixtures)
+    cols = ["id", "event", "team_h", "team_a", "team_h_score", "team_a_score", "finished"]
+    fx_df = fx_df.reindex(columns=cols).rename(columns={"id": "fixture", "event": "gw"})
+    # unscheduled fixtures have no event, unplayed ones no score
+    for col in ["gw", "team_h", "team_a", "team_h_score", "team_a_score"]:
+        fx_df[col] = pd.to_numeric(fx_df[col], errors="coerce")
+    fx_df["finished"] = fx_df["finished"].fillna(False).astype(bool)
+    return fx_df
+
 
 # --- per-player history ---
-rows = []
-for i, pid in enumerate(players_meta["element"].tolist(), 1):
+def history_rows(pid: int, hist: list, fx_map: Dict[int, dict]) -> List[dict]:
+    """Turn one player's element-summary `history` into panel rows."""
+    rows = []
+    for h in hist:
+        fixture_id = h.get("fixture")
+        was_home = h.get("was_home")
+        opp_id = h.get("opponent_team")
+
+        # derive per-GW team from fixture + was_home
+        team_id_gw = None
+        if fixture_id in fx_map and was_home is not None:
+            t_h = fx_map[fixture_id]["team_h"]
+            t_a = fx_map[fixture_id]["team_a"]
+            team_id_gw = t_h if was_home else t_a
+
+        rows.append({
+            "element": pid,
+            "gw": h.get("round"),
+            "minutes": h.get("minutes"),
+            "expected_goal_involvements": h.get("expected_goal_involvements"),
+            "ict_index": h.get("ict_index"),
+            "expected_goals": h.get("expected_goals"),
+            "expected_assists": h.get("expected_assists"),
+            "bps": h.get("bps"),
+            "fixture": fixture_id,
+            "starts": h.get("starts"),
+            "clean_sheets": h.get("clean_sheets"),
+            "assists": h.get("assists"),
+            "creativity": h.get("creativity"),
+            "team_h_score": h.get("team_h_score"),
+            "total_points": h.get("total_points"),
+            "bonus": h.get("bonus"),
+            "penalties_missed": h.get("penalties_missed"),
+            "opponent_team": opp_id,
+            "influence": h.get("influence"),
+            "saves": h.get("saves"),
+            "expected_goals_conceded": h.get("expected_goals_conceded"),
+            "red_cards": h.get("red_cards"),
+            "team_a_score": h.get("team_a_score"),
+            "threat": h.get("threat"),
+            "yellow_cards": h.get("yellow_cards"),
+            "goals_conceded": h.get("goals_conceded"),
+            "goals_scored": h.get("goals_scored"),
+            "was_home": was_home,
+            # placeholders; will fill after merge
+            "team_id_gw": team_id_gw,
+        })
+    return rows
+
+
+def build_panel(rows: List[dict], players_meta: pd.DataFrame, team_name_map: Dict[int, str]) -> pd.DataFrame:
+    panel = pd.DataFrame(rows)
+
+    # Merge player meta (current team + name + ppg)
+    panel = panel.merge(players_meta, on="element", how="left")
+
+    # Map opponent and per-GW team names
+    panel["opponent_team_name"] = panel["opponent_team"].map(team_name_map)
+    panel["team_name_gw"] = panel["team_id_gw"].map(team_name_map)
+
+    # Guarantee schema
+    for col in OUT_COLS:
+        if col not in panel.columns:
+            panel[col] = pd.NA
+
+    panel = panel.sort_values(["element", "gw"], kind="mergesort")[OUT_COLS].reset_index(drop=True)
+
+    # add season tag like you had
+    panel["season"] = SEASON
+    return panel
+
+
+# --- incremental refresh ---
+META_COLS = ["points_per_game", "full_name", "team_id_current", "team_name_current", "price_now", "position"]
+
+
+def latest_finished_gw(boot: dict) -> Optional[int]:
+    """Last gameweek the API marks as finished (None if bootstrap has no `events`)."""
+    finished = [e["id"] for e in boot.get("events", []) if e.get("finished")]
+    return max(finished) if finished else None
+
+
+def load_ingest_state(path: Path, existing: pd.DataFrame) -> Dict[int, int]:
+    """element -> last gw already ingested. Rebuilt from the panel itself if the state file is missing."""
     try:
-        resp = SESSION.get(f"{API}/element-summary/{int(pid)}/", timeout=15)
-        resp.raise_for_status()
-        hist = resp.json().get("history", [])
-        for h in hist:
-            fixture_id = h.get("fixture")
-            was_home = h.get("was_home")
-            opp_id = h.get("opponent_team")
-
-            # derive per-GW team from fixture + was_home
-            team_id_gw = None
-            if fixture_id in fx_map and was_home is not None:
-                t_h = fx_map[fixture_id]["team_h"]
-                t_a = fx_map[fixture_id]["team_a"]
-                team_id_gw = t_h if was_home else t_a
-
-            rows.append({
-                "element": pid,
-                "gw": h.get("round"),
-                "minutes": h.get("minutes"),
-                "expected_goal_involvements": h.get("expected_goal_involvements"),
-                "ict_index": h.get("ict_index"),
-                "expected_goals": h.get("expected_goals"),
-                "expected_assists": h.get("expected_assists"),
-                "bps": h.get("bps"),
-                "fixture": fixture_id,
-                "starts": h.get("starts"),
-                "clean_sheets": h.get("clean_sheets"),
-                "assists": h.get("assists"),
-                "creativity": h.get("creativity"),
-                "team_h_score": h.get("team_h_score"),
-                "total_points": h.get("total_points"),
-                "bonus": h.get("bonus"),
-                "penalties_missed": h.get("penalties_missed"),
-                "opponent_team": opp_id,
-                "influence": h.get("influence"),
-                "saves": h.get("saves"),
-                "expected_goals_conceded": h.get("expected_goals_conceded"),
-                "red_cards": h.get("red_cards"),
-                "team_a_score": h.get("team_a_score"),
-                "threat": h.get("threat"),
-                "yellow_cards": h.get("yellow_cards"),
-                "goals_conceded": h.get("goals_conceded"),
-                "goals_scored": h.get("goals_scored"),
-                "was_home": was_home,
-                # placeholders; will fill after merge
-                "team_id_gw": team_id_gw,
+        with open(path, "r", encoding="utf-8") as fh:
+            return {int(k): int(v) for k, v in json.load(fh)["last_gw"].items()}
+    except (OSError, ValueError, KeyError):
+        gws = pd.to_numeric(existing["gw"], errors="coerce")
+        last = gws.groupby(pd.to_numeric(existing["element"], errors="coerce")).max().dropna()
+        return {int(k): int(v) for k, v in last.items()}
+
+
+def save_ingest_state(path: Path, last_gw: Dict[int, int]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"last_gw": {str(k): v for k, v in sorted(last_gw.items())}}, fh)
+
+
+def _as_text(df: pd.DataFrame) -> pd.DataFrame:
+    """The frame exactly as it would read back from its CSV, every cell as text."""
+    return pd.read_csv(io.StringIO(df.to_csv(index=False)), dtype=str, keep_default_na=False)
+
+
+def append_new_rows(existing: pd.DataFrame, new_panel: pd.DataFrame, players_meta: pd.DataFrame) -> pd.DataFrame:
+    """
+    Append freshly built rows to the panel read back as text (dtype=str), so old rows are written out
+    byte-for-byte as before. The current-team / price columns are restamped on every row, as a full refresh does.
+    """
+    meta = _as_text(players_meta[["element"] + META_COLS])
+    old = existing.drop(columns=META_COLS).merge(meta, on="element", how="inner")[existing.columns]
+    if len(new_panel):
+        old = pd.concat([old, _as_text(new_panel)[existing.columns]], ignore_index=True)
+    order = pd.DataFrame({"element": pd.to_numeric(old["element"]), "gw": pd.to_numeric(old["gw"])})
+    order = order.sort_values(["element", "gw"], kind="mergesort").index
+    return old.loc[order].reset_index(drop=True)
+
+
+def live_histories(live_by_gw: Dict[int, dict], last_gw: Dict[int, int], team_of: Dict[int, int],
+                   fx_map: Dict[int, dict]) -> Tuple[Dict[int, list], set]:
+    """
+    Rebuild element-summary style `history` entries from `event/{gw}/live/` responses (one call per
+    gameweek instead of one per player).
+
+    Live stats are per gameweek, not per fixture, so a player is only covered when each of their new
+    gameweeks has at most one fixture and their current team played in it. The rest are returned as
+    `fallback` and go through element-summary as usual.
+    """
+    hist: Dict[int, list] = {pid: [] for pid in team_of}
+    fallback = set()
+    for gw in sorted(live_by_gw):
+        live = {int(e["id"]): e for e in live_by_gw[gw].get("elements", [])}
+        for pid, team in team_of.items():
+            if pid in fallback or gw <= last_gw.get(pid, 0):
+                continue
+            e = live.get(pid)
+            explain = e.get("explain", []) if e is not None else None
+            if explain is None or len(explain) > 1:
+                fallback.add(pid)
+                continue
+            if not explain:
+                continue  # blank gameweek for this player
+            fx = fx_map.get(explain[0]["fixture"])
+            if fx is None or team not in (fx["team_h"], fx["team_a"]):
+                fallback.add(pid)
+                continue
+            was_home = fx["team_h"] == team
+            hist[pid].append({
+                **e["stats"],
+                "fixture": explain[0]["fixture"], "round": gw, "was_home": was_home,
+                "opponent_team": fx["team_a"] if was_home else fx["team_h"],
+                "team_h_score": fx.get("team_h_score"), "team_a_score": fx.get("team_a_score"),
             })
-    except requests.exceptions.RequestException:
-        continue
-    except ValueError:
-        continue
+    return {pid: h for pid, h in hist.items() if pid not in fallback}, fallback
+
+
+def refresh(output: str, api: str = API, config: Optional[FetchConfig] = None, incremental: bool = False,
+            cache_dir: Optional[str] = CACHE_DIR, cache_ttls: Optional[Dict[str, float]] = None,
+            store: Optional[str] = STORE_DIR, run: Optional[Run] = None) -> pd.DataFrame:
+    """
+    Build the current-season panel and write it to `output`.
+
+    With `incremental=True` and an existing panel at `output`, only players with a finished gameweek
+    newer than their last ingested one are looked at, and only their new (element, gw) rows are appended.
+    Missing gameweeks come from one `event/{gw}/live/` call each; element-summary is only used for the
+    players live data cannot describe (double gameweeks, transfers). Incremental runs stop at the last
+    finished gameweek; rows a full refresh wrote for a running gameweek are replaced once it finishes.
+
+    Stage times, memory, row counts and every API request are recorded in `run` (instrument.py).
+    """
+    config = config or FetchConfig()
+    run = run or Run("data_loader")
+    session = make_session(config.workers)
+    cache = ResponseCache(cache_dir, cache_ttls) if cache_dir else None
+
+    with run.stage("bootstrap") as st:
+        boot = fetch_json(session, f"{api}/bootstrap-static/", None, config, run.on_request, cache)
+        players_meta, team_name_map = load_players_meta(boot)
+        fixtures = fetch_json(session, f"{api}/fixtures/", None, config, run.on_request, cache)
+        fx_map = load_fixture_map(fixtures)
+        final_gw = latest_finished_gw(boot)
+        st.rows_out = len(players_meta)
+
+    pids = [int(p) for p in players_meta["element"].tolist()]
+    existing, last_gw, from_live = None, {}, {}
+    state_path = Path(cache_dir or Path(output).parent) / STATE_FILE
+    if incremental and Path(output).exists():
+        existing = pd.read_csv(output, dtype=str, keep_default_na=False)
+        last_gw = load_ingest_state(state_path, existing)
+        if final_gw is not None:
+            pids = [p for p in pids if last_gw.get(p, 0) < final_gw]
+            gws = sorted({gw for p in pids for gw in range(last_gw.get(p, 0) + 1, final_gw + 1)})
+            print(f"[INFO] Incremental: {len(pids)} players behind GW{final_gw}")
+            if pids and len(gws) <= MAX_LIVE_GWS:
+                with run.stage("live", rows_in=len(pids)) as st:
+                    try:
+                        live_by_gw = {gw: fetch_json(session, f"{api}/event/{gw}/live/", None, config,
+                                                     run.on_request, cache) for gw in gws}
+                    except FetchError as e:
+                        print(f"[WARN] live endpoint unavailable ({e}); using element-summary for every player")
+                    else:
+                        team_of = dict(zip(players_meta["element"].astype(int), players_meta["team_id_current"]))
+                        from_live, fallback = live_histories(live_by_gw, last_gw, {p: team_of[p] for p in pids},
+                                                             fx_map)
+                        print(f"[INFO] {len(from_live)} players from {len(gws)} live gameweek(s), "
+                              f"{len(fallback)} need element-summary")
+                        pids = [p for p in pids if p in fallback]
+                    st.rows_out = len(from_live)
+
+    with run.stage("element_summaries", rows_in=len(pids)) as st:
+        result = fetch_element_summaries(pids, api=api, config=config, session=session,
+                                         on_request=run.on_request, cache=cache)
+        st.rows_out = len(result.ok)
+        st.info.update(failed=len(result.failed), not_modified=result.not_modified)
+    print(f"[INFO] Fetched {len(result.ok)}/{len(pids)} players in {result.elapsed:.1f}s "
+          f"({result.requests} requests, {result.not_modified} not modified, workers={config.workers})")
+    if result.failed:
+        print(f"[WARN] {len(result.failed)} players failed and are missing from the panel:")
+        for pid, reason in sorted(result.failed.items()):
+            print(f"  element={pid}: {reason}")
+    histories = {pid: data.get("history", []) for pid, data in result.ok.items()}
+    histories.update(from_live)
+
+    with run.stage("build_panel", rows_in=len(histories)) as st:
+        if existing is not None:
+            # rows past a fetched player's last ingested gw were provisional; they are re-fetched below
+            element = pd.to_numeric(existing["element"])
+            provisional = element.isin(list(histories)) & (
+                pd.to_numeric(existing["gw"]) > element.map(last_gw).fillna(0))
+            existing = existing[~provisional]
+
+        rows = []
+        for pid in sorted(histories):
+            hist = histories[pid]
+            if existing is not None:
+                # only finished gameweeks are appended, so every appended row is final
+                hist = [h for h in hist if last_gw.get(pid, 0) < (h.get("round") or 0)
+                        and (final_gw is None or h.get("round") <= final_gw)]
+            rows.extend(history_rows(pid, hist, fx_map))
+            seen = max([h.get("round") or 0 for h in hist] + [last_gw.get(pid, 0)])
+            last_gw[pid] = final_gw if final_gw is not None else seen
 
-panel = pd.DataFrame(rows)
+        if existing is not None:
+            new_panel = build_panel(rows, players_meta, team_name_map) if rows else pd.DataFrame()
+            panel = append_new_rows(existing, new_panel, players_meta)
+            print(f"[INFO] Appended {len(new_panel)} new rows")
+        else:
+            panel = build_panel(rows, players_meta, team_name_map)
+        st.rows_out = len(panel)
 
-# Merge player meta (current team + name + ppg)
-panel = panel.merge(players_meta, on="element", how="left")
+    with run.stage("write", rows_in=len(panel)):
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        panel.to_csv(output, index=False)
+        save_ingest_state(state_path, last_gw)
+        print("Wrote:", panel.shape, "->", output)
+        if store:
+            # the incremental panel is all text; empty cells are missing values
+            if len(panel):
+                write_panel(panel.replace("", pd.NA) if existing is not None else panel, store, RAW)
+                print("Wrote: season", SEASON, "->", Path(store) / RAW)
+            else:
+                print("[WARN] empty panel, season", SEASON, "not written to", Path(store) / RAW)
+            if fixtures:
+                write_panel(fixtures_frame(fixtures), store, FIXTURES, season=int(SEASON))
+    return panel
 
-# Map opponent and per-GW team names
-panel["opponent_team_name"] = panel["opponent_team"].map(team_name_map)
-panel["team_name_gw"] = panel["team_id_gw"].map(team_name_map)
 
-# Guarantee schema
-for col in OUT_COLS:
-    if col not in panel.columns:
-        panel[col] = pd.NA
+def main():
+    ap = argparse.ArgumentParser(description="Download the current season from the FPL API into a panel CSV.")
+    ap.add_argument("--output", default=OUT_PATH, help="Output CSV path for the panel")
+    ap.add_argument("--api", default=API, help="FPL API base URL (point at a local stand-in for testing)")
+    ap.add_argument("--workers", type=int, default=8, help="Max concurrent element-summary requests (1 = serial)")
+    ap.add_argument("--rate", type=float, default=20.0, help="Max requests per second")
+    ap.add_argument("--retries", type=int, default=3, help="Retries per player for timeouts / 429 / 5xx")
+    ap.add_argument("--timeout", type=float, default=15.0, help="Per-request timeout (seconds)")
+    ap.add_argument("--budget", type=float, default=60.0, help="Total time budget per player, retries included")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Append only new (element, gw) rows to the existing panel at --output")
+    ap.add_argument("--cache-dir", default=CACHE_DIR, help="On-disk API response cache (default: .fpl_cache)")
+    ap.add_argument("--no-cache", action="store_true", help="Do not read or write the response cache")
+    ap.add_argument("--revalidate", action="store_true", help="Ignore cache TTLs; revalidate every cached response")
+    ap.add_argument("--store", default=STORE_DIR, help="Panel store the season is also written to (panel_store.py)")
+    ap.add_argument("--no-store", action="store_true", help="Only write the CSV")
+    ap.add_argument("--report", default=None,
+                    help="Directory for the per-stage time / memory / request report (default: $FPL_REPORT, else none)")
+    ap.add_argument("--profile", default=None,
+                    help=f"Also dump a per-stage profile: comma separated {', '.join(PROFILERS)} (default: $FPL_PROFILE)")
+    args = ap.parse_args()
 
-panel = panel.sort_values(["element", "gw"], kind="mergesort")[OUT_COLS].reset_index(drop=True)
+    config = FetchConfig(workers=args.workers, rate=args.rate, retries=args.retries,
+                         timeout=args.timeout, budget=args.budget)
+    ttls = {endpoint: 0 for endpoint in DEFAULT_TTLS} if args.revalidate else None
+    run = Run.from_env("data_loader", args.report, args.profile)
+    refresh(args.output, api=args.api, config=config, incremental=args.incremental,
+            cache_dir=None if args.no_cache else args.cache_dir, cache_ttls=ttls,
+            store=None if args.no_store else args.store, run=run)
+    run.finish()
 
-# add season tag like you had
-panel["season"] = "2526"
 
-# write
-out_path = r"C:\Users\Asus\Desktop\fpl_data\archive\panels\players2526_panel.csv"
-panel.to_csv(out_path, index=False)
-print("Wrote:", panel.shape, "->", out_path)
+if __name__ == "__main__":
+    main()
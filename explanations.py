@@ -0,0 +1,198 @@
+"""
+Why the model rates a player: TreeSHAP contributions from XGBoost's own pred_contribs /
+pred_interactions, summed into feature groups, for every row of a gameweek at once.
+
+- one booster call per batch of BATCH_ROWS rows (C++ TreeSHAP over all trees), not a Python
+  explainer per row; per-position models explain each row with its position's model
+- contributions are summed by feature group: form over each rolling window (form_mean5, ...),
+  momentum, lags, position, team strength, fixtures, the last GW's own stats, price. Per row
+  the groups plus bias add up to predicted_points_next
+- interactions=N also sums pred_interactions into group x group pairs for the N highest predicted
+  rows and keeps each one's strongest pair (top_interaction); pred_interactions costs ~features x
+  pred_contribs, so not for the whole GW
+- approx=True uses approx_contribs (Saabas) instead of exact TreeSHAP: ~100x faster, same sum
+- top_features: the row's three largest single-feature contributions
+- cached per (model hash, season, gw) under <store>/_explanations, keyed also by the GW's feature
+  rows and the options: a GW is explained once per trained model, a cache hit is a Parquet read
+
+Usage (via fplpredict.py):
+  python fplpredict.py explain --gw 7 --player Haaland
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from features import LAGS, MOMENTUM
+from panel_store import STORE_DIR
+from position_models import PositionModels, player_positions
+from team_strength import feature_columns as team_columns
+
+CACHE = "_explanations"
+BATCH_ROWS = 4096
+TEAM = set(team_columns())  # the team table's columns; raw panel columns like team_a_score are last_gw
+KEEP = ["full_name", "position", "team_name_current", "price_now", "season", "gw", "element", "fixture",
+        "predicted_points_next"]
+
+
+def feature_group(feature: str) -> str:
+    mean = re.search(r"_mean(\d+)$", feature)
+    if mean:
+        return f"form_mean{mean.group(1)}"
+    if feature in MOMENTUM or "_momentum_" in feature:
+        return "momentum"
+    if feature in LAGS or re.search(r"_lag\d+$", feature):
+        return "lags"
+    if feature.startswith("position_copy_"):
+        return "position"
+    if feature in TEAM:
+        return "fixtures" if re.match(r"next\d+_", feature) else "team_strength"
+    if feature == "price_now":
+        return "price"
+    return "last_gw"
+
+
+def group_matrix(features: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+    """(group names + "bias", 0/1 matrix (features + bias) x groups) to sum contributions by group."""
+    of = [feature_group(f) for f in features]
+    groups = list(dict.fromkeys(sorted(of, key=lambda g: (not g.startswith("form_"), g)))) + ["bias"]
+    G = np.zeros((len(features) + 1, len(groups)), dtype=np.float32)
+    G[np.arange(len(features)), [groups.index(g) for g in of]] = 1
+    G[-1, -1] = 1  # pred_contribs' last column is the bias
+    return groups, G
+
+
+def contributions(booster: xgb.Booster, X: np.ndarray, features: List[str], batch_rows: int = BATCH_ROWS,
+                  approx: bool = False) -> np.ndarray:
+    """pred_contribs (rows, features + 1; last column the bias), batch_rows rows per booster call."""
+    out = np.empty((len(X), len(features) + 1), dtype=np.float32)
+    for a in range(0, len(X), batch_rows):
+        dm = xgb.DMatrix(X[a:a + batch_rows], feature_names=features)
+        out[a:a + batch_rows] = booster.predict(dm, pred_contribs=True, approx_contribs=approx)
+    return out
+
+
+def group_interactions(booster: xgb.Booster, X: np.ndarray, features: List[str], G: np.ndarray,
+                       batch_rows: int = 256) -> np.ndarray:
+    """
+    pred_interactions summed into G's groups, (rows, groups, groups). Summed batch by batch, so the
+    (rows, features + 1, features + 1) array is never there for more than batch_rows rows.
+    """
+    out = np.empty((len(X), G.shape[1], G.shape[1]), dtype=np.float32)
+    for a in range(0, len(X), batch_rows):
+        full = booster.predict(xgb.DMatrix(X[a:a + batch_rows], feature_names=features), pred_interactions=True)
+        out[a:a + batch_rows] = np.einsum("fg,nfh,hk->ngk", G, full, G, optimize=True)
+    return out
+
+
+def model_hash(model) -> str:
+    models = model.models if isinstance(model, PositionModels) else {"": model}
+    h = hashlib.sha256()
+    for pos, m in sorted(models.items()):
+        h.update(pos.encode())
+        h.update(bytes(m.get_booster().save_raw(raw_format="ubj")))
+    return h.hexdigest()
+
+
+def _top(values: np.ndarray, names: List[str], k: int) -> List[str]:
+    order = np.argsort(-np.abs(values), axis=1)[:, :k]
+    return ["; ".join(f"{names[j]} {values[i, j]:+.2f}" for j in row) for i, row in enumerate(order)]
+
+
+def explain(model, test_df: pd.DataFrame, X_test: pd.DataFrame, interactions: int = 0, approx: bool = False,
+            batch_rows: int = BATCH_ROWS) -> pd.DataFrame:
+    """
+    One row per test_df row (same order): KEEP columns, shap_<group> per feature group, shap_bias and
+    top_features. interactions=N adds top_interaction for the N rows with the highest
+    predicted_points_next (exact interactions cost ~1s a row on one core, so not for the whole GW).
+    approx=True: Saabas contributions (approx_contribs, ~100x faster, not exact Shapley values).
+    """
+    features = list(X_test.columns)
+    groups, G = group_matrix(features)
+    X = np.ascontiguousarray(X_test.to_numpy(dtype=np.float32))
+    if isinstance(model, PositionModels):
+        position = np.asarray(player_positions(test_df), dtype=object)
+        parts = [(m, np.flatnonzero(position == pos)) for pos, m in model.models.items()]
+    else:
+        parts = [(model, np.arange(len(X)))]
+    contrib = np.zeros((len(X), len(features) + 1), dtype=np.float32)
+    for m, rows in parts:
+        if len(rows):
+            contrib[rows] = contributions(m.get_booster(), X[rows], features, batch_rows, approx)
+
+    out = test_df[[c for c in KEEP if c in test_df.columns]].reset_index(drop=True).copy()
+    by_group = contrib @ G
+    for j, g in enumerate(groups):
+        out[f"shap_{g}"] = by_group[:, j]
+    out["top_features"] = _top(contrib[:, :-1], features, 3)
+    if interactions:
+        score = out["predicted_points_next"].to_numpy(dtype=float) if "predicted_points_next" in out else np.zeros(len(out))
+        top = np.argsort(-np.nan_to_num(score, nan=-np.inf), kind="stable")[:interactions]
+        a, b = np.triu_indices(len(groups) - 1, k=1)  # group pairs, bias left out
+        names = [f"{groups[x]} x {groups[y]}" for x, y in zip(a, b)]
+        out["top_interaction"] = ""
+        for m, rows in parts:
+            rows = np.intersect1d(rows, top)
+            if len(rows):
+                inter = group_interactions(m.get_booster(), X[rows], features, G)
+                out.loc[rows, "top_interaction"] = _top(inter[:, a, b] + inter[:, b, a], names, 1)
+    return out
+
+
+#----------
+#cache per (model hash, gw)
+def explain_gw(model, test_df: pd.DataFrame, X_test: pd.DataFrame, season: int, gw: int, store: str = STORE_DIR,
+               interactions: int = 0, approx: bool = False) -> Tuple[pd.DataFrame, bool]:
+    """
+    (explain(...) of the GW, cache hit): recomputed only for a new model, changed feature rows or
+    other options. Writing an entry removes the GW's entries of other models.
+    """
+    rows = hashlib.sha256(np.ascontiguousarray(X_test.to_numpy(dtype=np.float32)).tobytes())
+    rows.update(json.dumps(list(X_test.columns)).encode())
+    key = {"model": model_hash(model), "rows": rows.hexdigest(), "interactions": int(interactions), "approx": approx,
+           "groups": [feature_group(f) for f in X_test.columns]}
+    options = hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+    root = Path(store) / CACHE
+    stem = f"{season}_gw{gw}_{key['model'][:12]}"
+    data, meta_path = root / f"{stem}_{options[:8]}.parquet", root / f"{stem}_{options[:8]}.json"
+    try:
+        with open(meta_path, "r", encoding="utf-8") as fh:
+            saved = json.load(fh)
+        if saved["key"] == key:
+            return pd.read_parquet(data), True
+    except (OSError, ValueError, KeyError):
+        pass
+
+    t0 = time.perf_counter()
+    out = explain(model, test_df, X_test, interactions, approx)
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = data.with_suffix(".parquet.tmp")
+    out.to_parquet(tmp, index=False)
+    os.replace(tmp, data)
+    tmp = meta_path.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({"key": key, "rows": len(out), "seconds": time.perf_counter() - t0, "saved_at": time.time()}, fh)
+    os.replace(tmp, meta_path)
+    for old in root.glob(f"{season}_gw{gw}_*"):
+        if not old.name.startswith(stem):  # an older model's explanations of this GW
+            old.unlink(missing_ok=True)
+    return out, False
+
+
+def reasons(explained: pd.DataFrame, names: Sequence[str], k: int = 3) -> Dict[str, str]:
+    """full_name -> its k largest feature groups, e.g. "form_mean5 +1.84, fixtures +0.62, lags -0.31"."""
+    cols = [c for c in explained.columns if c.startswith("shap_") and c != "shap_bias"]
+    rows = explained[explained["full_name"].isin(list(names))].drop_duplicates("full_name")
+    out = {}
+    for _, r in rows.iterrows():
+        top = sorted(cols, key=lambda c: -abs(r[c]))[:k]
+        out[r["full_name"]] = ", ".join(f"{c[5:]} {r[c]:+.2f}" for c in top)
+    return out
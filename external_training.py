@@ -0,0 +1,210 @@
+"""
+Out-of-core training for model.py's XGBoost model: the training rows are streamed from the feature
+store one season at a time through XGBoost's external-memory interface (xgboost.DataIter +
+ExtMemQuantileDMatrix), so no training frame or matrix of all seasons is ever in memory.
+
+- SeasonBatches yields one batch per season partition of the engineered panel (+ the season's team
+  strength tables): the rows with a target up to (season, gw), one-hot position, in the fixed
+  feature columns of the whole panel (as matrix_cache.feature_matrix lays them out), float32.
+- XGBoost reads the batches twice (quantile sketch, then the binned pages) and keeps the binned
+  pages in a cache on disk (--cache-dir, removed afterwards). Peak memory is one season's batch plus
+  the booster and XGBoost's per-row gradient / prediction buffers (~12 bytes a row), instead of the
+  panel, its feature frame and the matrix of every season.
+- the booster is hist with the same bins (max_bin) and params as model.py's in-memory fit, so it
+  scores the same (benchmarks/bench_external_memory.py compares RMSE, time and peak RSS).
+- the model is saved with model_store.ModelStore (same files model.py / fplpredict.py load). It is
+  loaded instead of refit while the season partitions, params and features hash the same; there are
+  no warm starts in this mode.
+
+Usage:
+  python external_training.py --until 2526 6
+  python external_training.py --seasons 1617 1718 1819 --until 1920 38 --models models_all
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from matrix_cache import DROP_COLS, PANELS_ENGINEERED, TARGET, feature_matrix
+from model_store import MODEL_NAME, ModelStore, _json_params
+from file_hashes import Hashes
+from panel_store import STORE_DIR, list_seasons, read_panel
+from team_strength import STRENGTH, TEAM_FIXTURES, add_team_features
+
+MAX_BIN = 256  # XGBoost's default, what model.py's in-memory hist uses
+
+
+def panel_frame(store: str, dataset: str, seasons: Sequence[int], team_features: bool,
+                gw_max: Optional[int] = None) -> pd.DataFrame:
+    """`seasons` of the engineered panel with their team strength columns, as model.py trains on them."""
+    df = read_panel(store, dataset, seasons=seasons, gw_max=gw_max)
+    if team_features:
+        df = add_team_features(df, read_panel(store, STRENGTH, seasons=seasons),
+                               read_panel(store, TEAM_FIXTURES, seasons=seasons))
+    return df.drop(columns=["was_home"], errors="ignore")
+
+
+def feature_columns(store: str, dataset: str, seasons: Sequence[int], team_features: bool = True,
+                    drop_cols: List[str] = DROP_COLS) -> List[str]:
+    """The feature columns of the whole panel, from its first gameweek of every season and the position categories."""
+    sample = panel_frame(store, dataset, seasons, team_features, gw_max=1)
+    positions = read_panel(store, dataset, columns=["position"], seasons=seasons)["position"]
+    if isinstance(positions.dtype, pd.CategoricalDtype):
+        categories = list(positions.cat.categories)
+    else:
+        categories = sorted(positions.dropna().astype(str).unique())
+    sample["position"] = pd.Categorical(sample["position"].astype(object), categories=categories)
+    return feature_matrix(sample, drop_cols)[3]
+
+
+def season_batch(store: str, dataset: str, season: int, features: List[str], team_features: bool = True,
+                 gw_max: Optional[int] = None, drop_cols: List[str] = DROP_COLS) -> Tuple[np.ndarray, np.ndarray]:
+    """(X float32 in `features` order, y) of one season's rows with a target, up to gw_max."""
+    df = panel_frame(store, dataset, [season], team_features, gw_max)
+    df = df[df[TARGET].notna()]
+    X, y, _, cols = feature_matrix(df, drop_cols)
+    at = {c: i for i, c in enumerate(features)}
+    unknown = [c for c in cols if c not in at]
+    if unknown:
+        raise ValueError(f"season {season} has columns the other seasons do not: {unknown}")
+    out = np.zeros((len(X), len(features)), dtype=np.float32)  # columns a season lacks are 0, as fillna(0)
+    out[:, [at[c] for c in cols]] = X
+    return out, y
+
+
+class SeasonBatches(xgb.DataIter):
+    """One batch per season (the last one up to `until_gw`), read from the store each time XGBoost asks."""
+
+    def __init__(self, store: str, dataset: str, seasons: Sequence[int], features: List[str],
+                 team_features: bool = True, until_gw: Optional[int] = None, cache_prefix: Optional[str] = None,
+                 on_batch: Optional[Callable[[int, int], None]] = None):
+        self.store, self.dataset, self.seasons = store, dataset, list(seasons)
+        self.features, self.team_features, self.until_gw = features, team_features, until_gw
+        self.on_batch = on_batch
+        self._it = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data: Callable) -> bool:
+        if self._it == len(self.seasons):
+            return False
+        season = self.seasons[self._it]
+        last = self._it == len(self.seasons) - 1
+        X, y = season_batch(self.store, self.dataset, season, self.features, self.team_features,
+                            self.until_gw if last else None)
+        input_data(data=X, label=y, feature_names=self.features)
+        if self.on_batch is not None:
+            self.on_batch(season, len(X))
+        self._it += 1
+        return True
+
+    def reset(self) -> None:
+        self._it = 0
+
+
+def training_seasons(store: str, dataset: str, until_season: int, seasons: Optional[Sequence[int]] = None) -> List[int]:
+    """`seasons` (default: every season in the store) up to until_season, oldest first."""
+    have = list_seasons(store, dataset)
+    seasons = have if seasons is None else [s for s in seasons if s in have]
+    return sorted(s for s in seasons if s <= until_season)
+
+
+def train_external(model: xgb.XGBRegressor, store: str = STORE_DIR, until: Tuple[int, int] = (2526, 6),
+                   seasons: Optional[Sequence[int]] = None, root: Optional[str] = None, name: str = MODEL_NAME,
+                   dataset: str = PANELS_ENGINEERED, team_features: bool = True, retrain: bool = False,
+                   cache_dir: Optional[str] = None) -> Tuple[xgb.XGBRegressor, dict]:
+    """
+    Fit `model`'s params on every row with a target of `seasons` up to `until` = (season, gw),
+    streamed from the store, and save it under `root` (default <store>/models). Returns the model and
+    a report {"action", "seconds", "trees", "rows", "seasons"} ("loaded" when nothing changed).
+    """
+    t0 = time.perf_counter()
+    seasons = training_seasons(store, dataset, until[0], seasons)
+    if not seasons:
+        raise ValueError(f"no seasons up to {until[0]} in {store}/{dataset}")
+    features = feature_columns(store, dataset, seasons, team_features)
+    saved = ModelStore(root or os.path.join(store, "models"), name)
+    params = _json_params(model)
+    meta = saved.load_meta()
+    hashes = Hashes((meta or {}).get("files"))  # partitions are only re-read when their size / mtime changed
+    parts = [os.path.join(store, d, f"season={s}") for s in seasons
+             for d in [dataset] + ([STRENGTH, TEAM_FIXTURES] if team_features else [])]
+    inputs = [hashes.path(p) for p in parts] + [f"{until[0]}:{until[1]}"]
+    data = "external:" + hashlib.sha256("\n".join(inputs).encode()).hexdigest()
+
+    if retrain:
+        meta = None
+    if meta is not None and saved.model_path.exists() and meta.get("data_hash") == data \
+            and meta["params"] == params and meta["features"] == features:
+        return saved.load_model(), {"action": "loaded", "seconds": time.perf_counter() - t0,
+                                    "trees": meta["trees"], "rows": meta["rows"], "seasons": seasons}
+
+    rows = {}
+    work = tempfile.mkdtemp(prefix="fpl_extmem_", dir=cache_dir)
+    try:
+        until_gw = until[1] if seasons[-1] == until[0] else None
+        it = SeasonBatches(store, dataset, seasons, features, team_features, until_gw,
+                           cache_prefix=os.path.join(work, "cache"), on_batch=lambda s, n: rows.__setitem__(s, n))
+        dtrain = xgb.ExtMemQuantileDMatrix(it, max_bin=MAX_BIN)
+        booster = xgb.train({**model.get_xgb_params(), "max_bin": MAX_BIN}, dtrain,
+                            num_boost_round=model.get_params()["n_estimators"])
+        del dtrain
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    fitted = xgb.XGBRegressor(**model.get_params())
+    fitted.load_model(booster.save_raw(raw_format="ubj"))
+    seconds = time.perf_counter() - t0
+    n = sum(rows.values())
+    last = until[0] * 100 + until[1] if seasons[-1] == until[0] else seasons[-1] * 100 + 99
+    saved.save(fitted, {
+        "features": features,
+        "dtypes": {c: "float32" for c in features},
+        "params": params,
+        "data_hash": data,
+        "rows": n,
+        "trained_until": last,
+        "warm_starts": 0,
+        "trees": booster.num_boosted_rounds(),
+        "full_fit_seconds": seconds,
+        "full_fit_rows": n,
+        "external_memory": True,
+        "files": hashes.used,
+        "xgboost": xgb.__version__,
+        "saved_at": time.time(),
+    })
+    return fitted, {"action": "full fit", "seconds": seconds, "trees": booster.num_boosted_rounds(), "rows": n,
+                    "seasons": seasons}
+
+
+def main():
+    from model import make_model
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--store", default=STORE_DIR)
+    ap.add_argument("--dataset", default=PANELS_ENGINEERED)
+    ap.add_argument("--seasons", type=int, nargs="+", default=None, help="default: every season in the store")
+    ap.add_argument("--until", type=int, nargs=2, metavar=("SEASON", "GW"), required=True,
+                    help="train on rows up to and including this gameweek")
+    ap.add_argument("--models", default=None, help="model directory (default: <store>/models, as model.py)")
+    ap.add_argument("--cache-dir", default=None, help="where XGBoost's page cache goes (default: the temp dir)")
+    ap.add_argument("--retrain", action="store_true")
+    ap.add_argument("--no-team-features", action="store_true")
+    args = ap.parse_args()
+
+    model, report = train_external(make_model(), args.store, tuple(args.until), args.seasons, args.models,
+                                   dataset=args.dataset, team_features=not args.no_team_features,
+                                   retrain=args.retrain, cache_dir=args.cache_dir)
+    print(f"[OK] {report['action']} in {report['seconds']:.1f}s: {report['rows']} rows of seasons "
+          f"{report['seasons']}, {report['trees']} trees")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,80 @@
 """
 Combining all data from multiple seasons, then engineering the features /preprocessing for the machine learning model
 """
+import numpy as np
 import pandas as pd
-from pathlib import Path
 
-#merging all data into one csv file
-all_files = list(Path(r"C:\Users\Asus\Desktop\fpl_data\archive\panels").rglob("*.csv"))
+from instrument import Run
+from panel_store import CONSOLIDATED, RAW, STORE_DIR, read_panel, write_panel
+from player_index import PlayerIndex, assign_players
 
-dfs = [pd.read_csv(p, dtype=str, low_memory=False) for p in all_files]
-merged = pd.concat(dfs, ignore_index=True)
+CURR_SEASON = 2526
+
+
+#full_name stays categorical: strip / casefold the distinct names, not one string per row
+def clean_names(merged: pd.DataFrame) -> pd.DataFrame:
+    names = merged["full_name"].astype("category")
+    stripped = names.cat.categories.astype(str).str.strip()
+    if stripped.is_unique:
+        merged["full_name"] = names.cat.rename_categories(stripped)
+    else:  # "Name " and "Name" are the same player
+        merged["full_name"] = names.map(dict(zip(names.cat.categories, stripped))).astype("category")
+    merged = merged[merged["full_name"].ne("") & merged["full_name"].notna()]
+    fold_rank = np.unique(merged["full_name"].cat.categories.str.casefold(), return_inverse=True)[1]
+    return merged.sort_values("full_name", key=lambda s: pd.Series(fold_rank[s.cat.codes], index=s.index),
+                              kind="mergesort")
 
-merged["full_name"] = merged["full_name"].astype(str).str.strip()
-merged = merged[merged["full_name"].ne("") & merged["full_name"].notna()]
-merged = merged.sort_values("full_name", key=lambda s: s.str.casefold(), kind="mergesort")
-merged.to_csv(r"C:\Users\Asus\Desktop\fpl_data\archive\all_panels.csv", index=False)
 
 #feature engineering
-df = pd.read_csv(r"C:\Users\Asus\Desktop\fpl_data\archive\all_panels.csv")
+def keep_current(df: pd.DataFrame, curr_season: int = CURR_SEASON) -> pd.DataFrame:
+    #dropping unneeded columns
+    df = df.drop(columns=['transfers_in', 'team_h_score', 'points_per_game'])
+
+    #removing players that are not in the league anymore in 25/26 (Note that this is not perfect as some players who left
+    # the PL is still in the FPL API
+    #element is already the player's id across seasons (player_index.py)
+    valid = df.loc[df["season"] == curr_season, "element"].unique()
+    return df[df["element"].isin(valid)]
+
+
+def consolidate(store: str = STORE_DIR, run: Run = None) -> pd.DataFrame:
+    """Merge every season of the raw panels in `store` into the consolidated dataset model.py reads."""
+    run = run or Run("feature_engineering")
+
+    #merging all seasons from the panel store (one partition per season, already typed)
+    with run.stage("load") as st:
+        merged = read_panel(store, RAW)
+        st.rows_out = len(merged)
+
+    #IDs are mixed up over multiple seasons and some names are spelled differently from one season to the next:
+    #one player_id per player from the persisted identity index (only new (season, element) pairs are matched)
+    with run.stage("identity", rows_in=len(merged)) as st:
+        index, added = PlayerIndex(store).update(merged)
+        merged = assign_players(merged, index)
+        st.rows_out = len(merged)
+        st.info.update(added)
+
+    with run.stage("names", rows_in=len(merged)) as st:
+        merged = clean_names(merged)
+        st.rows_out = len(merged)
 
-#dropping unneeded columns
-df = df.drop(columns=['transfers_in', 'team_h_score', 'points_per_game'])
+    with run.stage("filter", rows_in=len(merged)) as st:
+        df = keep_current(merged)
+        st.rows_out = len(df)
 
-#removing players that are not in the league anymore in 25/26 (Note that this is not perfect as some players who left
-# the PL is still in the FPL API
+    with run.stage("write", rows_in=len(df)):
+        write_panel(df, store, CONSOLIDATED)
+    return df
 
-df["season"] = df["season"].astype(str).str.strip()
-valid = df.loc[df["season"] == "2526", "full_name"].unique()
-df = df[df["full_name"].isin(valid)]
 
+def main():
+    run = Run.from_env("feature_engineering")  # FPL_REPORT=<dir> writes a per-stage report (instrument.py)
+    df = consolidate(STORE_DIR, run)
 
-#reassgining IDs to players as IDs are mixed up due to data over multiple seasons
-df["element"] = None
-name_to_id = {name: i for i, name in enumerate(df["full_name"].unique(), start=1)}
-df["element"] = df["full_name"].map(name_to_id)
+    #finding missing values(if any)
+    print(df.isnull().sum())
+    run.finish()
 
-df.to_csv(r"C:\Users\Asus\Desktop\fpl_data\archive\all_panels.csv", index=False)
 
-#finding missing values(if any)
-print(df.isnull().sum())
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Feature store: model.py's engineered panel, kept in the panel store and rewritten only where it changed.
+
+Every run computes the features of the whole panel in memory (build_features: one vectorized pass,
+faster than reading the stored rows back from Parquet) and returns that frame. The store is kept in
+step with it a block of BLOCK gameweeks (one file) at a time: it remembers a hash of each
+(season, gw)'s panel rows and rewrites the blocks from the first changed gameweek on, including the
+gameweek of each affected player's previous row (its total_points_next changes). A new gameweek
+therefore rewrites one block, two at a block boundary, instead of the season; a revised or renamed
+row is picked up the same way. Blocks rather than one file per gameweek: every file costs a few ms
+on each read of the dataset. Without season_reset the windows reach
+across seasons, so a changed season also rewrites every later one.
+
+The whole store is rewritten when the feature config or the panel's columns change, or with
+rebuild=True. Seasons and gameweeks the panel no longer has are removed.
+
+Layout (under the panel store):
+    all_panels_engineered/season=2526/part-gw08.parquet   <- feature rows of GW8-15, one file per block
+    all_panels_engineered/_state.json                     <- config the store was built with
+    all_panels_engineered/_gameweeks.json                 <- season -> gw -> hash of the panel rows
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from features import FORM_COLS, LAGS, MOMENTUM, SORT_KEYS, WINDOWS, add_form_features
+from panel_store import STORE_DIR, list_seasons, part_files, part_name, read_panel, write_panel_parts
+
+ENGINEERED = "all_panels_engineered"
+TARGET = "total_points_next"
+BLOCK = 8  # gameweeks per file
+
+
+def build_features(panel: pd.DataFrame, form_cols: Sequence[str] = FORM_COLS, windows: Sequence[int] = WINDOWS,
+                   season_reset: bool = False) -> pd.DataFrame:
+    """Full recompute: next-GW target plus the form features, over the panel sorted by element, season, gw."""
+    df = panel.sort_values(SORT_KEYS, kind="mergesort").reset_index(drop=True)
+    df[TARGET] = df.groupby(["element", "season"])["total_points"].shift(-1)
+    return add_form_features(df, form_cols, windows, season_reset=season_reset)
+
+
+def _config(panel: pd.DataFrame, form_cols, windows, season_reset) -> dict:
+    return {
+        "form_cols": list(form_cols),
+        "windows": [int(n) for n in windows],
+        "season_reset": bool(season_reset),
+        "block": BLOCK,  # file layout
+        "columns": {c: str(t) for c, t in panel.dtypes.items()},
+    }
+
+
+def gameweek_hashes(panel: pd.DataFrame) -> Dict[int, Dict[int, str]]:
+    """season -> gw -> row count and hash of its rows (every column, any row order)."""
+    keys = [panel["season"].to_numpy().astype(int), panel["gw"].to_numpy().astype(int)]
+    rows = pd.util.hash_pandas_object(panel, index=False).groupby(keys)
+    out = {}
+    for ((s, g), h), n in zip(rows.sum().items(), rows.size()):
+        out.setdefault(int(s), {})[int(g)] = f"{n}-{int(h):016x}"
+    return out
+
+
+def _first_gw(panel: pd.DataFrame, season: int, changed: int) -> int:
+    """First gameweek to rewrite when `changed` is the first changed one: also each player's row before it."""
+    rows = panel["season"].to_numpy() == season
+    element, gw = panel["element"].to_numpy()[rows], panel["gw"].to_numpy()[rows].astype(int)
+    before = (gw < changed) & np.isin(element, np.unique(element[gw >= changed]))
+    if not before.any():
+        return changed
+    return int(pd.Series(gw[before]).groupby(element[before]).max().min())
+
+
+class FeatureStore:
+    def __init__(self, store: str = STORE_DIR, dataset: str = ENGINEERED, form_cols: Sequence[str] = FORM_COLS,
+                 windows: Sequence[int] = WINDOWS, season_reset: bool = False):
+        self.store = store
+        self.dataset = dataset
+        self.root = Path(store) / dataset
+        self.form_cols = list(form_cols)
+        self.windows = list(windows)
+        self.season_reset = season_reset
+
+    # ---------- state ----------
+    def _load_state(self, config: dict) -> Dict[int, Dict[int, str]]:
+        """season -> gw -> hash, for the stored seasons built with `config` (empty: nothing usable)."""
+        try:
+            with open(self.root / "_state.json", "r", encoding="utf-8") as fh:
+                saved = json.load(fh)
+            with open(self.root / "_gameweeks.json", "r", encoding="utf-8") as fh:
+                gws = {int(s): {int(g): h for g, h in v.items()} for s, v in json.load(fh).items()}
+        except (OSError, ValueError):
+            return {}
+        stored = set(list_seasons(self.store, self.dataset))
+        return {s: v for s, v in gws.items() if s in stored} if saved == config else {}
+
+    def _save_state(self, hashes: Dict[int, Dict[int, str]], config: dict) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        for name, obj in (("_gameweeks.json", hashes), ("_state.json", config)):
+            tmp = self.root / f"{name}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(obj, fh)
+            os.replace(tmp, self.root / name)
+        if (self.root / "_state.parquet").exists():
+            os.remove(self.root / "_state.parquet")  # rolling state of the row-by-row update this replaced
+
+    # ---------- reading ----------
+    def read(self, panel: pd.DataFrame) -> pd.DataFrame:
+        """The stored feature rows of the panel's seasons, typed and ordered like build_features."""
+        df = read_panel(self.store, self.dataset, seasons=sorted(int(s) for s in panel["season"].unique()))
+        for col, dtype in panel.dtypes.items():
+            if df[col].dtype != dtype:
+                df[col] = df[col].astype(dtype)
+        df = df.sort_values(SORT_KEYS, kind="mergesort").reset_index(drop=True)
+        return df[list(panel.columns) + [c for c in self._feature_columns() if c not in panel.columns]]
+
+    # ---------- update ----------
+    def update(self, panel: pd.DataFrame, rebuild: bool = False) -> Tuple[pd.DataFrame, int]:
+        """build_features(panel), with the store brought up to date; returns (feature frame, rows rewritten)."""
+        config = _config(panel, self.form_cols, self.windows, self.season_reset)
+        stored = {} if rebuild else self._load_state(config)
+        hashes = gameweek_hashes(panel)
+
+        first = {}  # season -> first gameweek to rewrite
+        removed = set(stored) - set(hashes)
+        for season, gws in hashes.items():
+            old = stored.get(season, {})
+            changed = [g for g, h in gws.items() if old.get(g) != h]
+            if set(old) - set(gws):  # gameweeks removed: rewrite the season
+                first[season] = min(gws)
+            elif changed:
+                first[season] = _first_gw(panel, season, min(changed))
+            if (first or min(removed, default=season) < season) and not self.season_reset and season not in first:
+                first[season] = min(gws)  # its windows start in a changed or removed season
+
+        df = build_features(panel, self.form_cols, self.windows, self.season_reset)
+        for season in set(list_seasons(self.store, self.dataset)) - set(hashes):
+            # seasons the panel no longer has would otherwise come back on a later read
+            for path in part_files(self.store, self.dataset, season):
+                os.remove(path)
+        rows = 0
+        if first:
+            season, gw = df["season"].to_numpy().astype(int), df["gw"].to_numpy().astype(int)
+            lo = pd.Series(first).reindex(season).to_numpy(dtype=float)
+            redo = gw >= lo // BLOCK * BLOCK  # whole blocks; NaN (season unchanged) compares False
+            write_panel_parts(df[redo], self.store, self.dataset, by="gw", size=BLOCK)
+            rows = int(redo.sum())
+            for s in first:
+                keep = {part_name("gw", g, BLOCK) for g in hashes[s]}
+                for path in part_files(self.store, self.dataset, s):
+                    if path.name not in keep:
+                        os.remove(path)  # an emptied block, or the season's file from before the split
+        if first or stored.keys() != hashes.keys():
+            self._save_state(hashes, config)
+        return df, rows
+
+    def _feature_columns(self) -> List[str]:
+        cols = [TARGET] + [f"{c}_mean{n}" for n in self.windows for c in self.form_cols]
+        return cols + list(MOMENTUM) + list(LAGS)
+
+
+def update_features(panel: pd.DataFrame, store: str = STORE_DIR, dataset: str = ENGINEERED,
+                    form_cols: Sequence[str] = FORM_COLS, windows: Sequence[int] = WINDOWS,
+                    season_reset: bool = False, rebuild: bool = False, verify: bool = False) -> pd.DataFrame:
+    """FeatureStore(...).update(panel); verify=True also reads the store back and checks it matches."""
+    fs = FeatureStore(store, dataset, form_cols, windows, season_reset)
+    t0 = time.perf_counter()
+    df, written = fs.update(panel, rebuild=rebuild)
+    print(f"[INFO] feature store: {len(df):,} rows computed, {written:,} rewritten in {time.perf_counter() - t0:.2f}s")
+    if verify:
+        pd.testing.assert_frame_equal(fs.read(panel), df, check_exact=True)
+        print("[OK] feature store matches the computed features")
+    return df
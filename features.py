@@ -0,0 +1,133 @@
+"""
+Rolling form features for model.py, computed in one vectorized pass.
+
+The panel is sorted by (element, season, gw) once; every row's window is then a run of the rows just
+above it, so a window sum is the sum of the column shifted by 0..n-1 rows, masked where the shift
+would cross into another group. All form columns go through together as one float64 matrix, and the
+means, lags and momentum columns come out the same as the per-player groupby/rolling lambdas they
+replace (bit for bit; benchmarks/bench_features.py checks it).
+
+season_reset picks the grouping:
+  False  windows and lags run across season boundaries (per element), what model.py has always done
+  True   they restart every season (per element and season)
+"""
+
+from typing import Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+FORM_COLS = [
+    "minutes",
+    "expected_goal_involvements",
+    "bps",
+    "ict_index",
+    "expected_goals",
+    "expected_assists",
+    "creativity",
+]
+WINDOWS = [5, 8]  # removed 3: too reliant on a recent 'purple patch'
+
+# output column -> (source column, short window, long window): mean_short - mean_long
+MOMENTUM = {
+    "xgi_momentum_3_8": ("expected_goal_involvements", 5, 8),
+    "minutes_momentum_3_8": ("minutes", 5, 8),
+}
+# output column -> source column, previous row of the same group
+LAGS = {
+    "minutes_lag1": "minutes",
+    "xgi_lag1": "expected_goal_involvements",
+}
+
+SORT_KEYS = ["element", "season", "gw"]
+
+
+def _group_keys(season_reset: bool) -> list:
+    return ["element", "season"] if season_reset else ["element"]
+
+
+def _check_sorted(df: pd.DataFrame) -> None:
+    keys = [df[k].to_numpy() for k in SORT_KEYS]
+    if len(df) < 2:
+        return
+    # lexicographic order: at the first key that changes between consecutive rows, it must go up
+    ok = np.zeros(len(df) - 1, dtype=bool)
+    undecided = np.ones(len(df) - 1, dtype=bool)
+    for k in keys:
+        diff = k[1:] - k[:-1]
+        ok |= undecided & (diff > 0)
+        undecided &= diff == 0
+    if not (ok | undecided).all():
+        raise ValueError(f"panel must be sorted by {SORT_KEYS} before computing form features")
+
+
+def group_position(df: pd.DataFrame, season_reset: bool = False) -> np.ndarray:
+    """0 for the first row of each group, 1 for the next, ... (df sorted by SORT_KEYS)."""
+    n = len(df)
+    start = np.ones(n, dtype=bool)
+    if n:
+        start[1:] = False
+        for key in _group_keys(season_reset):
+            k = df[key].to_numpy()
+            start[1:] |= k[1:] != k[:-1]
+    idx = np.arange(n)
+    return idx - np.maximum.accumulate(np.where(start, idx, 0))
+
+
+def rolling_means(values: np.ndarray, pos: np.ndarray, windows: Sequence[int]) -> Dict[int, np.ndarray]:
+    """
+    Trailing means over `windows` rows for every column of `values` (rows x cols), restarting where
+    pos == 0. Missing values are skipped like rolling(n, min_periods=1).mean(); a window with nothing
+    but missing values gives NaN.
+    """
+    valid = ~np.isnan(values)
+    vals = np.where(valid, values, 0.0)
+    out = {}
+    for n in windows:
+        total = np.zeros_like(vals)
+        count = np.zeros_like(vals)
+        # oldest row first, the order rolling() adds them in
+        for k in range(n - 1, -1, -1):
+            inside = (pos >= k)[:, None]
+            if k:
+                total[k:] += np.where(inside[k:], vals[:-k], 0.0)
+                count[k:] += inside[k:] & valid[:-k]
+            else:
+                total += vals
+                count += valid
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[n] = np.where(count > 0, total / count, np.nan)
+    return out
+
+
+def lag1(values: pd.Series, pos: np.ndarray) -> np.ndarray:
+    """Previous row's value within the group (groupby(...).shift(1))."""
+    dtype = values.dtype if values.dtype.kind == "f" else np.float64
+    src = values.to_numpy(dtype=dtype, na_value=np.nan)
+    out = np.full(len(src), np.nan, dtype=dtype)
+    out[1:] = src[:-1]
+    out[pos == 0] = np.nan
+    return out
+
+
+def add_form_features(df: pd.DataFrame, form_cols: Iterable[str] = FORM_COLS, windows: Sequence[int] = WINDOWS,
+                      season_reset: bool = False, momentum: Dict[str, Tuple[str, int, int]] = MOMENTUM,
+                      lags: Dict[str, str] = LAGS) -> pd.DataFrame:
+    """
+    Add {col}_mean{n} for every form column and window, then the momentum and lag columns (in place;
+    returns `df`). `df` must already be sorted by element, season, gw.
+    """
+    _check_sorted(df)
+    form_cols = list(form_cols)
+    pos = group_position(df, season_reset)
+    values = df[form_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    means = rolling_means(values, pos, windows)
+    for n in windows:
+        for j, col in enumerate(form_cols):
+            df[f"{col}_mean{n}"] = means[n][:, j]
+    for name, (col, short, long) in momentum.items():
+        df[name] = df[f"{col}_mean{short}"] - df[f"{col}_mean{long}"]
+    for name, col in lags.items():
+        df[name] = lag1(df[col], pos)
+    return df
@@ -0,0 +1,60 @@
+"""
+Content hashes of files and folders, remembered with each file's size and mtime.
+
+Shared by pipeline.py (stage keys), fplpredict.py (prediction cache), matrix_cache.py and
+external_training.py (panel versions): a file whose size and mtime are unchanged is not read again.
+Standard library only, so fplpredict.py / pipeline.py still start without pandas.
+
+Usage:
+  hashes = Hashes(saved.get("files"))   # the "used" of an earlier run, or None
+  key = hashes.path(folder)             # then save hashes.used for the next run
+"""
+
+import hashlib
+import os
+import threading
+from typing import Dict, Optional
+
+
+class Hashes:
+    """Content hashes of files / folders, cached by (size, mtime) so unchanged files are not read again."""
+
+    def __init__(self, known: Optional[dict] = None):
+        self.known = known or {}
+        self.used: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def file(self, path: str, st: os.stat_result) -> str:
+        stamp = [st.st_size, st.st_mtime_ns]
+        with self._lock:
+            hit = self.known.get(path)
+        if hit is not None and hit[:2] == stamp:
+            digest = hit[2]
+        else:
+            h = hashlib.sha256()
+            with open(path, "rb") as fh:
+                for block in iter(lambda: fh.read(1 << 20), b""):
+                    h.update(block)
+            digest = h.hexdigest()
+        with self._lock:
+            self.known[path] = self.used[path] = stamp + [digest]
+        return digest
+
+    def path(self, path: str) -> str:
+        """Hash of a file, or of a folder's (relative path, hash) pairs; "missing" if it does not exist."""
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return "missing"
+        if not os.path.isdir(path):
+            return self.file(path, st)
+        h = hashlib.sha256()
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.endswith(".tmp"):
+                    continue  # a write in progress
+                full = os.path.join(dirpath, name)
+                h.update(f"{os.path.relpath(full, path)}\0{self.file(full, os.stat(full))}\n".encode())
+        return h.hexdigest()
@@ -0,0 +1,208 @@
+"""
+Concurrent, rate-limited fetcher for the FPL element-summary endpoint.
+
+data_loader.py needs one `element-summary/{id}/` call per player (~700 of them). Done one by one the
+refresh mostly waits on the network, so this module fans the calls out over a bounded thread pool that
+shares one pooled requests.Session.
+
+- `workers` caps how many requests are in flight at once
+- a token bucket (`rate` req/s, `burst` tokens) keeps us polite towards the FPL servers
+- transient failures (timeouts, connection errors, 429/5xx) are retried with exponential backoff
+- every player gets a total time `budget` across all of its attempts; `timeout` bounds a single attempt
+- players that still fail are returned in `FetchResult.failed` together with the reason, instead of being
+  silently dropped
+- with an api_cache.ResponseCache, fresh entries are served from disk and stale ones are revalidated
+  (304 Not Modified keeps the cached body)
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from api_cache import ResponseCache
+
+API = "https://fantasy.premierleague.com/api"
+
+# Status codes worth another attempt; everything else (404, 403, ...) fails straight away
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `burst` tokens."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: Optional[float] = None) -> bool:
+        """Block until a token is available. Returns False if `deadline` (monotonic) passes first."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return True
+                wait = (1.0 - self._tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+@dataclass
+class FetchConfig:
+    workers: int = 8          # max concurrent requests
+    rate: float = 20.0        # requests per second (token bucket refill)
+    burst: int = 10           # token bucket size
+    retries: int = 3          # extra attempts after the first one
+    backoff: float = 0.5      # base delay for exponential backoff (seconds)
+    timeout: float = 15.0     # per-attempt timeout (seconds)
+    budget: float = 60.0      # total time allowed per player, retries included (seconds)
+
+
+@dataclass
+class FetchResult:
+    ok: Dict[int, dict] = field(default_factory=dict)       # element -> parsed JSON
+    failed: Dict[int, str] = field(default_factory=dict)    # element -> reason of the last failure
+    requests: int = 0                                        # HTTP attempts made, retries included
+    not_modified: int = 0                                    # answered 304 by the server
+    elapsed: float = 0.0                                     # wall time (seconds)
+
+
+def make_session(pool_size: int = 16) -> requests.Session:
+    """A requests.Session whose connection pool is large enough for `pool_size` concurrent workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class FetchError(Exception):
+    pass
+
+
+def _backoff_delay(config: FetchConfig, attempt: int, retry_after: Optional[str] = None) -> float:
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    # Full jitter keeps workers that failed together from retrying in lockstep
+    return random.uniform(0, config.backoff * (2 ** attempt))
+
+
+# Called after every HTTP attempt with (url, status code or None, latency in seconds)
+RequestHook = Callable[[str, Optional[int], float], None]
+
+
+def fetch_json(session: requests.Session, url: str, bucket: Optional[TokenBucket], config: FetchConfig,
+               on_request: Optional[RequestHook] = None, cache: Optional[ResponseCache] = None) -> dict:
+    """
+    GET `url` and return the parsed JSON, retrying transient failures within `config.budget`.
+    Raises FetchError with a short reason when the player cannot be fetched.
+    """
+    entry = cache.load(url) if cache is not None else None
+    if entry is not None and cache.is_fresh(url, entry):
+        return entry["body"]
+    headers = ResponseCache.validators(entry)
+
+    deadline = time.monotonic() + config.budget
+    reason = "budget exhausted"
+
+    for attempt in range(config.retries + 1):
+        if bucket is not None and not bucket.acquire(deadline):
+            break
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+
+        retry_after = None
+        resp = None
+        t0 = time.perf_counter()
+        try:
+            resp = session.get(url, timeout=min(config.timeout, remaining), headers=headers)
+        except requests.exceptions.Timeout:
+            reason = "timeout"
+        except requests.exceptions.ConnectionError as e:
+            reason = f"connection error: {e.__class__.__name__}"
+        except requests.exceptions.RequestException as e:
+            raise FetchError(f"request error: {e}")
+        finally:
+            if on_request is not None:
+                on_request(url, resp.status_code if resp is not None else None, time.perf_counter() - t0)
+
+        if resp is not None:
+            if resp.status_code == 304 and entry is not None:
+                cache.revalidated(url, entry, resp.headers)
+                return entry["body"]
+            if resp.status_code == 200:
+                try:
+                    body = resp.json()
+                except ValueError:
+                    raise FetchError("invalid JSON")
+                if cache is not None:
+                    cache.store(url, body, resp.headers)
+                return body
+            reason = f"HTTP {resp.status_code}"
+            if resp.status_code not in RETRY_STATUS:
+                raise FetchError(reason)
+            retry_after = resp.headers.get("Retry-After")
+
+        if attempt == config.retries:
+            break
+        delay = _backoff_delay(config, attempt, retry_after)
+        if time.monotonic() + delay >= deadline:
+            reason = f"{reason} (budget exhausted)"
+            break
+        time.sleep(delay)
+
+    raise FetchError(reason)
+
+
+def fetch_element_summaries(pids: Iterable[int], api: str = API, config: Optional[FetchConfig] = None,
+                            session: Optional[requests.Session] = None,
+                            on_request: Optional[RequestHook] = None,
+                            cache: Optional[ResponseCache] = None) -> FetchResult:
+    """Fetch `element-summary/{pid}/` for every player id, concurrently. Failures end up in `.failed`."""
+    config = config or FetchConfig()
+    session = session or make_session(config.workers)
+    bucket = TokenBucket(config.rate, config.burst) if config.rate else None
+    result = FetchResult()
+    lock = threading.Lock()
+
+    def _count(url: str, status: Optional[int], seconds: float) -> None:
+        with lock:
+            result.requests += 1
+            result.not_modified += status == 304
+        if on_request is not None:
+            on_request(url, status, seconds)
+
+    def _one(pid: int) -> None:
+        url = f"{api}/element-summary/{int(pid)}/"
+        try:
+            data = fetch_json(session, url, bucket, config, _count, cache)
+        except FetchError as e:
+            with lock:
+                result.failed[int(pid)] = str(e)
+        else:
+            with lock:
+                result.ok[int(pid)] = data
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, config.workers)) as pool:
+        list(pool.map(_one, pids))
+    result.elapsed = time.perf_counter() - start
+    return result
@@ -0,0 +1,234 @@
+"""
+Command line entry point for this week's predictions, squad and backtests, without running model.py.
+
+Nothing heavy is imported at start-up: pandas / pyarrow / xgboost (~2.5s of imports together) are
+only imported inside the subcommand that needs them, and not at all when the answer is cached.
+
+predict serves the GW's rows from the feature store and the saved model(s) that model.py /
+pipeline.py keep up to date (no training, no feature computation) and caches the result under
+<store>/_predictions, keyed by the content hash of the model files, the season's feature / team
+strength partitions, model.py and the GW. A warm predict only stats those files (their hashes are
+remembered with size and mtime, file_hashes.py) and prints the cached CSV with the csv module:
+well under a second. --refresh first brings the feature store and team tables up to date.
+
+Usage:
+  python fplpredict.py predict --gw 7 --top 20
+  python fplpredict.py predict --gw 7 --out curr_gw_predictions.csv
+  python fplpredict.py pick --gw 7 --out curr_gw_team.csv
+  python fplpredict.py explain --gw 7 --player Haaland --interactions 5
+  python fplpredict.py serve --gw 7 --port 8765    # what-if squad edits over HTTP (selection_service.py)
+  python fplpredict.py backtest --season 2526 --workers 4     # model_evaluation.py's options
+"""
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from file_hashes import Hashes
+from pipeline import ENGINEERED, ROOT, STORE_DIR, TEAM_TABLES
+
+SEASON = 2526  # model.curr_season; not imported from there, model.py imports xgboost
+CACHE = "_predictions"
+SHOW = ["full_name", "position", "team_name_current", "price_now", "predicted_points_next"]
+
+
+#----------
+#prediction cache
+def _cache_paths(store: str, season: int, gw: int):
+    root = Path(store) / CACHE
+    return root / f"{season}_gw{gw}.csv", root / f"{season}_gw{gw}.json"
+
+
+def _fingerprint(store: str, models: str, season: int, gw: int, hashes: Hashes) -> dict:
+    inputs = [models, os.path.join(store, ENGINEERED, f"season={season}"), str(ROOT / "model.py")]
+    inputs += [os.path.join(store, d, f"season={season}") for d in TEAM_TABLES]
+    return {"season": season, "gw": gw, "inputs": {p: hashes.path(p) for p in inputs}}
+
+
+def _cached(store: str, models: str, season: int, gw: int):
+    """(csv path or None if stale / missing, fingerprint to store with a fresh result, hashes)."""
+    csv_path, meta_path = _cache_paths(store, season, gw)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as fh:
+            saved = json.load(fh)
+    except (OSError, ValueError):
+        saved = {}
+    hashes = Hashes(saved.get("files"))
+    key = _fingerprint(store, models, season, gw, hashes)
+    hit = csv_path if saved.get("key") == key and csv_path.exists() else None
+    return hit, key, hashes
+
+
+def _save_cache(store: str, season: int, gw: int, preds, key: dict, hashes: Hashes) -> Path:
+    csv_path, meta_path = _cache_paths(store, season, gw)
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = csv_path.with_suffix(".csv.tmp")
+    preds.to_csv(tmp, index=False)
+    os.replace(tmp, csv_path)
+    tmp = meta_path.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({"key": key, "files": hashes.used, "saved_at": time.time()}, fh, indent=1)
+    os.replace(tmp, meta_path)
+    return csv_path
+
+
+#----------
+#cold path (heavy imports)
+def _gw_rows(store: str, models: str, season: int, gw: int):
+    """(the GW's rows from the feature store with their predictions, saved model, X_test)."""
+    import model
+    from panel_store import read_panel
+    from team_strength import TeamStrength, add_team_features
+
+    test_df = read_panel(store, model.panels_engineered, seasons=[season], gw_min=gw, gw_max=gw)
+    if test_df.empty:
+        raise SystemExit(f"[FAIL] no GW{gw} rows for {season} in the feature store; run model.py / pipeline.py "
+                         f"(or predict --refresh)")
+    test_df = test_df.drop(columns=["was_home"]).sort_values(["element", "season", "gw"]).reset_index(drop=True)
+    if model.team_features:
+        test_df = add_team_features(test_df, *TeamStrength(store).load())
+    fitted = model.load_model(models)
+    X_test = model.test_matrix(test_df, fitted)
+    return model.predict(fitted, test_df, X_test), fitted, X_test
+
+
+def _predict_gw(store: str, models: str, season: int, gw: int):
+    """The GW's rows scored by the saved model; what model.py's predict step writes."""
+    preds = _gw_rows(store, models, season, gw)[0]
+    return preds.sort_values("predicted_points_next", ascending=False)
+
+
+def _refresh(store: str) -> None:
+    import model
+    model.engineer(model.load_data(store), store)
+
+
+def predictions(store: str, models: str, season: int, gw: int, refresh: bool = False) -> Path:
+    """CSV of the GW's predictions, from the cache when nothing it depends on changed."""
+    if refresh:
+        _refresh(store)
+    hit, key, hashes = _cached(store, models, season, gw)
+    if hit is not None:
+        return hit
+    return _save_cache(store, season, gw, _predict_gw(store, models, season, gw), key, hashes)
+
+
+def _show(path: Path, top: int) -> None:
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        rows = list(csv.DictReader(fh))
+    cols = [c for c in SHOW if rows and c in rows[0]]
+    table = [cols] + [[r[c] if c != "predicted_points_next" else f"{float(r[c]):.2f}" for c in cols]
+                      for r in rows[:top]]
+    widths = [max(len(row[i]) for row in table) for i in range(len(cols))]
+    for row in table:
+        print("  ".join(v.ljust(w) if i < 3 else v.rjust(w) for i, (v, w) in enumerate(zip(row, widths))))
+
+
+#----------
+#subcommands
+def cmd_predict(args) -> None:
+    t0 = time.perf_counter()
+    path = predictions(args.store, args.models, args.season, args.gw, args.refresh)
+    _show(path, args.top)
+    if args.out:
+        shutil.copyfile(path, args.out)
+        print(f"[Saved] Predictions -> {args.out}")
+    print(f"[INFO] GW{args.gw} predictions in {time.perf_counter() - t0:.2f}s ({path})")
+
+
+def cmd_pick(args) -> None:
+    path = predictions(args.store, args.models, args.season, args.gw, args.refresh)
+    import pandas as pd
+    import model
+    selection, squad = model.pick(pd.read_csv(path))
+    if squad.empty:
+        raise SystemExit(f"[FAIL] no feasible team ({selection.status})")
+    model.show_squad(selection, squad)
+    if args.out:
+        squad.to_csv(args.out, index=False)
+        print(f"\n[Saved] Squad -> {args.out}")
+
+
+def cmd_explain(args) -> None:
+    if args.refresh:
+        _refresh(args.store)
+    from explanations import explain_gw
+    t0 = time.perf_counter()
+    preds, fitted, X_test = _gw_rows(args.store, args.models, args.season, args.gw)
+    explained, hit = explain_gw(fitted, preds, X_test, args.season, args.gw, args.store, args.interactions,
+                                args.approx)
+    explained = explained.sort_values("predicted_points_next", ascending=False)
+    rows = explained[explained["full_name"].str.contains(args.player, case=False, regex=False)] if args.player \
+        else explained.head(args.top)
+    groups = [c for c in explained.columns if c.startswith("shap_")]
+    for _, r in rows.iterrows():
+        print(f"\n{r['full_name']} ({r['position']}, {r['team_name_current']}): {r['predicted_points_next']:.2f} points")
+        for c in sorted(groups, key=lambda c: -abs(r[c])):
+            print(f"  {c[5:]:<14}{r[c]:>+7.2f}")
+        print(f"  top features: {r['top_features']}")
+        if r.get("top_interaction"):
+            print(f"  top interaction: {r['top_interaction']}")
+    if args.out:
+        explained.to_csv(args.out, index=False)
+        print(f"\n[Saved] Explanations -> {args.out}")
+    print(f"\n[INFO] GW{args.gw} explanations ({'cached' if hit else 'computed'}) in {time.perf_counter() - t0:.2f}s")
+
+
+def cmd_serve(args) -> None:
+    path = predictions(args.store, args.models, args.season, args.gw, args.refresh)
+    from selection_service import SelectionService, serve
+    serve(SelectionService.from_csv(str(path)), args.host, args.port, quiet=not args.verbose)
+
+
+def cmd_backtest(argv: List[str]) -> None:
+    import model_evaluation
+    model_evaluation.main(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(prog="fplpredict", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True)
+    for name, fn, text in [("predict", cmd_predict, "predicted points of a GW's players"),
+                           ("pick", cmd_pick, "best squad / XI / captain from a GW's predictions"),
+                           ("explain", cmd_explain, "why: TreeSHAP points per feature group (explanations.py)"),
+                           ("serve", cmd_serve, "what-if squad re-selection over HTTP (selection_service.py)")]:
+        p = sub.add_parser(name, help=text)
+        p.add_argument("--gw", type=int, required=True)
+        p.add_argument("--season", type=int, default=SEASON)
+        p.add_argument("--store", default=STORE_DIR)
+        p.add_argument("--models", default=None, help="model directory (default: <store>/models, as model.py)")
+        p.add_argument("--refresh", action="store_true", help="update the feature store / team tables first")
+        if name != "serve":
+            p.add_argument("--out", default=None, help="also write the CSV here")
+        if name in ("predict", "explain"):
+            p.add_argument("--top", type=int, default=20 if name == "predict" else 5)
+        if name == "explain":
+            p.add_argument("--player", default=None, help="players whose name contains this (default: the --top best)")
+            p.add_argument("--interactions", type=int, default=0, metavar="N",
+                           help="strongest feature group pair of the N best predicted players (~1s each)")
+            p.add_argument("--approx", action="store_true", help="approximate (Saabas) contributions, ~100x faster")
+        if name == "serve":
+            p.add_argument("--host", default="127.0.0.1")
+            p.add_argument("--port", type=int, default=8765)
+            p.add_argument("--verbose", action="store_true", help="log every request")
+        p.set_defaults(fn=fn)
+    sub.add_parser("backtest", help="walk-forward backtest (model_evaluation.py; its options follow)", add_help=False)
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["backtest"]:  # everything after it is model_evaluation.py's
+        return cmd_backtest(argv[1:])
+    args = ap.parse_args(argv)
+    if getattr(args, "models", "") is None:
+        args.models = os.path.join(args.store, "models")
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Stage-level instrumentation for the pipeline scripts: one structured JSON report per run.
+
+    run = Run.from_env("model")
+    with run.stage("load") as st:
+        df = read_panel(...)
+        st.rows_out = len(df)
+    with run.stage("fetch"):
+        fetch_element_summaries(pids, on_request=run.on_request)
+    run.finish()
+
+Per stage: wall time, CPU time (all threads of the process), RSS at start / end and the peak RSS
+reached during the stage, rows in / out (set by the caller), and the HTTP requests made while it was
+open (count, status codes, failures, latency mean / p50 / p95 / max) via fpl_fetch's on_request hook.
+Stages can nest; a nested stage is reported as "outer/inner".
+
+Peak RSS per stage needs Linux (/proc: VmHWM, reset at every stage boundary). Elsewhere it falls
+back to psutil if installed, else to resource's process-wide high-water mark ("peak_scope": "process").
+
+Reports are only written when a report directory is given: FPL_REPORT=dir in the environment (or
+--report on data_loader.py). FPL_PROFILE=cprofile and/or tracemalloc (comma separated) also dumps a
+cProfile .prof (main thread) and the top tracemalloc allocation sites per stage next to the report;
+both slow the stages down, so their timings are not comparable with unprofiled runs.
+"""
+
+import cProfile
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+REPORT_ENV = "FPL_REPORT"
+PROFILE_ENV = "FPL_PROFILE"
+PROFILERS = ("cprofile", "tracemalloc")
+
+
+#----------
+#memory probes
+def _proc_status(key: str) -> Optional[float]:
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith(key):
+                    return int(line.split()[1]) / 1024  # kB -> MB
+    except OSError:
+        return None
+    return None
+
+
+def _reset_peak() -> bool:
+    """Reset the kernel's RSS high-water mark (Linux >= 4.0); False where that is not possible."""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def rss_mb() -> Optional[float]:
+    rss = _proc_status("VmRSS:")
+    if rss is not None:
+        return rss
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1e6
+    except ImportError:
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    peak = _proc_status("VmHWM:")
+    if peak is not None:
+        return peak
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 1e6
+    except ImportError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB on Linux
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@dataclass
+class Stage:
+    name: str
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    rss_start_mb: Optional[float] = None
+    rss_end_mb: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+    peak_scope: str = "stage"
+    http: Dict[str, object] = field(default_factory=dict)
+    info: Dict[str, object] = field(default_factory=dict)  # anything else worth keeping (e.g. cache hits)
+    files: List[str] = field(default_factory=list)        # profiler dumps
+    error: Optional[str] = None
+
+
+class Run:
+    def __init__(self, name: str, report_dir: Optional[str] = None, profile: Iterable[str] = ()):
+        self.name = name
+        self.report_dir = report_dir
+        self.profile = {p for p in profile if p}
+        unknown = self.profile - set(PROFILERS)
+        if unknown:
+            raise ValueError(f"unknown profiler(s) {sorted(unknown)}; use {', '.join(PROFILERS)}")
+        self.stages: List[Stage] = []
+        self.started = datetime.now()
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._open: List[Stage] = []
+        self._latencies: Dict[int, List[float]] = {}
+        self._lock = threading.Lock()
+        self._peak_resettable = _reset_peak()
+
+    @classmethod
+    def from_env(cls, name: str, report_dir: Optional[str] = None, profile: Optional[str] = None) -> "Run":
+        """Report directory / profilers from the arguments, else from FPL_REPORT / FPL_PROFILE."""
+        report_dir = report_dir or os.environ.get(REPORT_ENV) or None
+        profile = profile if profile is not None else os.environ.get(PROFILE_ENV, "")
+        return cls(name, report_dir, [p.strip().lower() for p in profile.split(",")])
+
+    # called from any thread after every HTTP attempt (fpl_fetch.RequestHook)
+    def on_request(self, url: str, status: Optional[int], seconds: float) -> None:
+        with self._lock:
+            for st in self._open:
+                st.http["requests"] = st.http.get("requests", 0) + 1
+                counts = st.http.setdefault("status", {})
+                key = str(status) if status is not None else "failed"
+                counts[key] = counts.get(key, 0) + 1
+                self._latencies.setdefault(id(st), []).append(seconds)
+
+    def _fold_peak(self) -> None:
+        peak = peak_rss_mb()
+        if peak is None:
+            return
+        for st in self._open:
+            st.peak_rss_mb = peak if st.peak_rss_mb is None else max(st.peak_rss_mb, peak)
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None) -> Iterator[Stage]:
+        """Measure the block; set .rows_out (and .info) on the yielded Stage."""
+        path = "/".join([s.name for s in self._open[-1:]] + [name])
+        st = Stage(path, rows_in=rows_in, peak_scope="stage" if self._peak_resettable else "process")
+        self.stages.append(st)
+        self._fold_peak()  # an enclosing stage keeps what it reached before the reset
+        self._open.append(st)
+        if self._peak_resettable:
+            _reset_peak()
+        st.rss_start_mb = rss_mb()
+
+        prof = cProfile.Profile() if "cprofile" in self.profile else None
+        traced = "tracemalloc" in self.profile
+        if traced and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        if traced:
+            tracemalloc.reset_peak()
+        t0, cpu0 = time.perf_counter(), time.process_time()
+        if prof is not None:
+            prof.enable()
+        try:
+            yield st
+        except BaseException as e:
+            st.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if prof is not None:
+                prof.disable()
+            st.wall_seconds = time.perf_counter() - t0
+            st.cpu_seconds = time.process_time() - cpu0
+            st.rss_end_mb = rss_mb()
+            self._fold_peak()
+            self._open.pop()
+            if self._peak_resettable and self._open:
+                _reset_peak()
+            with self._lock:
+                lat = self._latencies.pop(id(st), [])
+            if lat:
+                st.http.update(latency_total=sum(lat), latency_mean=sum(lat) / len(lat),
+                               latency_p50=_percentile(lat, 0.5), latency_p95=_percentile(lat, 0.95),
+                               latency_max=max(lat))
+            if prof is not None or traced:
+                self._dump(st, prof, traced)
+
+    def _dump(self, st: Stage, prof: Optional[cProfile.Profile], traced: bool) -> None:
+        out = Path(self.report_dir or ".")
+        out.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.name}-{self.started:%Y%m%d-%H%M%S}-{st.name.replace('/', '.')}"
+        if prof is not None:
+            path = out / f"{stem}.prof"
+            prof.dump_stats(path)
+            st.files.append(str(path))
+        if traced:
+            st.info["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+            top = tracemalloc.take_snapshot().statistics("lineno")[:25]
+            path = out / f"{stem}.tracemalloc.txt"
+            path.write_text("\n".join(str(s) for s in top) + "\n", encoding="utf-8")
+            st.files.append(str(path))
+
+    def report(self) -> dict:
+        return {
+            "run": self.name,
+            "started": self.started.isoformat(timespec="seconds"),
+            "argv": sys.argv,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "profile": sorted(self.profile),
+            "wall_seconds": time.perf_counter() - self._t0,
+            "cpu_seconds": time.process_time() - self._cpu0,
+            "peak_rss_mb": max((s.peak_rss_mb for s in self.stages if s.peak_rss_mb is not None), default=None),
+            "stages": [asdict(s) for s in self.stages],
+        }
+
+    def summary(self) -> str:
+        lines = [f"{'stage':<28}{'wall (s)':>9}{'cpu (s)':>9}{'peak MB':>9}{'rows in':>10}{'rows out':>10}{'http':>6}"]
+        for s in self.stages:
+            peak = "" if s.peak_rss_mb is None else f"{s.peak_rss_mb:.0f}"
+            lines.append(f"{s.name:<28}{s.wall_seconds:>9.2f}{s.cpu_seconds:>9.2f}{peak:>9}"
+                         f"{'' if s.rows_in is None else s.rows_in:>10}{'' if s.rows_out is None else s.rows_out:>10}"
+                         f"{s.http.get('requests', ''):>6}")
+        return "\n".join(lines)
+
+    def finish(self, path: Optional[str] = None) -> Optional[str]:
+        """Write the JSON report (to `path`, else into the report directory); None if there is nowhere to write."""
+        if path is None:
+            if not self.report_dir:
+                return None
+            path = os.path.join(self.report_dir, f"{self.name}-{self.started:%Y%m%d-%H%M%S}.json")
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.report(), fh, indent=1, default=str)
+        print(self.summary())
+        print(f"[Saved] Run report -> {path}")
+        return path
@@ -0,0 +1,264 @@
+"""
+Cache of the final training matrix: float32 features, labels, column list and row metadata on disk,
+opened memory-mapped, so model.py, model_evaluation.py and model_tuning.py stop rebuilding it
+(get_dummies, column alignment and fillna each copy the whole frame).
+
+One entry is the whole engineered panel (+ team strength columns) in walk-forward layout
+(feature_matrix): rows with a target first, then the rest, each sorted by (season, gw, element,
+fixture). A training set "everything before (season, gw)" is then a prefix X[:n] and a test GW one block
+of rows, both zero-copy slices of the memmap.
+
+Entries are keyed by
+  - the panel version: content hashes of the engineered dataset and the team strength tables
+    (remembered with each file's size and mtime, so an unchanged store is only stat'ed), and
+  - the feature configuration: the feature store's recorded config (form_cols, windows, season_reset,
+    columns), drop_cols and whether team features are joined.
+A changed panel or config is a new key. Writing an entry removes the entries with the same config and
+an older panel version, and beyond MAX_ENTRIES the least recently used ones.
+
+Layout (under the panel store):
+    matrices/<config hash>-<panel hash>/X.npy         <- float32 (rows, features)
+    matrices/<config hash>-<panel hash>/y.npy         <- float64 labels (NaN: no next GW)
+    matrices/<config hash>-<panel hash>/meta.parquet  <- META_COLS per row
+    matrices/<config hash>-<panel hash>/entry.json    <- features, panel columns, config (mtime = last use)
+    matrices/_hashes.json                             <- file hashes by (size, mtime)
+
+Usage:
+  python matrix_cache.py list
+  python matrix_cache.py clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from file_hashes import Hashes
+from panel_store import STORE_DIR, read_panel
+from team_strength import STRENGTH, TEAM_FIXTURES, TeamStrength, add_team_features
+
+PANELS_ENGINEERED = "all_panels_engineered"
+MATRICES = "matrices"
+MAX_ENTRIES = 4
+TARGET = "total_points_next"
+# model.py's drop_cols (+ was_home, which model.py drops before): identifiers, names and the target
+DROP_COLS = ["total_points_next", "total_points", "full_name", "team_name_current", "team_name_gw",
+             "opponent_team_name", "season", "fixture", "element", "gw", "team_id_current", "team_id_gw",
+             "opponent_team", "position", "was_home"]
+META_COLS = ["full_name", "position", "team_name_current", "price_now", "season", "gw", "element", "fixture", TARGET]
+ORDER = ["_no_target", "season", "gw", "element", "fixture"]
+
+
+def feature_matrix(df: pd.DataFrame, drop_cols: List[str] = DROP_COLS) -> Tuple[np.ndarray, np.ndarray, pd.DataFrame,
+                                                                                 List[str]]:
+    """
+    (X float32, y, meta, features) with the rows laid out for walk-forward slicing: first every row
+    with a target, sorted by (season, gw), then the rows without one (players with no next GW row),
+    also sorted. Training rows for a fold are then X[:n]; its test rows are one block of each part.
+    """
+    df = df.assign(position_copy=df["position"], _no_target=df[TARGET].isna())
+    df = df.sort_values([c for c in ORDER if c in df.columns], kind="mergesort").reset_index(drop=True)
+    model_df = pd.get_dummies(df, columns=["position_copy"], drop_first=True)
+    features = [c for c in model_df.columns if c not in drop_cols + ["_no_target"]]
+    X = np.ascontiguousarray(model_df[features].fillna(0).to_numpy(dtype=np.float32))
+    y = df[TARGET].to_numpy(dtype=np.float64)
+    return X, y, df[[c for c in META_COLS if c in df.columns] + ["_no_target"]], features
+
+
+def fold_blocks(meta: pd.DataFrame, season: int, gw: int) -> Tuple[int, List[Tuple[int, int]]]:
+    """(training prefix length, test row ranges) of the fold testing (season, gw), in feature_matrix's layout."""
+    key = meta["season"].to_numpy(dtype=np.int64) * 100 + meta["gw"].to_numpy(dtype=np.int64)
+    part = meta["_no_target"].to_numpy()
+    ok = np.flatnonzero(~part)
+    n_train = int(np.searchsorted(key[ok], season * 100 + gw))  # rows before (season, gw)
+    blocks = []
+    for rows in (ok, np.flatnonzero(part)):
+        lo, hi = np.searchsorted(key[rows], [season * 100 + gw, season * 100 + gw + 1])
+        if hi > lo:
+            blocks.append((int(rows[lo]), int(rows[hi - 1]) + 1))
+    return n_train, blocks
+
+
+@dataclass
+class Matrix:
+    X: np.ndarray        # read-only memmap
+    y: np.ndarray        # read-only memmap
+    meta: pd.DataFrame
+    features: List[str]
+    path: Path
+    columns: List[str]   # the panel's column order (fplpredict.py predict writes its rows in it)
+
+    @property
+    def x_path(self) -> str:
+        return str(self.path / "X.npy")
+
+    @property
+    def y_path(self) -> str:
+        return str(self.path / "y.npy")
+
+    def frame(self, rows) -> Tuple[pd.DataFrame, pd.Series]:
+        """(X, y) of a row slice (zero-copy) or index array (a copy) as a DataFrame / Series with the feature names."""
+        return (pd.DataFrame(self.X[rows], columns=self.features, copy=False),
+                pd.Series(self.y[rows], name=TARGET, copy=False))
+
+    def rows_of(self, df: pd.DataFrame, rows) -> np.ndarray:
+        """Positions in `df` of the matrix rows `rows` (matched on season, gw, element, fixture)."""
+        keys = [c for c in ORDER[1:] if c in df.columns and c in self.meta.columns]
+        at = pd.MultiIndex.from_arrays([df[k].to_numpy() for k in keys])
+        want = self.meta.iloc[rows]
+        pos = at.get_indexer(pd.MultiIndex.from_arrays([want[k].to_numpy() for k in keys]))
+        if (pos < 0).any():
+            raise ValueError("the panel does not have every row of the cached matrix; is it the same panel version?")
+        return pos
+
+
+def load_panel(store: str = STORE_DIR, dataset: str = PANELS_ENGINEERED, team_features: bool = True) -> pd.DataFrame:
+    """Every season of the engineered panel, with the team strength columns model.py joins (tables as saved)."""
+    df = read_panel(store, dataset)
+    if team_features:
+        df = add_team_features(df, *TeamStrength(store).load())
+    df["season"] = df["season"].astype(int)
+    df["gw"] = df["gw"].astype(int)
+    return df
+
+
+def _hash(obj) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class MatrixCache:
+    def __init__(self, store: str = STORE_DIR, dataset: str = PANELS_ENGINEERED, max_entries: int = MAX_ENTRIES):
+        self.store = store
+        self.dataset = dataset
+        self.root = Path(store) / MATRICES
+        self.max_entries = max_entries
+
+    # ---------- keys ----------
+    def config(self, team_features: bool = True, drop_cols: List[str] = DROP_COLS) -> dict:
+        try:
+            with open(Path(self.store) / self.dataset / "_state.json", "r", encoding="utf-8") as fh:
+                features = json.load(fh)  # what the feature store was built with (feature_store.py)
+        except (OSError, ValueError):
+            features = None
+        return {"dataset": self.dataset, "features": features, "drop_cols": sorted(drop_cols),
+                "team_features": bool(team_features), "layout": ORDER, "entry": 2}  # 2: with the panel's columns
+
+    def _version(self) -> str:
+        """Content hash of the panel the matrix is built from (engineered dataset + team tables)."""
+        path = self.root / "_hashes.json"
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                known = json.load(fh)
+        except (OSError, ValueError):
+            known = {}
+        hashes = Hashes(known)
+        version = _hash([hashes.path(str(Path(self.store) / d)) for d in (self.dataset, STRENGTH, TEAM_FIXTURES)])
+        if hashes.used != known:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".json.tmp")
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(hashes.used, fh)
+            os.replace(tmp, path)
+        return version
+
+    def key(self, config: dict) -> str:
+        return f"{_hash(config)[:16]}-{self._version()[:16]}"
+
+    # ---------- entries ----------
+    def get(self, key: str) -> Optional[Matrix]:
+        path = self.root / key
+        try:
+            with open(path / "entry.json", "r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+            X = np.load(path / "X.npy", mmap_mode="r")
+            y = np.load(path / "y.npy", mmap_mode="r")
+            meta = pd.read_parquet(path / "meta.parquet")
+        except (OSError, ValueError):
+            return None
+        os.utime(path / "entry.json")  # last use, for eviction
+        return Matrix(X, y, meta, entry["features"], path, entry["columns"])
+
+    def put(self, key: str, df: pd.DataFrame, config: dict) -> Matrix:
+        X, y, meta, features = feature_matrix(df, config["drop_cols"])
+        tmp = self.root / f"{key}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "X.npy", X)
+        np.save(tmp / "y.npy", y)
+        meta.to_parquet(tmp / "meta.parquet", index=False)
+        with open(tmp / "entry.json", "w", encoding="utf-8") as fh:
+            json.dump({"features": features, "columns": list(df.columns), "config": config, "rows": int(X.shape[0]),
+                       "created": time.time()}, fh)
+        try:
+            os.replace(tmp, self.root / key)
+        except OSError:  # another process wrote the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+        del X
+        self.evict(keep=key)
+        return self.get(key)
+
+    def matrix(self, team_features: bool = True, drop_cols: List[str] = DROP_COLS,
+               load: Optional[Callable[[], pd.DataFrame]] = None) -> Tuple[Matrix, bool]:
+        """
+        (matrix, cache hit) of the panel as it is in the store now. The panel (`load`, default
+        load_panel) is only read to build a missing entry. Bring the feature store / team tables up to
+        date first (model.engineer, TeamStrength.update): the key is what is on disk.
+        """
+        config = self.config(team_features, drop_cols)
+        key = self.key(config)
+        hit = self.get(key)
+        if hit is not None:
+            return hit, True
+        df = load() if load is not None else load_panel(self.store, self.dataset, team_features)
+        return self.put(key, df, config), False
+
+    def entries(self) -> List[Path]:
+        """Complete entries, most recently used first."""
+        found = [p for p in self.root.glob("*") if (p / "entry.json").exists() and ".tmp-" not in p.name]
+        return sorted(found, key=lambda p: (p / "entry.json").stat().st_mtime, reverse=True)
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """Drop entries of an older panel version of `keep`'s config, then the least recently used ones."""
+        removed = []
+        entries = self.entries()
+        if keep is not None:
+            prefix = keep.split("-")[0]
+            stale = [p for p in entries if p.name != keep and p.name.split("-")[0] == prefix]
+            entries = [p for p in entries if p not in stale]
+        else:
+            stale = []
+        for p in stale + entries[self.max_entries:]:
+            shutil.rmtree(p, ignore_errors=True)  # a file still mapped elsewhere (Windows) stays until next time
+            removed.append(p.name)
+        return removed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("command", choices=["list", "clear"])
+    ap.add_argument("--store", default=STORE_DIR)
+    args = ap.parse_args()
+
+    cache = MatrixCache(args.store)
+    if args.command == "clear":
+        shutil.rmtree(cache.root, ignore_errors=True)
+        print(f"[OK] removed {cache.root}")
+        return
+    for p in cache.entries():
+        with open(p / "entry.json", "r", encoding="utf-8") as fh:
+            entry = json.load(fh)
+        size = sum(f.stat().st_size for f in p.iterdir()) / 1e6
+        used = time.strftime("%Y-%m-%d %H:%M", time.localtime((p / "entry.json").stat().st_mtime))
+        print(f"{p.name}  {entry['rows']:>8} rows x {len(entry['features']):>3} features  {size:7.1f} MB  used {used}")
+
+
+if __name__ == "__main__":
+    main()
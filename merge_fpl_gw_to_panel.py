@@ -6,6 +6,7 @@ Merge per-player, per-GW CSV files (stored in player subfolders) into one panel
 Usage (examples):
   python merge_fpl_gw_to_panel.py --root "C:/path/to/players_root" --output "C:/path/to/players_2526_panel.csv"
   python merge_fpl_gw_to_panel.py --root "/Users/you/fpl/players" --output "/Users/you/fpl/players_2526_panel.csv" --demo "/path/to/players_2526_panel_demo.csv"
+  python merge_fpl_gw_to_panel.py --root "/Users/you/fpl/players" --output "/Users/you/fpl/panel.csv" --demo "/path/to/demo.csv" --stream
 
 Assumptions (robust to variations):
 - Your folder layout looks like:
@@ -34,53 +35,102 @@ Used for processing seasonal data from previous seasons. (before 25/26)
 
 
 import argparse
+import math
+import os
 import re
+import pickle
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Callable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 
-def _safe_read_csv(path: Path) -> pd.DataFrame:
+def _safe_read_csv(path: Path, engine: str = "c") -> pd.DataFrame:
     """Read a CSV robustly with fallback encodings and common quirks handled."""
+    kwargs = {"engine": "pyarrow"} if engine == "pyarrow" else {"low_memory": False}
     try:
-        df = pd.read_csv(path, low_memory=False)
+        df = pd.read_csv(path, **kwargs)
         return df
     except UnicodeDecodeError:
         # Fallback to latin-1 if UTF-8 fails
-        return pd.read_csv(path, encoding="latin-1", low_memory=False)
-
-
-def _standardize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Lowercase and snake_case-ish columns; strip whitespace."""
-    new_cols = (
-        df.columns.str.strip()
-                  .str.replace(r"\s+", "_", regex=True)
-                  .str.replace(r"[^\w]+", "_", regex=True)
-                  .str.lower()
+        return pd.read_csv(path, encoding="latin-1", **kwargs)
+    except ValueError:
+        # pyarrow reports bad UTF-8 as ArrowInvalid (a ValueError) rather than UnicodeDecodeError
+        if engine != "pyarrow":
+            raise
+        return pd.read_csv(path, encoding="latin-1", **kwargs)
+
+
+# Common renames to agree on a target schema:
+_RENAMES = {
+    "round": "gw",
+    "event": "gw",
+    "gameweek": "gw",
+    "player_id": "element",
+    "id": "element",  # Sometimes the player id is just "id"; prefer "element"
+    "name": "full_name",
+    "web_name": "full_name",
+    "secondname": "second_name",
+    "firstname": "first_name",
+    "surname": "second_name",
+    "last_name": "second_name",
+}
+
+
+@lru_cache(maxsize=4096)
+def _standard_header(cols: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    Final column names for a raw CSV header. Files of one export share their header, so the regex
+    work and the rename chain run once per distinct header instead of once per file.
+    """
+    new_cols = list(
+        pd.Index(cols).str.strip()
+                      .str.replace(r"\s+", "_", regex=True)
+                      .str.replace(r"[^\w]+", "_", regex=True)
+                      .str.lower()
     )
-    df = df.copy()
-    df.columns = new_cols
-    # Common renames to agree on a target schema:
-    renames = {
-        "round": "gw",
-        "event": "gw",
-        "gameweek": "gw",
-        "player_id": "element",
-        "id": "element",  # Sometimes the player id is just "id"; prefer "element"
-        "name": "full_name",
-        "web_name": "full_name",
-        "secondname": "second_name",
-        "firstname": "first_name",
-        "surname": "second_name",
-        "last_name": "second_name",
-    }
-    for k, v in renames.items():
-        if k in df.columns and v not in df.columns:
-            df.rename(columns={k: v}, inplace=True)
+    # Applied one after the other, as the first match blocks later renames onto the same name
+    for k, v in _RENAMES.items():
+        if k in new_cols and v not in new_cols:
+            new_cols = [v if c == k else c for c in new_cols]
+    return tuple(new_cols)
+
+
+def _standardize_columns(df: pd.DataFrame, copy: bool = True) -> pd.DataFrame:
+    """Lowercase and snake_case-ish columns; strip whitespace. copy=False renames `df` in place."""
+    new_cols = _standard_header(tuple(df.columns))
+    if copy:
+        df = df.copy()
+    df.columns = list(new_cols)
     return df
 
 
+_SNIFF_STOP = {"gw", "gameweek", "round", "event", "csv"}
+
+
+@lru_cache(maxsize=None)
+def _sniff_part(s: str) -> Tuple[Optional[int], Optional[str]]:
+    """(numeric id, alpha name chunk) found in one folder/file name. Cached, so a player folder is parsed once."""
+    element = None
+    m = re.search(r"(?<!\d)(\d{1,9})(?!\d)", s)
+    if m:
+        try:
+            element = int(m.group(1))
+        except ValueError:
+            pass
+
+    # Build a name from alpha parts, skipping generic tokens
+    parts = re.split(r"[_\-\s]+", s)
+    parts = [p for p in parts if p.isalpha() and len(p) > 1 and p.lower() not in _SNIFF_STOP]
+    return element, (" ".join(parts) if parts else None)
+
+
 def _sniff_element_and_name_from_path(path: Path) -> Tuple[Optional[int], Optional[str]]:
     """
     Try to extract {element, full_name} from folder or file names.
@@ -92,37 +142,22 @@ def _sniff_element_and_name_from_path(path: Path) -> Tuple[Optional[int], Option
         candidates.append(path.parent.name)
     candidates.append(path.stem)
 
-    # Try to find a numeric id in any candidate
-    element = None
-    for s in candidates:
-        m = re.search(r"(?<!\d)(\d{1,9})(?!\d)", s)
-        if m:
-            try:
-                element = int(m.group(1))
-                break
-            except ValueError:
-                pass
-
-    # Build a name from alpha parts, skipping generic tokens
-    stop = {"gw", "gameweek", "round", "event", "csv"}
-    name = None
-    for s in candidates:
-        parts = re.split(r"[_\-\s]+", s)
-        parts = [p for p in parts if p.isalpha() and len(p) > 1 and p.lower() not in stop]
-        if parts:
-            name = " ".join(parts)
-            break
-
+    sniffed = [_sniff_part(s) for s in candidates]
+    # First candidate with a numeric id wins, likewise for the name
+    element = next((e for e, _ in sniffed if e is not None), None)
+    name = next((n for _, n in sniffed if n), None)
     return element, name
 
 
-def _ensure_element_and_gw(df: pd.DataFrame, path: Path) -> pd.DataFrame:
+def _ensure_element_and_gw(df: pd.DataFrame, path: Path, copy: bool = True,
+                           sniffed: Optional[Tuple[Optional[int], Optional[str]]] = None) -> pd.DataFrame:
     """Make sure 'element' and 'gw' columns exist; infer from path/filename if missing."""
-    df = df.copy()
+    if copy:
+        df = df.copy()
 
     # Element (player id)
     if "element" not in df.columns:
-        element_from_path, name_from_path = _sniff_element_and_name_from_path(path)
+        element_from_path, name_from_path = sniffed or _sniff_element_and_name_from_path(path)
         if element_from_path is not None:
             df["element"] = element_from_path
 
@@ -147,11 +182,12 @@ def _ensure_element_and_gw(df: pd.DataFrame, path: Path) -> pd.DataFrame:
     return df
 
 
-def _ensure_full_name(df: pd.DataFrame, fallback_name: Optional[str]) -> pd.DataFrame:
+def _ensure_full_name(df: pd.DataFrame, fallback_name: Optional[str], copy: bool = True) -> pd.DataFrame:
     """Create 'full_name' if missing, using first/second name or fallback from path."""
-    df = df.copy()
     if "full_name" in df.columns:
-        return df
+        return df.copy() if copy else df
+    if copy:
+        df = df.copy()
 
     if "first_name" in df.columns or "second_name" in df.columns:
         first = df.get("first_name", pd.Series(index=df.index, dtype=object)).fillna("").astype(str).str.strip()
@@ -164,10 +200,78 @@ def _ensure_full_name(df: pd.DataFrame, fallback_name: Optional[str]) -> pd.Data
     return df
 
 
-def merge_folder(root: str, demo_csv: Optional[str] = None, csv_glob: str = "**/*.csv") -> pd.DataFrame:
+def _load_one(f: Path, engine: str = "c") -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    Read and normalize one per-player CSV. The frame is freshly read and owned here, so every step
+    works in place (copy=False). Returns (frame, None) or (None, warning).
+    """
+    try:
+        df = _safe_read_csv(f, engine)
+    except Exception as e:
+        return None, f"[WARN] Skipping {f} (read error: {e})"
+
+    df = _standardize_columns(df, copy=False)
+
+    # Infer element and gw if missing
+    element_from_path, name_from_path = _sniff_element_and_name_from_path(f)
+    df = _ensure_element_and_gw(df, f, copy=False, sniffed=(element_from_path, name_from_path))
+
+    # Ensure full_name, preferring CSV info, else folder-derived
+    df = _ensure_full_name(df, name_from_path, copy=False)
+
+    # If still missing critical keys, skip
+    if "element" not in df.columns:
+        return None, f"[WARN] {f} missing 'element' (player id); skipping"
+    if "gw" not in df.columns:
+        return None, f"[WARN] {f} missing 'gw' (gameweek); skipping"
+    return df, None
+
+
+def _load_chunk(files: List[Path], engine: str = "c") -> Tuple[Optional[pd.DataFrame], List[str]]:
+    """Process-pool task: load a run of files and concatenate them, so one frame crosses the process boundary."""
+    frames, warnings = [], []
+    for f in files:
+        df, warning = _load_one(f, engine)
+        if warning:
+            warnings.append(warning)
+        else:
+            frames.append(df)
+    if not frames:
+        return None, warnings
+    return pd.concat(frames, ignore_index=True, sort=False), warnings
+
+
+def _iter_chunks(files: List[Path], workers: int, engine: str, size: int):
+    """
+    Yield (frame or None, warnings) for consecutive runs of `size` files, in file order.
+    With workers > 1 the runs are loaded in a process pool, keeping at most 2 * workers runs in flight
+    so results cannot pile up in memory faster than the caller consumes them.
+    """
+    chunks = [files[i:i + size] for i in range(0, len(files), size)]
+    if workers <= 1:
+        for chunk in chunks:
+            yield _load_chunk(chunk, engine)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_load_chunk, chunk, engine))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def merge_folder(root: str, demo_csv: Optional[str] = None, csv_glob: str = "**/*.csv",
+                 workers: int = 1, engine: str = "c") -> pd.DataFrame:
     """
     Walk the root folder, read all CSVs, and vertically concatenate into a panel DataFrame.
     If demo_csv is provided, align the output columns to match the demo.
+
+    workers > 1 reads and normalizes the files in a process pool (same output as workers=1).
+    On Windows the calling script needs an `if __name__ == "__main__":` guard for that.
+    engine="pyarrow" uses pyarrow's CSV reader; it is faster, but its type inference can differ
+    from pandas' (e.g. ISO timestamps), so the default "c" engine is the one that matches exactly.
     """
     root_path = Path(root)
     files = sorted(root_path.rglob(csv_glob))
@@ -176,31 +280,21 @@ def merge_folder(root: str, demo_csv: Optional[str] = None, csv_glob: str = "**/
         raise FileNotFoundError(f"No CSV files found under: {root} (pattern={csv_glob})")
 
     frames = []
-    for f in files:
-        try:
-            df = _safe_read_csv(f)
-        except Exception as e:
-            print(f"[WARN] Skipping {f} (read error: {e})")
-            continue
-
-        df = _standardize_columns(df)
-
-        # Infer element and gw if missing
-        element_from_path, name_from_path = _sniff_element_and_name_from_path(f)
-        df = _ensure_element_and_gw(df, f)
-
-        # Ensure full_name, preferring CSV info, else folder-derived
-        df = _ensure_full_name(df, name_from_path)
-
-        # If still missing critical keys, skip
-        if "element" not in df.columns:
-            print(f"[WARN] {f} missing 'element' (player id); skipping")
-            continue
-        if "gw" not in df.columns:
-            print(f"[WARN] {f} missing 'gw' (gameweek); skipping")
-            continue
-
-        frames.append(df)
+    if workers > 1 and len(files) > 1:
+        # contiguous runs of the sorted file list keep each player folder in one worker (sniff cache)
+        size = max(1, min(512, math.ceil(len(files) / (workers * 4))))
+        for df, warnings in _iter_chunks(files, workers, engine, size):
+            for w in warnings:
+                print(w)
+            if df is not None:
+                frames.append(df)
+    else:
+        for f in files:
+            df, warning = _load_one(f, engine)
+            if warning:
+                print(warning)
+                continue
+            frames.append(df)
 
     if not frames:
         raise RuntimeError("No valid CSVs with both 'element' and 'gw' were found.")
@@ -226,15 +320,226 @@ def merge_folder(root: str, demo_csv: Optional[str] = None, csv_glob: str = "**/
     return panel
 
 
+# ---------------------------------------------------------------------------
+# Streaming mode: bounded memory, for archives too large to hold as one panel
+# ---------------------------------------------------------------------------
+# Rows are ordered (and de-duplicated) on these keys, compared numerically (missing -> last)
+_STREAM_KEYS = ["element", "gw", "fixture", "minutes", "bps"]
+_SEQ = "__seq"          # global input order; among duplicates the last one read wins, as keep="last" does
+_BLOCK_ROWS = 5_000     # rows per pickled block in a run file; the merge holds ~one block per run
+_MAX_FAN_IN = 32        # runs merged at once; more runs are merged in several passes
+
+
+def _key_col(col: str, schema: List[str]) -> str:
+    """Key columns missing from the demo schema still travel with the rows, under a hidden name."""
+    return col if col in schema else f"__{col}"
+
+
+def _align_chunk(df: pd.DataFrame, schema: List[str], seq_start: int) -> pd.DataFrame:
+    """Align a chunk to the demo schema as it streams in, keeping the merge keys and input order."""
+    out = df.reindex(columns=schema)
+    for col in _STREAM_KEYS:
+        if col not in schema:
+            out[f"__{col}"] = df[col] if col in df.columns else np.nan
+    out[_SEQ] = np.arange(seq_start, seq_start + len(out), dtype=np.int64)
+    return out
+
+
+def _sort_keys(df: pd.DataFrame, schema: List[str]) -> np.ndarray:
+    """(n, len(_STREAM_KEYS) + 1) float array: the keys with NaN -> +inf, then the sequence number."""
+    cols = []
+    for col in _STREAM_KEYS:
+        v = pd.to_numeric(df[_key_col(col, schema)], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        cols.append(np.where(np.isnan(v), np.inf, v))
+    cols.append(df[_SEQ].to_numpy(dtype=float))
+    return np.column_stack(cols)
+
+
+def _lexsort(keys: np.ndarray) -> np.ndarray:
+    return np.lexsort(keys.T[::-1])
+
+
+def _write_run(frames: List[pd.DataFrame], path: Path, schema: List[str]) -> None:
+    run = pd.concat(frames, ignore_index=True, sort=False)
+    run = run.take(_lexsort(_sort_keys(run, schema)))
+    with open(path, "wb") as fh:
+        for i in range(0, len(run), _BLOCK_ROWS):
+            pickle.dump(run.iloc[i:i + _BLOCK_ROWS], fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class _RunReader:
+    """Sequential reader over one sorted run file, holding only the blocks not yet merged."""
+
+    def __init__(self, path: Path, schema: List[str]):
+        self.fh = open(path, "rb")
+        self.schema = schema
+        self.done = False
+        self.buf = None
+        self.keys = np.empty((0, len(_STREAM_KEYS) + 1))
+        self.refill()
+
+    def refill(self) -> None:
+        try:
+            block = pickle.load(self.fh)
+        except EOFError:
+            self.done = True
+            self.fh.close()
+            return
+        keys = _sort_keys(block, self.schema)
+        if self.buf is None or not len(self.buf):
+            self.buf, self.keys = block, keys
+        else:
+            self.buf = pd.concat([self.buf, block], sort=False)
+            self.keys = np.vstack([self.keys, keys])
+
+
+def _before(keys: np.ndarray, cutoff: np.ndarray) -> np.ndarray:
+    """Rows whose de-duplication key sorts strictly before `cutoff` (lexicographic, vectorized)."""
+    lt = np.zeros(len(keys), dtype=bool)
+    eq = np.ones(len(keys), dtype=bool)
+    for j in range(len(cutoff)):
+        lt |= eq & (keys[:, j] < cutoff[j])
+        eq &= keys[:, j] == cutoff[j]
+    return lt
+
+
+def _merge_runs(paths: List[Path], schema: List[str], emit: Callable[[pd.DataFrame], None]) -> None:
+    """
+    K-way merge of sorted runs. Works a batch at a time: everything strictly before the smallest
+    "last key" among runs that still have blocks on disk is final, so it is sorted, de-duplicated
+    (duplicates are adjacent by then) and handed to `emit`. Memory is ~one block per run.
+    """
+    nk = len(_STREAM_KEYS)
+    readers = [_RunReader(p, schema) for p in paths]
+    while True:
+        live = [r for r in readers if r.buf is not None and len(r.buf)]
+        if not live:
+            break
+        pending = [r for r in live if not r.done]
+        cutoff = None
+        if pending:
+            cutoff = min((r.keys[-1, :nk] for r in pending), key=tuple)
+
+        parts, part_keys = [], []
+        for r in live:
+            n = len(r.buf) if cutoff is None else int(_before(r.keys[:, :nk], cutoff).sum())
+            if n:
+                parts.append(r.buf.iloc[:n])
+                part_keys.append(r.keys[:n])
+                r.buf, r.keys = r.buf.iloc[n:], r.keys[n:]
+
+        if parts:
+            batch = pd.concat(parts, ignore_index=True, sort=False)
+            keys = np.vstack(part_keys)
+            order = _lexsort(keys)
+            batch, keys = batch.take(order), keys[order]
+            # keep the last row of every group of equal keys
+            last = np.ones(len(batch), dtype=bool)
+            last[:-1] = (keys[1:, :nk] != keys[:-1, :nk]).any(axis=1)
+            emit(batch[last])
+
+        for r in pending:
+            if not len(r.buf) or tuple(r.keys[-1, :nk]) == tuple(cutoff):
+                r.refill()
+
+
+def merge_folder_streaming(root: str, output: str, demo_csv: str, csv_glob: str = "**/*.csv",
+                           workers: int = 1, engine: str = "c", run_rows: int = 200_000,
+                           tmp_dir: Optional[str] = None) -> int:
+    """
+    Same job as merge_folder, with memory that does not grow with the number of input files:
+
+    1. files are loaded a few hundred at a time and each chunk is aligned to the demo schema
+    2. chunks collect into runs of `run_rows` rows, which are sorted and spilled to disk
+    3. the runs are k-way merged into `output`, dropping duplicate (element, gw, fixture, minutes, bps)
+       rows on the way (the last one read wins, like merge_folder's keep="last")
+
+    Output rows are sorted by element, gw, then fixture. Values match merge_folder; number formatting can
+    differ where merge_folder's whole-panel dtypes differ from a batch's (e.g. 3 vs 3.0). Returns the row count.
+    """
+    files = sorted(Path(root).rglob(csv_glob))
+    if not files:
+        raise FileNotFoundError(f"No CSV files found under: {root} (pattern={csv_glob})")
+    schema = list(pd.read_csv(demo_csv, nrows=1).columns)
+
+    work = Path(tempfile.mkdtemp(prefix="fpl_merge_", dir=tmp_dir))
+    try:
+        runs, buf, buf_rows, seq = [], [], 0, 0
+        size = max(1, min(512, math.ceil(len(files) / max(1, workers * 4))))
+        for df, warnings in _iter_chunks(files, workers, engine, size):
+            for w in warnings:
+                print(w)
+            if df is None:
+                continue
+            buf.append(_align_chunk(df, schema, seq))
+            seq += len(df)
+            buf_rows += len(df)
+            if buf_rows >= run_rows:
+                runs.append(work / f"run_{len(runs):05d}.pkl")
+                _write_run(buf, runs[-1], schema)
+                buf, buf_rows = [], 0
+        if buf:
+            runs.append(work / f"run_{len(runs):05d}.pkl")
+            _write_run(buf, runs[-1], schema)
+            buf = []
+        if not runs:
+            raise RuntimeError("No valid CSVs with both 'element' and 'gw' were found.")
+
+        # too many runs to hold a block of each: merge them in groups first
+        level = 0
+        while len(runs) > _MAX_FAN_IN:
+            merged = []
+            for i in range(0, len(runs), _MAX_FAN_IN):
+                path = work / f"merge{level}_{len(merged):05d}.pkl"
+                with open(path, "wb") as fh:
+                    _merge_runs(runs[i:i + _MAX_FAN_IN], schema,
+                                lambda b, fh=fh: pickle.dump(b, fh, protocol=pickle.HIGHEST_PROTOCOL))
+                merged.append(path)
+            runs, level = merged, level + 1
+
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        written = 0
+        with open(output, "w", encoding="utf-8", newline="") as out:
+            out.write(",".join(schema) + "\n")
+
+            def _emit(batch: pd.DataFrame) -> None:
+                nonlocal written
+                batch[schema].to_csv(out, header=False, index=False, lineterminator="\n")
+                written += len(batch)
+
+            _merge_runs(runs, schema, _emit)
+        return written
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
 def main():
     ap = argparse.ArgumentParser(description="Merge per-player GW CSVs into one panel CSV.")
     ap.add_argument("--root", required=True, help="Root folder containing per-player subfolders and CSVs")
     ap.add_argument("--output", required=True, help="Output CSV path for the merged panel")
     ap.add_argument("--demo", default=None, help="Optional: path to a demo CSV whose column order/schema to follow")
     ap.add_argument("--glob", default="**/*.csv", help="Optional: glob pattern for matching CSVs (default: **/*.csv)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="Optional: processes used to read the CSVs (default: all cores; 1 = serial)")
+    ap.add_argument("--engine", default="c", choices=["c", "pyarrow"],
+                    help="Optional: CSV parser; pyarrow is faster but may infer some types differently")
+    ap.add_argument("--stream", action="store_true",
+                    help="Optional: bounded-memory mode (sorted runs on disk + external merge); needs --demo")
+    ap.add_argument("--run-rows", type=int, default=200_000, help="Optional: rows per sorted run in --stream mode")
+    ap.add_argument("--tmp-dir", default=None, help="Optional: where --stream keeps its sorted runs")
     args = ap.parse_args()
 
-    panel = merge_folder(args.root, demo_csv=args.demo, csv_glob=args.glob)
+    if args.stream:
+        if not args.demo:
+            ap.error("--stream aligns every chunk to the demo schema as it goes; pass --demo")
+        rows = merge_folder_streaming(args.root, args.output, args.demo, csv_glob=args.glob, workers=args.workers,
+                                      engine=args.engine, run_rows=args.run_rows, tmp_dir=args.tmp_dir)
+        print(f"[OK] Wrote merged panel to: {args.output}")
+        print(f"[INFO] Rows: {rows:,}  Cols: {len(pd.read_csv(args.demo, nrows=1).columns)}")
+        print(f"[INFO] Aligned to demo: {args.demo}")
+        return
+
+    panel = merge_folder(args.root, demo_csv=args.demo, csv_glob=args.glob, workers=args.workers, engine=args.engine)
     # Save
     Path(args.output).parent.mkdir(parents=True, exist_ok=True)
     panel.to_csv(args.output, index=False)
@@ -1,80 +1,109 @@
-import math
+import os
 import numpy as np
 import pandas as pd
-from sklearn.metrics import mean_squared_error
 import xgboost as xgb
 
+from explanations import explain_gw, reasons
+from external_training import train_external
+from feature_store import update_features
+from features import FORM_COLS
+from instrument import Run
+from matrix_cache import MatrixCache
+from model_store import ModelStore, fit_or_load
+from panel_store import CONSOLIDATED, STORE_DIR, read_panel
+from position_models import PositionModels, player_positions, train_by_position
+from squad_optimizer import SQUAD_SIZE, pick_squad, selectable
+from team_strength import TeamStrength, add_team_features
+
 # ---------- CONFIG ----------
-panels_engineered = r"C:\Users\Asus\Desktop\fpl_data\archive\all_panels_engineered.csv"
+panels_engineered = "all_panels_engineered"  # dataset name in the panel store
 gw_predictions = r"C:\Users\Asus\Desktop\fpl_data\archive\curr_gw_predictions.csv"
 team_predictions = r"C:\Users\Asus\Desktop\fpl_data\archive\curr_gw_team.csv"
+gw_explanations = r"C:\Users\Asus\Desktop\fpl_data\archive\curr_gw_explanations.csv"
 
 train_seasons = [2324, 2425]
 curr_season = 2526
 train_gw_until = 6
 test_gw = 7
 
+form_cols = FORM_COLS
+form_windows = [5, 8]  ##Adjust lag values as needed. Removed '3' as felt too reliant on recent 'purple patch' form
+reset_form_each_season = False  # True: rolling windows / lags restart at GW1 of every season
+rebuild_features = False  # True: rewrite the whole feature store
+verify_features = False   # True: also read the feature store back and check it matches the features
+team_features = True      # rolling team attack / defence + next 1 / 3 fixtures difficulty (team_strength.py)
+matrix_cache = True       # reuse the float32 feature matrix on disk while the panel is unchanged (matrix_cache.py)
+
+model_dir = os.path.join(STORE_DIR, "models")  # saved booster + what it was trained on (model_store.py)
+retrain_model = False  # True: always train from scratch
+warm_start_rounds = 50  # trees added when a gameweek comes in, instead of a full retrain
+max_warm_starts = 5     # full retrain after this many warm starts in a row
+per_position_models = False  # True: one model per position (GK / DEF / MID / FWD), trained in parallel (position_models.py)
+position_workers = 4         # processes for the per-position models; the cores are split between them
+explain_predictions = True   # why each player is rated as they are: TreeSHAP per feature group (explanations.py)
+explain_interactions = 0     # N > 0: also the strongest feature group pair of the N best predicted players (~1s each)
+external_memory = False      # True: stream the training rows from the feature store a season at a time (external_training.py)
+
 #SET INPUT FORMATION
 input_formation = {"Goalkeeper": 1, "Defender": 3, "Midfielder": 4, "Forward": 3}
-budget = 100.0
+squad_size = SQUAD_SIZE  # 2 GK, 5 DEF, 5 MID, 3 FWD; None picks the XI only
+budget = 100.0  # for the whole squad
 max_players_per_team = 3
+locked_players = []  # full names that must be in the squad
+banned_players = []  # full names to leave out
+# per-stage time / memory / rows report: set FPL_REPORT=<dir> (and FPL_PROFILE=cprofile,tracemalloc), see instrument.py
 # ---------------------------
 
-#Load data
-df = pd.read_csv(r"C:\Users\Asus\Desktop\fpl_data\archive\all_panels.csv")
-
-# make season sortable
-if df["season"].dtype == object:
-    if df["season"].astype(str).str.contains("/").any():
-        df["season"] = df["season"].astype(str).str.replace("/", "", regex=False).astype(int)
+#----------
+#Load data (only the seasons we use are read from the store)
+def load_data(store: str = STORE_DIR) -> pd.DataFrame:
+    df = read_panel(store, CONSOLIDATED, seasons=train_seasons + [curr_season])
+
+    # make season sortable
+    if df["season"].dtype == object:
+        if df["season"].astype(str).str.contains("/").any():
+            df["season"] = df["season"].astype(str).str.replace("/", "", regex=False).astype(int)
+        else:
+            df["season"] = df["season"].astype(int)
     else:
         df["season"] = df["season"].astype(int)
-else:
-    df["season"] = df["season"].astype(int)
 
-df["gw"] = df["gw"].astype(int)
-df = df.sort_values(["element", "season", "gw"]).reset_index(drop=True)
+    df["gw"] = df["gw"].astype(int)
+    return df.sort_values(["element", "season", "gw"]).reset_index(drop=True)
 
-#---------------
-df["total_points_next"] = df.groupby(["element", "season"])["total_points"].shift(-1)
 
 #----------
-#Forming features from 3week, 5week, 8week lags
-form_cols = [
-    "minutes",
-    "expected_goal_involvements",
-    "bps",
-    "ict_index",
-    "expected_goals",
-    "expected_assists",
-    "creativity"
-]
-for n in [5, 8]: ##Adjust lag values as needed. Removed '3' as felt too reliant on recent 'purple patch' form
-    for col in form_cols:
-        df[f"{col}_mean{n}"] = (
-            df.groupby("element")[col].transform(lambda x: x.rolling(n, min_periods=1).mean())
-        )
+#total_points_next + features from 5week, 8week rolling means (+ momentum, lag1), see features.py
+#kept in the feature store: only the gameweek files whose panel rows changed are rewritten (feature_store.py)
+def engineer(df: pd.DataFrame, store: str = STORE_DIR) -> pd.DataFrame:
+    df = update_features(df, store, panels_engineered, form_cols, form_windows,
+                         season_reset=reset_form_each_season, rebuild=rebuild_features, verify=verify_features)
+    print(f"[Saved] Engineered -> {store}/{panels_engineered}")
 
-df["xgi_momentum_3_8"] = df["expected_goal_involvements_mean5"] - df["expected_goal_involvements_mean8"]
-df["minutes_momentum_3_8"] = df["minutes_mean5"] - df["minutes_mean8"]
-df["minutes_lag1"] = df.groupby("element")["minutes"].shift(1)
-df["xgi_lag1"] = df.groupby("element")["expected_goal_involvements"].shift(1)
+    #team strength / fixture difficulty lookup tables (only seasons whose panel or fixture list changed are rebuilt)
+    if team_features:
+        strength, team_fixtures, rebuilt = TeamStrength(store).update()
+        df = add_team_features(df, strength, team_fixtures)
+        print(f"[INFO] team strength tables: rebuilt {rebuilt or 'none'}")
+
+    #incomplete data
+    return df.drop(columns=["was_home"])
 
-#incomplete data
-df.drop(columns=["was_home"], inplace=True)
 
 #-----------
 #Train/test
-train_mask = (
-        df["season"].isin(train_seasons) |
-        ((df["season"] == curr_season) & (df["gw"] <= train_gw_until))
-)
-test_mask = (df["season"] == curr_season) & (df["gw"] == test_gw)
+def split(df: pd.DataFrame):
+    train_mask = (
+            df["season"].isin(train_seasons) |
+            ((df["season"] == curr_season) & (df["gw"] <= train_gw_until))
+    )
+    test_mask = (df["season"] == curr_season) & (df["gw"] == test_gw)
 
-train_df = df[train_mask].copy()
-test_df = df[test_mask].copy()
+    train_df = df[train_mask].copy()
+    test_df = df[test_mask].copy()
 
-train_df = train_df.dropna(subset=["total_points_next"])
+    train_df = train_df.dropna(subset=["total_points_next"])
+    return train_df, test_df
 
 
 #------------
@@ -94,30 +123,81 @@ drop_cols = [
     "opponent_team",
     "position"
 ]
-
-# keep original position for picking, one-hot a copy for the model
-train_df_model = train_df.copy()
-test_df_model = test_df.copy()
-train_df_model["position_copy"] = train_df_model["position"]
-test_df_model["position_copy"] = test_df_model["position"]
-
-train_df_model = pd.get_dummies(train_df_model, columns=["position_copy"], drop_first=True)
-test_df_model = pd.get_dummies(test_df_model, columns=["position_copy"], drop_first=True)
-
 target = "total_points_next"
-features = [c for c in train_df_model.columns if c not in drop_cols + [target]]
 
-# align test columns
-test_df_model = test_df_model.reindex(columns=train_df_model.columns, fill_value=0)
 
-X_train = train_df_model[features].fillna(0)
-y_train = train_df_model[target].astype(float)
-X_test = test_df_model[features].fillna(0)
-y_test = test_df_model[target].astype(float)
+def design_matrices(train_df: pd.DataFrame, test_df: pd.DataFrame):
+    """(X_train, y_train, X_test, y_test, period): position one-hot, test columns aligned to train."""
+    # keep original position for picking, one-hot a copy for the model
+    train_df_model = train_df.copy()
+    test_df_model = test_df.copy()
+    train_df_model["position_copy"] = train_df_model["position"]
+    test_df_model["position_copy"] = test_df_model["position"]
+
+    train_df_model = pd.get_dummies(train_df_model, columns=["position_copy"], drop_first=True)
+    test_df_model = pd.get_dummies(test_df_model, columns=["position_copy"], drop_first=True)
+
+    features = [c for c in train_df_model.columns if c not in drop_cols + [target]]
+
+    # align test columns
+    test_df_model = test_df_model.reindex(columns=train_df_model.columns, fill_value=0)
+
+    X_train = train_df_model[features].fillna(0)
+    y_train = train_df_model[target].astype(float)
+    X_test = test_df_model[features].fillna(0)
+    y_test = test_df_model[target].astype(float)
+    period = train_df_model["season"] * 100 + train_df_model["gw"]
+    return X_train, y_train, X_test, y_test, period
+
+
+def _rows(mask: np.ndarray):
+    """Row positions of a mask; a slice (zero-copy view of the memmap) when they are one block."""
+    rows = np.flatnonzero(mask)
+    if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+        return slice(int(rows[0]), int(rows[-1]) + 1)
+    return rows
+
+
+def matrices(df: pd.DataFrame, store: str = STORE_DIR):
+    """
+    split + design_matrices from the cached feature matrix (matrix_cache.py): (train_df, test_df,
+    X_train, y_train, X_test, y_test, period). X_train is a view of the memmapped matrix when the
+    training seasons are its first rows; train_df / test_df are df's rows in the matrix's row order.
+    """
+    m, hit = MatrixCache(store, panels_engineered).matrix(team_features, drop_cols + ["was_home"])
+    print(f"[INFO] feature matrix {m.X.shape[0]} x {m.X.shape[1]}: {'cached' if hit else 'built'} ({m.path.name})")
+    meta = m.meta
+    train = (
+            meta["season"].isin(train_seasons) |
+            ((meta["season"] == curr_season) & (meta["gw"] <= train_gw_until))
+    ) & ~meta["_no_target"]
+    test = (meta["season"] == curr_season) & (meta["gw"] == test_gw)
+    train_rows, test_rows = _rows(train.to_numpy()), _rows(test.to_numpy())
+
+    X_train, y_train = m.frame(train_rows)
+    X_test, y_test = m.frame(test_rows)
+    period = pd.Series(meta["season"].to_numpy()[train_rows] * 100 + meta["gw"].to_numpy()[train_rows])
+    train_df = df.iloc[m.rows_of(df, train_rows)]
+    test_df = df.iloc[m.rows_of(df, test_rows)].reset_index(drop=True)
+    #the stored panel's column order (season last, team features after it), as fplpredict.py predict writes it
+    order = [c for c in m.columns if c in test_df.columns]
+    test_df = test_df[order + [c for c in test_df.columns if c not in order]]
+    return train_df, test_df, X_train, y_train, X_test, y_test, period
+
+
+def test_matrix(test_df: pd.DataFrame, model) -> pd.DataFrame:
+    """X_test for an already trained model: test_df one-hot like design_matrices, in the model's feature columns."""
+    fitted = next(iter(model.models.values())) if isinstance(model, PositionModels) else model
+    test_df_model = test_df.copy()
+    test_df_model["position_copy"] = test_df_model["position"]
+    test_df_model = pd.get_dummies(test_df_model, columns=["position_copy"], drop_first=True)
+    return test_df_model.reindex(columns=fitted.get_booster().feature_names, fill_value=0).fillna(0)
+
 
 #----------
 #Xgboost model training
-model = xgb.XGBRegressor(
+#hyperparameters; model_evaluation.py, model_tuning.py and the benchmarks use these too
+xgb_params = dict(
     objective="reg:squarederror",
     tree_method="hist",   # use 'gpu_hist' if you have a GPU
     n_estimators=500,
@@ -128,77 +208,149 @@ model = xgb.XGBRegressor(
     eval_metric="rmse",
     random_state=42
 )
-model.fit(X_train, y_train)
-y_pred = model.predict(X_test)
 
 
-test_df = test_df.copy()
-test_df["predicted_points_next"] = y_pred
+def make_model() -> xgb.XGBRegressor:
+    return xgb.XGBRegressor(**xgb_params)
 
-#-----------
-#Saving predictions
-df.to_csv(panels_engineered, index=False)
-test_df.sort_values("predicted_points_next", ascending=False).to_csv(gw_predictions, index=False)
-print(f"[Saved] Engineered -> {panels_engineered}")
-print(f"[Saved] Predictions -> {gw_predictions}")
 
-#-----------
-#Picking team
-pick_pool = test_df.copy()
-pick_pool = pick_pool[
-    pick_pool["predicted_points_next"].notna()
-    & pick_pool["price_now"].notna()
-    & (pick_pool["price_now"] > 0)
-].copy()
+def train(X_train: pd.DataFrame, y_train: pd.Series, period: pd.Series, models: str = model_dir,
+          position: pd.Series = None):
+    if per_position_models:
+        #position: per training row, player_positions(train_df)
+        model, fit_report = train_by_position(X_train, y_train, period, position, models, make_model().get_params(),
+                                              position_workers, warm_start_rounds, max_warm_starts, retrain_model)
+        for pos, r in fit_report["positions"].items():
+            print(f"[INFO] {pos} model: {r['action']} in {r['seconds']:.2f}s on {r['rows']} rows, {r['trees']} trees")
+        print(f"[INFO] per-position models: {fit_report['seconds']:.2f}s with {fit_report['workers']} worker(s)")
+        return model, fit_report
+
+    # reuses the saved model when the training rows are unchanged, boosts a few more trees when a GW was added
+    model, fit_report = fit_or_load(make_model(), X_train, y_train, period, models, warm_rounds=warm_start_rounds,
+                                    max_warm_starts=max_warm_starts, retrain=retrain_model)
+    print(f"[INFO] model: {fit_report['action']} in {fit_report['seconds']:.2f}s, {fit_report['trees']} trees "
+          f"(full retrain ~{fit_report['full_fit_seconds']:.1f}s, saved ~{fit_report['saved_seconds']:.1f}s)")
+    return model, fit_report
 
-#normalize
-pick_pool["team_name_current"] = pick_pool["team_name_current"].astype(str).replace({"nan": "Unknown", "None": "Unknown"})
 
-# sort by predicted points descending
-pick_pool = pick_pool.sort_values("predicted_points_next", ascending=False)
+def train_out_of_core(store: str = STORE_DIR, models: str = model_dir):
+    #same rows as split(), never all in memory: one season's batch at a time, XGBoost's binned pages on disk
+    model, fit_report = train_external(make_model(), store, (curr_season, train_gw_until), train_seasons + [curr_season],
+                                       models, dataset=panels_engineered, team_features=team_features,
+                                       retrain=retrain_model)
+    print(f"[INFO] model (out of core): {fit_report['action']} in {fit_report['seconds']:.2f}s, "
+          f"{fit_report['trees']} trees on {fit_report['rows']} rows of {fit_report['seasons']}")
+    return model, fit_report
 
-remaining_budget = float(budget)
-team_counts = {}
-picked_rows = []
 
+def load_model(models: str = model_dir):
+    return PositionModels.load(models) if per_position_models else ModelStore(models).load_model()
 
-for pos in ["Goalkeeper", "Defender", "Midfielder", "Forward"]:
-    need = int(input_formation.get(pos, 0))
-    if need <= 0:
-        continue
 
-    pos_pool = pick_pool[pick_pool["position"] == pos]
+def predict(model, test_df: pd.DataFrame, X_test: pd.DataFrame) -> pd.DataFrame:
+    test_df = test_df.copy()
+    if isinstance(model, PositionModels):
+        #each row goes to its position's model
+        test_df["predicted_points_next"] = model.predict(X_test, player_positions(test_df))
+    else:
+        test_df["predicted_points_next"] = model.predict(X_test)
+    return test_df
 
-    for _, row in pos_pool.iterrows():
-        if need == 0:
-            break
-        price = float(row["price_now"])
-        team = str(row["team_name_current"])
 
-        if price > remaining_budget:
-            continue
-        if team_counts.get(team, 0) >= max_players_per_team:
-            continue
+#-----------
+#Picking team
+def pick(test_df: pd.DataFrame):
+    """(selection, squad): squad is XI first, then by position and predicted points."""
+    #players with a prediction and a price, club names normalized
+    pick_pool = selectable(test_df)
 
-        picked_rows.append(row)
-        remaining_budget -= price
-        team_counts[team] = team_counts.get(team, 0) + 1
-        need -= 1
+    #15-man squad + best XI in input_formation + captain, solved exactly (squad_optimizer.py)
+    selection = pick_squad(pick_pool, input_formation, budget, max_players_per_team, squad_size=squad_size,
+                           locked=locked_players, banned=banned_players)
+    team_343 = selection.squad
+    if not team_343.empty:
+        team_343 = team_343.sort_values(["starting", "position", "predicted_points_next"], ascending=[False, True, False])
+    return selection, team_343
 
-team_343 = pd.DataFrame(picked_rows)
 
-# sort team by position then predicted points
-if not team_343.empty:
-    team_343 = team_343.sort_values(["position", "predicted_points_next"], ascending=[True, False])
+def show_squad(selection, team_343: pd.DataFrame, why: dict = None) -> None:
     cols_show = [c for c in [
         "full_name", "position", "team_name_current", "price_now",
-        "predicted_points_next", "minutes_mean5", "expected_goal_involvements_mean5"
+        "predicted_points_next", "minutes_mean5", "expected_goal_involvements_mean5", "captain"
     ] if c in team_343.columns]
 
     print("\n=== Selected 3-4-3 XI  ===")
-    print(team_343[cols_show].to_string(index=False))
-
-    team_343.to_csv(team_predictions, index=False)
-    print(f"\n[Saved] XI -> {team_predictions}")
-else:
-    print("No feasible team selected. Check data, positions, budget, or team caps.")
+    print(team_343.loc[team_343["starting"], cols_show].to_string(index=False))
+    print("\n=== Bench ===")
+    print(team_343.loc[~team_343["starting"], cols_show].to_string(index=False))
+    print(f"\nCaptain: {selection.captain['full_name']} | predicted XI points (captain x2): {selection.points:.2f}"
+          f" | squad cost: {selection.cost:.1f} / {budget} | solved in {selection.solve_time * 1000:.0f} ms")
+    if why:
+        #largest feature group contributions to each starter's prediction
+        print("\n=== Why (points from each feature group) ===")
+        for name in team_343.loc[team_343["starting"], "full_name"]:
+            print(f"{name}: {why.get(name, 'n/a')}")
+
+
+def main():
+    run = Run.from_env("model")
+    with run.stage("load") as st:
+        df = load_data()
+        st.rows_out = len(df)
+
+    with run.stage("features", rows_in=len(df)) as st:
+        df = engineer(df)
+        st.rows_out = len(df)
+
+    if external_memory:
+        with run.stage("fit") as st:
+            model, fit_report = train_out_of_core()
+            st.info.update(action=fit_report["action"], trees=fit_report["trees"], train_rows=fit_report["rows"])
+        test_df = df[(df["season"] == curr_season) & (df["gw"] == test_gw)].copy()
+        X_test = test_matrix(test_df, model)
+    else:
+        with run.stage("split", rows_in=len(df)) as st:
+            if matrix_cache:
+                train_df, test_df, X_train, y_train, X_test, y_test, period = matrices(df)
+            else:
+                train_df, test_df = split(df)
+                X_train, y_train, X_test, y_test, period = design_matrices(train_df, test_df)
+            st.rows_out = len(X_train) + len(X_test)
+            st.info.update(train_rows=len(X_train), test_rows=len(X_test), features=X_train.shape[1])
+
+        with run.stage("fit", rows_in=len(X_train)) as st:
+            model, fit_report = train(X_train, y_train, period, position=player_positions(train_df))
+            st.info.update(action=fit_report["action"], trees=fit_report["trees"])
+
+    #Saving predictions
+    with run.stage("predict", rows_in=len(X_test)) as st:
+        test_df = predict(model, test_df, X_test)
+        test_df.sort_values("predicted_points_next", ascending=False).to_csv(gw_predictions, index=False)
+        print(f"[Saved] Predictions -> {gw_predictions}")
+        st.rows_out = len(test_df)
+
+    explained = None
+    if explain_predictions:
+        with run.stage("explain", rows_in=len(test_df)) as st:
+            explained, hit = explain_gw(model, test_df, X_test, curr_season, test_gw, interactions=explain_interactions)
+            explained.sort_values("predicted_points_next", ascending=False).to_csv(gw_explanations, index=False)
+            print(f"[Saved] Explanations ({'cached' if hit else 'computed'}) -> {gw_explanations}")
+            st.rows_out = len(explained)
+            st.info.update(cached=hit)
+
+    with run.stage("pick", rows_in=len(test_df)) as st:
+        selection, team_343 = pick(test_df)
+        if not team_343.empty:
+            why = reasons(explained, team_343["full_name"]) if explained is not None else None
+            show_squad(selection, team_343, why)
+            team_343.to_csv(team_predictions, index=False)
+            print(f"\n[Saved] Squad -> {team_predictions}")
+        else:
+            print(f"No feasible team selected ({selection.status}). Check data, positions, budget, team caps or locked/banned players.")
+        st.rows_out = len(team_343)
+
+    run.finish()
+
+
+if __name__ == "__main__":
+    main()
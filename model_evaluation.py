@@ -1,24 +1,256 @@
-import model
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
+"""
+Walk-forward backtest of model.py's XGBoost model.
+
+For every gameweek g of --season the model is trained on everything before it (all earlier seasons in
+the store + GWs < g of the season, which is model.py's train_gw_until = g - 1 / test_gw = g split),
+predicts total_points_next for the GW g rows and is scored on them:
+- RMSE / MAE of the predictions
+- actual points of the XI (captain x2) squad_optimizer picks from the predictions, and of the best XI
+  in hindsight for comparison (prices are price_now, the panels have no price history; seasons whose
+  panel has no position / price_now, like the 23/24 and 24/25 CSVs, get RMSE / MAE only)
+
+--mode retrain fits every fold from scratch. --mode warm fits the first GW of every --chain GWs from
+scratch and adds --warm-rounds trees for each following GW, as model_store.py does between full fits.
+Folds (retrain) or chains (warm) are independent and run in a process pool. The feature matrix comes
+from the matrix cache (matrix_cache.py: built once per panel version, kept as .npy in the store) and
+is memory-mapped read-only by every worker: rows are sorted by (season, gw), so a fold's training
+rows are a prefix of the matrix and no worker copies it.
+
+Reads the engineered panel model.py keeps in the panel store (run model.py first), plus the team
+strength / fixture difficulty columns model.py joins on (team_strength.py; --no-team-features without).
+
+Usage:
+  python model_evaluation.py --season 2425 --workers 4
+  python model_evaluation.py --season 2526 --mode warm --out backtest.csv
+  python model_evaluation.py --season 2526 --predictions-out oos_2526.csv  # rows for squad_simulation.py
+  python model_evaluation.py --season 2526 --curve 7   # train/validation RMSE per tree for one fold
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 import xgboost as xgb
-import matplotlib.pyplot as plt
 
-eval_set = [(model.X_train, model.y_train), (model.X_test, model.y_test)]
+from matrix_cache import META_COLS, PANELS_ENGINEERED, TARGET, Matrix, MatrixCache, feature_matrix, fold_blocks
+from model import xgb_params
+from panel_store import STORE_DIR
+from squad_optimizer import SQUAD_SIZE, pick_squad
+from team_strength import TeamStrength
+
+PARAMS = dict(xgb_params)  # model.py's
+FORMATION = {"Goalkeeper": 1, "Defender": 3, "Midfielder": 4, "Forward": 3}
+BUDGET = 100.0
+MAX_PER_TEAM = 3
+
+
+#----------
+#process pool: every worker memory-maps the matrix once
+_X: Optional[np.ndarray] = None
+_y: Optional[np.ndarray] = None
+
+
+def _open(x_path: str, y_path: str) -> None:
+    global _X, _y
+    _X = np.load(x_path, mmap_mode="r")
+    _y = np.load(y_path, mmap_mode="r")
+
+
+def _close() -> None:
+    global _X, _y
+    _X = _y = None
+
+
+def _run_chain(folds: List[Tuple[int, int, List[Tuple[int, int]]]], warm_rounds: int, n_jobs: int) -> List[dict]:
+    """Fit the folds of one chain in order: the first from scratch, the rest warm-started from the previous fold."""
+    results, booster = [], None
+    for gw, n_train, blocks in folds:
+        t0 = time.perf_counter()
+        if booster is None:
+            model = xgb.XGBRegressor(**{**PARAMS, "n_jobs": n_jobs})
+            model.fit(_X[:n_train], _y[:n_train])
+        else:
+            model = xgb.XGBRegressor(**{**PARAMS, "n_estimators": warm_rounds, "n_jobs": n_jobs})
+            model.fit(_X[:n_train], _y[:n_train], xgb_model=booster)
+        booster = model.get_booster()
+        seconds = time.perf_counter() - t0
+        pred = np.concatenate([model.predict(_X[a:b]) for a, b in blocks]) if blocks else np.empty(0, np.float32)
+        results.append({"gw": gw, "train_rows": n_train, "blocks": blocks, "pred": pred, "fit_seconds": seconds,
+                        "action": "full fit" if len(results) == 0 else "warm start",
+                        "trees": booster.num_boosted_rounds()})
+    return results
+
+
+def fold_predictions(meta: pd.DataFrame, result: dict) -> pd.DataFrame:
+    """The fold's test rows (META_COLS) with their out-of-sample predicted_points_next."""
+    rows = np.concatenate([np.arange(a, b) for a, b in result["blocks"]])
+    pool = meta.iloc[rows][META_COLS].copy()
+    pool["predicted_points_next"] = result["pred"]
+    return pool
+
+
+def score_fold(meta: pd.DataFrame, result: dict) -> dict:
+    """RMSE / MAE over the rows with a target, XI points (captain x2) of the predicted vs the best XI."""
+    pool = fold_predictions(meta, result)
+    scored = pool[pool[TARGET].notna()]
+    err = scored["predicted_points_next"] - scored[TARGET]
+
+    pool = pool[pool["price_now"].notna() & (pool["price_now"] > 0) & pool["position"].notna()].copy()
+    pool["team_name_current"] = pool["team_name_current"].astype(str).replace({"nan": "Unknown", "None": "Unknown"})
+    pool["actual_points"] = pool[TARGET].fillna(0)  # no next GW row: scored nothing
+    picked = best = None
+    if not pool.empty:
+        picked = pick_squad(pool, FORMATION, BUDGET, MAX_PER_TEAM, squad_size=SQUAD_SIZE)
+        best = pick_squad(pool, FORMATION, BUDGET, MAX_PER_TEAM, squad_size=SQUAD_SIZE, points_col="actual_points")
+
+    def xi_points(selection) -> float:
+        if selection is None or selection.squad.empty:
+            return float("nan")
+        return float(selection.xi["actual_points"].sum() + selection.captain["actual_points"])
+
+    predicted = picked.points if picked is not None and len(picked.squad) else float("nan")
+    return {"gw": result["gw"], "train_rows": result["train_rows"], "test_rows": len(scored),
+            "rmse": float(np.sqrt(np.mean(err ** 2))), "mae": float(np.mean(np.abs(err))),
+            "xi_points": xi_points(picked), "best_xi_points": xi_points(best), "predicted_xi_points": predicted,
+            "action": result["action"], "trees": result["trees"], "fit_seconds": result["fit_seconds"]}
+
+
+def backtest(data, season: int, gws: Optional[List[int]] = None, mode: str = "retrain", chain: int = 6,
+             warm_rounds: int = 50, workers: int = 1, tmp_dir: Optional[str] = None, predictions: bool = False):
+    """
+    Walk-forward backtest over `gws` of `season` (default: every GW of it with a target), one row per GW.
+    mode="retrain" fits every GW from scratch, mode="warm" refits from scratch every `chain` GWs and
+    warm-starts in between. workers > 1 runs the independent folds / chains in a process pool
+    (Windows: the calling script needs an `if __name__ == "__main__":` guard).
+    predictions=True returns (per-GW results, every test row with its out-of-sample prediction).
+    `data` is the panel, or its Matrix from matrix_cache.py, whose memmapped files the workers open
+    directly (no copy of the matrix is written).
+    """
+    if isinstance(data, Matrix):
+        meta, paths = data.meta, (data.x_path, data.y_path)
+    else:
+        X, y, meta, _ = feature_matrix(data)
+        paths = None
+    if gws is None:
+        gws = sorted(meta.loc[(meta["season"] == season) & meta[TARGET].notna(), "gw"].astype(int).unique())
+    folds = [(gw, *fold_blocks(meta, season, gw)) for gw in gws]
+    folds = [f for f in folds if f[1] > 0 and f[2]]
+    step = 1 if mode == "retrain" else max(chain, 1)
+    chains = [folds[i:i + step] for i in range(0, len(folds), step)]
+    workers = max(1, min(workers, len(chains)))
+    n_jobs = max(1, (os.cpu_count() or 1) // workers)
+
+    work = tempfile.mkdtemp(prefix="fpl_backtest_", dir=tmp_dir)
+    rows, preds = [], []
+
+    def collect(results: List[dict]) -> None:
+        for r in results:
+            rows.append(score_fold(meta, r))
+            if predictions:
+                preds.append(fold_predictions(meta, r))
+    try:
+        if paths is None:
+            paths = os.path.join(work, "X.npy"), os.path.join(work, "y.npy")
+            np.save(paths[0], X)
+            np.save(paths[1], y)
+            del X
+        x_path, y_path = paths
+        if workers == 1:
+            _open(x_path, y_path)
+            for c in chains:
+                collect(_run_chain(c, warm_rounds, n_jobs))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_open, initargs=(x_path, y_path)) as pool:
+                # folds are scored (squad picks) here while the pool trains the next ones
+                futures = [pool.submit(_run_chain, c, warm_rounds, n_jobs) for c in chains]
+                for fut in as_completed(futures):
+                    collect(fut.result())
+    finally:
+        _close()  # drop the memmaps before the files go (Windows will not delete mapped files)
+        shutil.rmtree(work, ignore_errors=True)
+    res = pd.DataFrame(rows).sort_values("gw").reset_index(drop=True)
+    if predictions:
+        return res, pd.concat(preds).sort_values(["gw", "full_name"], kind="mergesort").reset_index(drop=True)
+    return res
+
+
+def plot_curve(matrix: Matrix, season: int, gw: int) -> None:
+    """Train / validation RMSE per boosting round for one fold (the old model_evaluation.py plot)."""
+    import matplotlib.pyplot as plt
+
+    X, y, meta = matrix.X, matrix.y, matrix.meta
+    n_train, blocks = fold_blocks(meta, season, gw)
+    X_test = np.concatenate([X[a:b] for a, b in blocks])
+    y_test = np.concatenate([y[a:b] for a, b in blocks])
+    keep = ~np.isnan(y_test)
+    model = xgb.XGBRegressor(**PARAMS)
+    model.fit(X[:n_train], y[:n_train], eval_set=[(X[:n_train], y[:n_train]), (X_test[keep], y_test[keep])],
+              verbose=False)
+    results = model.evals_result()
+    plt.plot(results["validation_0"]["rmse"], label="Train RMSE")
+    plt.plot(results["validation_1"]["rmse"], label="Validation RMSE")
+    plt.legend()
+    plt.show()
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--store", default=STORE_DIR)
+    ap.add_argument("--dataset", default=PANELS_ENGINEERED)
+    ap.add_argument("--season", type=int, default=2526)
+    ap.add_argument("--gws", type=int, nargs="+", default=None, help="Optional: GWs to test (default: all with a target)")
+    ap.add_argument("--mode", default="retrain", choices=["retrain", "warm"])
+    ap.add_argument("--chain", type=int, default=6, help="--mode warm: GWs per chain (1 full fit + warm starts)")
+    ap.add_argument("--warm-rounds", type=int, default=50)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--out", default=None, help="Optional: CSV for the per-GW results")
+    ap.add_argument("--predictions-out", default=None,
+                    help="Optional: CSV of every test row with its out-of-sample prediction (squad_simulation.py fits on it)")
+    ap.add_argument("--curve", type=int, default=None, metavar="GW", help="Plot train/validation RMSE for one GW instead")
+    ap.add_argument("--no-team-features", action="store_true",
+                    help="Leave out the team strength / fixture difficulty columns (team_strength.py)")
+    args = ap.parse_args(argv)
+
+    if not args.no_team_features:  # as model.py's team_features
+        TeamStrength(args.store).update()
+    #the matrix model.py / model_tuning.py use too (matrix_cache.py); later seasons are never in a fold's prefix
+    t0 = time.perf_counter()
+    matrix, hit = MatrixCache(args.store, args.dataset).matrix(not args.no_team_features)
+    print(f"[INFO] feature matrix {matrix.X.shape[0]} x {matrix.X.shape[1]}: "
+          f"{'cached' if hit else 'built'} in {time.perf_counter() - t0:.2f}s")
+    if args.curve is not None:
+        plot_curve(matrix, args.season, args.curve)
+        return
 
-model.model.fit(
-    model.X_train, model.y_train,
-    eval_set=eval_set,
-    verbose=False
-)
+    t0 = time.perf_counter()
+    res = backtest(matrix, args.season, args.gws, args.mode, args.chain, args.warm_rounds, args.workers,
+                   predictions=bool(args.predictions_out))
+    if args.predictions_out:
+        res, preds = res
+    elapsed = time.perf_counter() - t0
 
-results = model.model.evals_result()
-train_rmse = results["validation_0"]["rmse"]
-val_rmse = results["validation_1"]["rmse"]
+    cols = ["gw", "train_rows", "test_rows", "rmse", "mae", "xi_points", "best_xi_points", "action", "trees",
+            "fit_seconds"]
+    print(res[cols].to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    w = res["test_rows"]
+    xi = "n/a (no position / price_now in this season's panel)"
+    if res["xi_points"].notna().any():
+        xi = f"{res['xi_points'].sum():.0f} (best possible {res['best_xi_points'].sum():.0f})"
+    print(f"\n[INFO] {args.season}, {len(res)} GWs, {args.mode}: RMSE {np.sqrt((res['rmse'] ** 2 * w).sum() / w.sum()):.3f}"
+          f" | MAE {(res['mae'] * w).sum() / w.sum():.3f} | XI points {xi} | {elapsed:.1f}s with {args.workers} worker(s)")
+    if args.out:
+        res.to_csv(args.out, index=False)
+        print(f"[Saved] Backtest -> {args.out}")
+    if args.predictions_out:
+        preds.to_csv(args.predictions_out, index=False)
+        print(f"[Saved] Out-of-sample predictions ({len(preds)} rows) -> {args.predictions_out}")
 
 
-plt.plot(train_rmse, label="Train RMSE")
-plt.plot(val_rmse, label="Validation RMSE")
-plt.legend()
-plt.show()
+if __name__ == "__main__":
+    main()
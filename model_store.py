@@ -0,0 +1,142 @@
+"""
+Persisted XGBoost model for model.py: train once, reuse while the training data is unchanged.
+
+The booster is saved in XGBoost's UBJSON format with a JSON sidecar describing what it was trained on:
+
+    models/xgb_points.ubj    <- booster
+    models/xgb_points.json   <- features, dtypes, params, data hash, last gameweek trained, timings
+
+fit_or_load() decides per run:
+- loaded:      same features / dtypes / params and the same training rows (the hash ignores row order,
+               since element ids are renumbered as players come and go) -> no training at all
+- warm start:  the rows it was trained on are unchanged and rows from later gameweeks were added ->
+               warm_rounds more trees are boosted on top of the saved ones, over all rows (boosting
+               on the new rows alone is ~4x faster again but overfits the latest gameweek)
+- full fit:    anything else, after max_warm_starts warm starts in a row (the new trees only see a
+               few gameweeks, so the model is refreshed on everything now and then), or retrain=True
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+MODEL_NAME = "xgb_points"
+
+
+def data_hash(X: pd.DataFrame, y: pd.Series) -> str:
+    """Hash of the (features, target) rows as a multiset: independent of row order, not of column order."""
+    rows = pd.util.hash_pandas_object(X, index=False).to_numpy()
+    rows = rows ^ pd.util.hash_pandas_object(y.rename("__target__"), index=False).to_numpy() * np.uint64(31)
+    h = hashlib.sha256(np.sort(rows).tobytes())
+    h.update(json.dumps([list(map(str, X.columns)), [str(t) for t in X.dtypes]]).encode())
+    return h.hexdigest()
+
+
+def _json_params(model: xgb.XGBRegressor) -> str:
+    """The estimator's params as canonical JSON (a string, so missing=nan compares equal to itself)."""
+    params = {}
+    for k, v in model.get_params().items():
+        try:
+            json.dumps(v)
+        except TypeError:
+            continue
+        params[k] = v
+    return json.dumps(params, sort_keys=True)
+
+
+class ModelStore:
+    def __init__(self, root: str, name: str = MODEL_NAME):
+        self.root = Path(root)
+        self.model_path = self.root / f"{name}.ubj"
+        self.meta_path = self.root / f"{name}.json"
+
+    def load_meta(self) -> Optional[dict]:
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def load_model(self) -> xgb.XGBRegressor:
+        model = xgb.XGBRegressor()
+        model.load_model(self.model_path)
+        return model
+
+    def save(self, model: xgb.XGBRegressor, meta: dict) -> None:
+        # booster first, sidecar last: a sidecar always describes a complete booster file
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / (self.model_path.name + ".tmp.ubj")
+        model.save_model(tmp)
+        os.replace(tmp, self.model_path)
+        tmp = self.root / (self.meta_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh, indent=1)
+        os.replace(tmp, self.meta_path)
+
+
+def fit_or_load(model: xgb.XGBRegressor, X: pd.DataFrame, y: pd.Series, period: pd.Series, root: str,
+                name: str = MODEL_NAME, warm_rounds: int = 50, max_warm_starts: int = 5,
+                retrain: bool = False) -> Tuple[xgb.XGBRegressor, dict]:
+    """
+    Return a fitted model for (X, y) and a report {"action", "seconds", "full_fit_seconds", ...}.
+    `model` is the unfitted estimator with the wanted params; `period` orders the rows in time
+    (e.g. season * 100 + gw) and tells the rows added since the last run from the old ones.
+    """
+    store = ModelStore(root, name)
+    meta = None if retrain else store.load_meta()
+    params = _json_params(model)
+    schema = {c: str(t) for c, t in X.dtypes.items()}
+    period = pd.Series(np.asarray(period), index=X.index)
+    t0 = time.perf_counter()
+
+    if meta is not None and store.model_path.exists() and meta["params"] == params \
+            and meta["features"] == list(X.columns) and meta["dtypes"] == schema:
+        if meta["data_hash"] == data_hash(X, y):
+            fitted = store.load_model()
+            return fitted, _report("loaded", t0, meta)
+
+        old = period <= meta["trained_until"]
+        new = ~old
+        if new.any() and meta["warm_starts"] < max_warm_starts and int(old.sum()) == meta["rows"] \
+                and data_hash(X[old], y[old]) == meta["data_hash"]:
+            fitted = xgb.XGBRegressor(**{**model.get_params(), "n_estimators": warm_rounds})
+            fitted.fit(X, y, xgb_model=store.load_model().get_booster())
+            meta = {**meta, "data_hash": data_hash(X, y), "rows": len(X), "trained_until": int(period.max()),
+                    "warm_starts": meta["warm_starts"] + 1, "trees": fitted.get_booster().num_boosted_rounds(),
+                    "saved_at": time.time()}
+            store.save(fitted, meta)
+            return fitted, _report("warm start", t0, meta, new_rows=int(new.sum()))
+
+    model.fit(X, y)
+    seconds = time.perf_counter() - t0
+    meta = {
+        "features": list(X.columns),
+        "dtypes": schema,
+        "params": params,
+        "data_hash": data_hash(X, y),
+        "rows": len(X),
+        "trained_until": int(period.max()),
+        "warm_starts": 0,
+        "trees": model.get_booster().num_boosted_rounds(),
+        "full_fit_seconds": seconds,
+        "full_fit_rows": len(X),
+        "xgboost": xgb.__version__,
+        "saved_at": time.time(),
+    }
+    store.save(model, meta)
+    return model, _report("full fit", t0, meta)
+
+
+def _report(action: str, t0: float, meta: dict, **extra) -> dict:
+    seconds = time.perf_counter() - t0
+    # a full fit on today's rows: the last one's time scaled by the row count
+    full = meta["full_fit_seconds"] * meta["rows"] / max(meta["full_fit_rows"], 1)
+    return {"action": action, "seconds": seconds, "full_fit_seconds": full, "saved_seconds": max(full - seconds, 0.0),
+            "trees": meta["trees"], "warm_starts": meta["warm_starts"], **extra}
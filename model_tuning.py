@@ -0,0 +1,237 @@
+"""
+Hyperparameter search for model.py's XGBoost model.
+
+Random configurations from SPACE are scored on time-ordered gameweek splits: for each of the last
+--folds GWs with a target (in --season) the model is trained on everything before that GW and
+validated on it, as in model_evaluation.py. The score is the mean validation RMSE over the folds.
+Early stopping never sees the validation GW: every fit stops on the GW before it (trained on the GWs
+before that one) and is scored on the validation GW at the round it stopped at, so the GW that ranks
+the configurations is not also the one their rounds were picked on.
+
+- the training / validation data of every fold is built once as a QuantileDMatrix (binned with
+  MAX_BIN) and reused by every trial; trials run in a thread pool (xgboost releases the GIL) with
+  nthread = cores // workers each, so the pool never oversubscribes the CPU
+- successive halving over boosting rounds: all trials get --min-rounds, the best 1/--eta of them
+  --min-rounds * eta, ... up to --max-rounds; every fit early-stops on its inner GW (above)
+- every finished (trial, rung) is appended to a JSONL trial log. Trial i's configuration depends only
+  on --seed and i and each rung is fitted from scratch, so rerunning the same command after an
+  interruption skips what is logged and ends with the same result as an uninterrupted search
+
+Reads the engineered panel model.py keeps in the panel store (run model.py first), as the cached
+feature matrix model.py and model_evaluation.py share (matrix_cache.py).
+
+Usage:
+  python model_tuning.py --trials 27 --workers 4 --log tuning.jsonl
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from matrix_cache import PANELS_ENGINEERED, TARGET, Matrix, MatrixCache, feature_matrix, fold_blocks
+from model_evaluation import PARAMS
+from panel_store import STORE_DIR
+from team_strength import TeamStrength
+
+MAX_BIN = 256  # fixed: the QuantileDMatrix bins are built once for all trials
+EARLY_STOPPING = 50
+
+# name -> (kind, low, high); "log" is sampled uniformly on a log scale
+SPACE = {
+    "max_depth": ("int", 3, 10),
+    "learning_rate": ("log", 0.01, 0.3),
+    "subsample": ("float", 0.5, 1.0),
+    "colsample_bytree": ("float", 0.5, 1.0),
+    "min_child_weight": ("log", 1.0, 50.0),
+    "reg_lambda": ("log", 0.1, 20.0),
+    "gamma": ("float", 0.0, 2.0),
+}
+
+
+def sample(trial: int, seed: int = 0) -> Dict[str, float]:
+    """Configuration of trial `trial`: a function of (seed, trial) only, so a resumed search sees the same ones."""
+    rng = np.random.default_rng([seed, trial])
+    params = {}
+    for name, (kind, lo, hi) in SPACE.items():
+        if kind == "int":
+            params[name] = int(rng.integers(lo, hi + 1))
+        elif kind == "log":
+            params[name] = float(np.exp(rng.uniform(np.log(lo), np.log(hi))))
+        else:
+            params[name] = float(rng.uniform(lo, hi))
+    return params
+
+
+def rungs(min_rounds: int, max_rounds: int, eta: int) -> List[int]:
+    out = [min_rounds]
+    while out[-1] * eta <= max_rounds:
+        out.append(out[-1] * eta)
+    return out
+
+
+class Folds:
+    """Time-ordered splits of the feature matrix, each turned into QuantileDMatrix objects once.
+
+    data: (train, inner, valid) per fold; inner is the GW before valid, the one the fits early-stop on.
+    """
+
+    def __init__(self, data, season: int, n_folds: int = 3):
+        #data: the panel, or its cached Matrix (matrix_cache.py)
+        if isinstance(data, Matrix):
+            X, y, meta, self.features = data.X, data.y, data.meta, data.features
+        else:
+            X, y, meta, self.features = feature_matrix(data)
+        gws = sorted(meta.loc[(meta["season"] == season) & meta[TARGET].notna(), "gw"].astype(int).unique())
+        self.gws = [int(g) for g in gws[-n_folds:]]
+        self.data = []
+        for gw in self.gws:
+            n_train, blocks = fold_blocks(meta, season, gw)
+            a, b = blocks[0]  # rows with a target come first in the matrix
+            prev = meta.iloc[n_train - 1]  # last GW with a target before this one
+            n_inner, _ = fold_blocks(meta, int(prev["season"]), int(prev["gw"]))
+            dtrain = xgb.QuantileDMatrix(X[:n_inner], y[:n_inner], max_bin=MAX_BIN)
+            dinner = xgb.QuantileDMatrix(X[n_inner:n_train], y[n_inner:n_train], ref=dtrain, max_bin=MAX_BIN)
+            dvalid = xgb.QuantileDMatrix(X[a:b], y[a:b], ref=dtrain, max_bin=MAX_BIN)
+            self.data.append((dtrain, dinner, dvalid))
+
+
+def run_trial(folds: Folds, params: Dict[str, float], rounds: int, nthread: int) -> dict:
+    """Fit one configuration for up to `rounds` trees on every fold (early-stopped on the inner GW); mean validation RMSE."""
+    base = {"objective": PARAMS["objective"], "tree_method": "hist", "max_bin": MAX_BIN, "eval_metric": "rmse",
+            "seed": PARAMS["random_state"], "nthread": nthread}
+    t0 = time.perf_counter()
+    scores, best = [], []
+    for dtrain, dinner, dvalid in folds.data:
+        booster = xgb.train({**base, **params}, dtrain, num_boost_round=rounds, evals=[(dinner, "inner")],
+                            early_stopping_rounds=EARLY_STOPPING, verbose_eval=False)
+        n = int(booster.best_iteration) + 1
+        pred = booster.predict(dvalid, iteration_range=(0, n))
+        scores.append(float(np.sqrt(np.mean((pred - dvalid.get_label()) ** 2))))
+        best.append(n)
+    return {"rmse": float(np.mean(scores)), "fold_rmse": scores, "best_rounds": best,
+            "seconds": time.perf_counter() - t0, "nthread": nthread}
+
+
+def _read_log(path: str, header: dict) -> Dict[tuple, dict]:
+    """Trials already in the log; a missing or empty log (e.g. killed right after creating it) gets the header."""
+    done = {}
+    if not path:
+        return done
+    lines, good, text = [], 0, ""
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as fh:
+            text = fh.read()
+    for line in text.splitlines(keepends=True):
+        try:
+            lines.append(json.loads(line))
+        except ValueError:
+            break  # a record cut off by the interruption: drop it and fit that trial again
+        good += len(line)
+    if not lines:
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(json.dumps({"header": header}) + "\n")
+        return done
+    if good < len(text):
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(text[:good])
+    if lines[0].get("header") != header:
+        raise ValueError(f"{path} is the log of a different search (folds / seed / space / rungs); "
+                         f"pass a new --log or delete it")
+    for rec in lines[1:]:
+        done[(rec["trial"], rec["rounds"])] = rec
+    return done
+
+
+def search(folds: Folds, trials: int = 27, min_rounds: int = 100, max_rounds: int = 900, eta: int = 3,
+           workers: int = 1, seed: int = 0, log: Optional[str] = None) -> pd.DataFrame:
+    """
+    Successive halving over `trials` sampled configurations; one row per (trial, rung) fitted.
+    Results already in `log` (same folds / seed / space / rungs) are reused instead of refitted.
+    """
+    budgets = rungs(min_rounds, max_rounds, eta)
+    header = {"season_gws": folds.gws, "features": folds.features, "seed": seed, "space": SPACE,
+              "rungs": budgets, "early_stopping": EARLY_STOPPING,
+              "early_stopping_on": "inner", "max_bin": MAX_BIN}
+    header = json.loads(json.dumps(header))  # as it reads back from the log (tuples -> lists)
+    done = _read_log(log, header)
+    logged = set(done)
+    nthread = max(1, (os.cpu_count() or 1) // max(workers, 1))
+
+    records, alive = [], list(range(trials))
+    for k, rounds in enumerate(budgets):
+        todo = [t for t in alive if (t, rounds) not in done]
+        if any((t, rounds) in logged for t in alive):
+            print(f"[INFO] rung {k} ({rounds} rounds): {len(alive) - len(todo)} of {len(alive)} trials from the log")
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            futures = {pool.submit(run_trial, folds, sample(t, seed), rounds, nthread): t for t in todo}
+            for fut in as_completed(futures):
+                t = futures[fut]
+                rec = {"trial": t, "rung": k, "rounds": rounds, "params": sample(t, seed), **fut.result()}
+                done[(t, rounds)] = rec
+                if log:
+                    with open(log, "a", encoding="utf-8") as fh:
+                        fh.write(json.dumps(rec) + "\n")
+        scored = [done[(t, rounds)] for t in alive]
+        records += scored
+        scored.sort(key=lambda r: (r["rmse"], r["trial"]))
+        keep = max(1, math.floor(len(alive) / eta))
+        alive = [r["trial"] for r in scored[:keep]]
+        print(f"[INFO] rung {k}: {len(scored)} trials x {rounds} rounds, best RMSE {scored[0]['rmse']:.4f} "
+              f"(trial {scored[0]['trial']})" + (f", {len(alive)} go on" if k + 1 < len(budgets) else ""))
+    return pd.DataFrame(records)
+
+
+def best_params(results: pd.DataFrame) -> dict:
+    """XGBRegressor kwargs for the best trial of the last rung (n_estimators = mean early-stopped rounds)."""
+    last = results[results["rung"] == results["rung"].max()].sort_values(["rmse", "trial"]).iloc[0]
+    return {**PARAMS, **last["params"], "n_estimators": int(round(np.mean(last["best_rounds"]))), "max_bin": MAX_BIN}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--store", default=STORE_DIR)
+    ap.add_argument("--dataset", default=PANELS_ENGINEERED)
+    ap.add_argument("--season", type=int, default=2526, help="Season whose last GWs are the validation folds")
+    ap.add_argument("--folds", type=int, default=3)
+    ap.add_argument("--trials", type=int, default=27)
+    ap.add_argument("--min-rounds", type=int, default=100)
+    ap.add_argument("--max-rounds", type=int, default=900)
+    ap.add_argument("--eta", type=int, default=3, help="Keep the best 1/eta trials per rung, eta x the rounds")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Trials fitted at the same time")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--log", default=os.path.join(STORE_DIR, "models", "tuning.jsonl"),
+                    help="Trial log (JSONL); rerun with the same log to resume")
+    ap.add_argument("--no-team-features", action="store_true",
+                    help="Leave out the team strength / fixture difficulty columns (team_strength.py)")
+    args = ap.parse_args()
+
+    if not args.no_team_features:  # as model.py's team_features
+        TeamStrength(args.store).update()
+    matrix, _ = MatrixCache(args.store, args.dataset).matrix(not args.no_team_features)
+
+    t0 = time.perf_counter()
+    folds = Folds(matrix, args.season, args.folds)
+    print(f"[INFO] {len(folds.gws)} folds (validation GWs {folds.gws} of {args.season}), "
+          f"QuantileDMatrix built in {time.perf_counter() - t0:.1f}s")
+    os.makedirs(os.path.dirname(os.path.abspath(args.log)), exist_ok=True)
+    results = search(folds, args.trials, args.min_rounds, args.max_rounds, args.eta, args.workers, args.seed, args.log)
+    print(f"[OK] {results['trial'].nunique()} trials, {len(results)} fits in {time.perf_counter() - t0:.1f}s "
+          f"-> {args.log}")
+
+    baseline = run_trial(folds, {k: PARAMS[k] for k in SPACE if k in PARAMS}, PARAMS["n_estimators"],
+                         os.cpu_count() or 1)
+    last = results[results["rung"] == results["rung"].max()]
+    print(f"[INFO] model.py's params: RMSE {baseline['rmse']:.4f} (early-stopped at {baseline['best_rounds']} rounds)")
+    print(f"[INFO] best: RMSE {last['rmse'].min():.4f}\nXGBRegressor(**{json.dumps(best_params(results), indent=1)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Season-partitioned columnar store for the player panels (Parquet, via pyarrow).
+
+Replaces the CSV round-trips between the scripts: data_loader.py / run_merge.py write each season's
+panel here, feature_engineering.py reads the seasons and writes the consolidated panel back, and
+model.py reads that. Layout:
+
+    STORE_DIR/
+      panels/season=2324/part-0.parquet         <- one raw panel per season
+      all_panels/season=2526/part-0.parquet     <- consolidated (feature_engineering.py)
+      fixtures/season=2526/part-0.parquet       <- fixture list, past and future (data_loader.py)
+
+A partition can also be split into several part-*.parquet files (write_panel_parts), e.g. one per
+block of gameweeks, so a writer can replace a few gameweeks without rewriting the season; reads see
+the union.
+
+Columns get explicit compact dtypes (PANEL_DTYPES): categoricals for names / teams / position, small
+ints for counts, float32 for the xG / ICT style stats. Reads can project columns and push filters on
+season and gw down to the files, so e.g. model.py never parses seasons it does not train on.
+Panel CSVs that still come in (imports, exports) go through read_panel_csv, which parses them
+straight into the same dtypes; memory_report shows what each column costs.
+
+Usage:
+  python panel_store.py import players_2324_panel.csv players_2425_panel.csv players2526_panel.csv
+  python panel_store.py info
+  python panel_store.py memory players2526_panel.csv   # bytes per column: plain read_csv vs the schema
+"""
+
+import argparse
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+STORE_DIR = os.environ.get("FPL_STORE", r"C:\Users\Asus\Desktop\fpl_data\archive\store")
+RAW = "panels"               # one panel per season, as downloaded / merged
+CONSOLIDATED = "all_panels"  # written by feature_engineering.py, read by model.py
+FIXTURES = "fixtures"        # the current season's fixture list, written by data_loader.py
+
+# Declared compact dtypes, one per data_loader.OUT_COLS column (+ season, and transfers_in from the
+# older season files). Ints are widened if a value does not fit and fall back to float32 when the
+# column has missing values; columns not listed here keep whatever dtype they have.
+PANEL_DTYPES = {
+    "element": "int32",
+    "gw": "int8",
+    "minutes": "int16",
+    "expected_goal_involvements": "float32",
+    "ict_index": "float32",
+    "expected_goals": "float32",
+    "expected_assists": "float32",
+    "bps": "int16",
+    "fixture": "int16",
+    "starts": "int8",
+    "clean_sheets": "int8",
+    "assists": "int8",
+    "transfers_in": "int32",
+    "creativity": "float32",
+    "team_h_score": "int8",
+    "total_points": "int8",
+    "bonus": "int8",
+    "penalties_missed": "int8",
+    "opponent_team": "int8",
+    "influence": "float32",
+    "saves": "int8",
+    "expected_goals_conceded": "float32",
+    "red_cards": "int8",
+    "team_a_score": "int8",
+    "threat": "float32",
+    "yellow_cards": "int8",
+    "goals_conceded": "int8",
+    "goals_scored": "int8",
+    "points_per_game": "float32",
+    "full_name": "category",
+    "team_id_current": "int8",
+    "team_name_current": "category",
+    "team_id_gw": "int8",
+    "team_name_gw": "category",
+    "opponent_team_name": "category",
+    "was_home": "bool",
+    "price_now": "float32",
+    "position": "category",
+    "season": "int16",
+}
+
+_INT_LADDER = ["int8", "int16", "int32", "int64"]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError("The panel store needs pyarrow: pip install pyarrow") from e
+
+
+def _to_int(s: pd.Series, dtype: str) -> pd.Series:
+    num = pd.to_numeric(s, errors="coerce")
+    if num.isna().any() or not np.all(np.mod(num.to_numpy(dtype=float), 1) == 0):
+        return num.astype("float32")
+    lo, hi = num.min(), num.max()
+    for candidate in _INT_LADDER[_INT_LADDER.index(dtype):]:
+        info = np.iinfo(candidate)
+        if info.min <= lo and hi <= info.max:
+            return num.astype(candidate)
+    return num.astype("int64")
+
+
+def _to_bool(s: pd.Series) -> pd.Series:
+    if s.dtype == bool:
+        return s
+    mapped = s.map({True: True, False: False, "True": True, "False": False, "true": True, "false": False,
+                    1: True, 0: False, "1": True, "0": False})
+    return mapped.astype(bool) if mapped.notna().all() else mapped.astype("boolean")
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast the known panel columns to their compact dtypes (in place; returns `df`)."""
+    for col, dtype in PANEL_DTYPES.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        s = df[col]
+        if dtype == "category":
+            df[col] = s.astype("category")
+        elif dtype == "bool":
+            df[col] = _to_bool(s)
+        elif dtype.startswith("int"):
+            df[col] = _to_int(s, dtype)
+        else:
+            df[col] = pd.to_numeric(s, errors="coerce").astype(dtype)
+    return df
+
+
+def read_panel_csv(path: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Read a panel CSV into the PANEL_DTYPES dtypes. Categoricals and float32 columns are parsed as
+    such (no intermediate per-row strings / float64), the ints and was_home go through apply_schema
+    since they may have gaps.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = None if columns is None else [c for c in header if c in set(columns)]
+    dtype = {c: t for c, t in PANEL_DTYPES.items() if c in header and t in ("category", "float32")}
+    try:
+        df = pd.read_csv(path, usecols=usecols, dtype=dtype, low_memory=False)
+    except ValueError:
+        # a float32 column with stray text: read it plainly, apply_schema coerces that to NaN
+        df = pd.read_csv(path, usecols=usecols, low_memory=False)
+    return apply_schema(df)
+
+
+def memory_report(df: pd.DataFrame, baseline: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Bytes per column of `df` (deep, i.e. including string storage), largest first, with a total row.
+    With `baseline` (e.g. the same panel read without the schema) its dtype / bytes and the ratio are
+    added next to each column.
+    """
+    rep = pd.DataFrame({"dtype": df.dtypes.astype(str), "bytes": df.memory_usage(index=False, deep=True)})
+    if baseline is not None:
+        rep["baseline_dtype"] = baseline.dtypes.astype(str).reindex(rep.index)
+        rep["baseline_bytes"] = baseline.memory_usage(index=False, deep=True).reindex(rep.index)
+    rep = rep.sort_values("bytes", ascending=False)
+    total = {"dtype": "", "bytes": rep["bytes"].sum()}
+    if baseline is not None:
+        total.update(baseline_dtype="", baseline_bytes=rep["baseline_bytes"].sum())
+    rep.loc["TOTAL"] = total
+    if baseline is not None:
+        rep["factor"] = rep["baseline_bytes"] / rep["bytes"]
+    return rep
+
+
+def _partition_dir(store: str, dataset: str, season) -> Path:
+    return Path(store) / dataset / f"season={int(season)}"
+
+
+def part_files(store: str, dataset: str, season) -> List[Path]:
+    """The files of one season partition."""
+    return sorted(_partition_dir(store, dataset, season).glob("part-*.parquet"))
+
+
+def part_name(by: str, value, size: int = 1) -> str:
+    """File name of the part holding `by` == `value`: one part per `size` consecutive values (write_panel_parts)."""
+    return f"part-{by}{int(value) // size * size:02d}.parquet"
+
+
+def _write_part(part: pd.DataFrame, out: Path) -> Path:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(part.drop(columns=["season"]), preserve_index=False)
+    tmp = out.with_name(out.name + ".tmp")
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, out)
+    return out
+
+
+def write_panel(df: pd.DataFrame, store: str = STORE_DIR, dataset: str = RAW,
+                season: Optional[int] = None) -> List[Path]:
+    """
+    Write `df` into the store, one partition per season; the partitions present in `df` are replaced,
+    other seasons are left alone. `season` fills / overrides the season column.
+    """
+    _require_pyarrow()
+
+    df = df.copy()
+    if season is not None:
+        df["season"] = season
+    if "season" not in df.columns:
+        raise ValueError("panel has no 'season' column; pass season=...")
+    apply_schema(df)
+
+    written = []
+    for s, part in df.groupby("season", sort=True, observed=True):
+        out = _write_part(part, _partition_dir(store, dataset, s) / "part-0.parquet")
+        for stale in part_files(store, dataset, s):
+            if stale != out:
+                os.remove(stale)  # the partition was split into parts (write_panel_parts)
+        written.append(out)
+    return written
+
+
+def write_panel_parts(df: pd.DataFrame, store: str, dataset: str, by: str = "gw", size: int = 1) -> List[Path]:
+    """
+    Write `df` as one file per season and block of `size` consecutive `by` values (part_name). Only
+    those files are replaced, so `df` must hold whole blocks; the partitions' other files are left alone.
+    """
+    _require_pyarrow()
+    df = apply_schema(df.copy())
+    block = df[by].to_numpy().astype(int) // size * size
+    written = []
+    for (s, b), part in df.groupby([df["season"].to_numpy(), block], sort=True):
+        written.append(_write_part(part, _partition_dir(store, dataset, s) / part_name(by, b, size)))
+    return written
+
+
+def list_seasons(store: str = STORE_DIR, dataset: str = RAW) -> List[int]:
+    root = Path(store) / dataset
+    return sorted(int(p.name.split("=", 1)[1]) for p in root.glob("season=*") if any(p.glob("part-*.parquet")))
+
+
+def read_panel(store: str = STORE_DIR, dataset: str = RAW, columns: Optional[Iterable[str]] = None,
+               seasons: Optional[Iterable[int]] = None, gw_min: Optional[int] = None,
+               gw_max: Optional[int] = None) -> pd.DataFrame:
+    """
+    Read a dataset from the store. `columns` projects (season is always included); `seasons`, `gw_min`
+    and `gw_max` are pushed down, so other seasons' files are never opened and row groups outside
+    the gw range are skipped. Seasons whose files lack a column get it as missing values.
+    """
+    _require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    root = Path(store) / dataset
+    files = sorted(root.glob("season=*/part-*.parquet"))
+    if seasons is not None:
+        wanted = {int(s) for s in seasons}
+        files = [f for f in files if int(f.parent.name.split("=", 1)[1]) in wanted]
+    if not files:
+        raise FileNotFoundError(f"No partitions under {root}" + (f" for seasons {sorted(wanted)}" if seasons else ""))
+
+    # union of the columns across seasons (e.g. transfers_in only exists in some); pandas metadata
+    # differs per file, so drop it and let arrow types drive the conversion
+    # (a count column can be int8 in one season and float32 in another that has missing values)
+    schema = pa.unify_schemas([pq.read_schema(f).remove_metadata() for f in files], promote_options="permissive")
+    schema = schema.append(pa.field("season", pa.int16()))
+    dataset_ = ds.dataset([str(f) for f in files], schema=schema, format="parquet",
+                          partitioning=ds.partitioning(pa.schema([("season", pa.int16())]), flavor="hive"),
+                          partition_base_dir=str(root))
+
+    cols = None
+    if columns is not None:
+        cols = [c for c in columns if c != "season" and c in schema.names] + ["season"]
+    flt = None
+    if gw_min is not None:
+        flt = ds.field("gw") >= gw_min
+    if gw_max is not None:
+        cond = ds.field("gw") <= gw_max
+        flt = cond if flt is None else flt & cond
+
+    df = dataset_.to_table(columns=cols, filter=flt).to_pandas()
+    return apply_schema(df)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Season-partitioned Parquet store for the player panels.")
+    ap.add_argument("--store", default=STORE_DIR, help="Store root (default: %(default)s)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="Load panel CSVs into the store")
+    imp.add_argument("csv", nargs="+")
+    imp.add_argument("--dataset", default=RAW)
+    imp.add_argument("--season", type=int, default=None, help="Season tag if the CSV has no season column")
+    info = sub.add_parser("info", help="List datasets and seasons in the store")
+    info.add_argument("--dataset", default=None)
+    mem = sub.add_parser("memory", help="Memory per column of panel CSVs: plain read_csv vs the schema")
+    mem.add_argument("csv", nargs="+")
+    args = ap.parse_args()
+
+    if args.cmd == "import":
+        for path in args.csv:
+            df = read_panel_csv(path)
+            for out in write_panel(df, args.store, args.dataset, season=args.season):
+                print(f"[OK] {path} -> {out}")
+    elif args.cmd == "memory":
+        plain = pd.concat([pd.read_csv(p, low_memory=False) for p in args.csv], ignore_index=True)
+        compact = apply_schema(pd.concat([read_panel_csv(p) for p in args.csv], ignore_index=True))
+        rep = memory_report(compact, plain)
+        total = rep.loc["TOTAL"]
+        rep["bytes"] = rep["bytes"] / 1e3
+        rep["baseline_bytes"] = rep["baseline_bytes"] / 1e3
+        print(rep.rename(columns={"bytes": "kB", "baseline_bytes": "read_csv kB", "baseline_dtype": "read_csv dtype"})
+              .to_string(float_format=lambda v: f"{v:.1f}"))
+        print(f"[INFO] {len(compact):,} rows: {total['baseline_bytes'] / 1e6:.1f} MB -> {total['bytes'] / 1e6:.1f} MB"
+              f" ({total['factor']:.1f}x smaller)")
+    else:
+        names = [args.dataset] if args.dataset else sorted(p.name for p in Path(args.store).iterdir() if p.is_dir())
+        for name in names:
+            print(f"{name}: seasons {list_seasons(args.store, name)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+One command for the whole refresh: fetch -> merge -> consolidate -> features -> train -> predict -> pick.
+
+Every stage declares the files / folders it reads and writes. A stage is skipped when the hash of
+  - its inputs (file contents),
+  - its code (the source of the modules it runs) and
+  - its parameters (from CONFIG / --config)
+matches the one recorded when it last ran and its outputs are still what it wrote. Downstream stages
+rerun only when an upstream one actually changed their inputs. Stages with no path between them
+(fetch and the per-season merges) run in parallel.
+
+File hashes are remembered with each file's size and mtime, so an unchanged file is never read again
+and a run where nothing changed only stats the inputs (no pandas / xgboost import at all).
+The fetch stage has no local inputs: it reruns once per `refresh_hours` window, or with --force fetch.
+
+State (hashes, last key per stage) lives in <store>/_pipeline/state.json.
+
+Usage:
+  python pipeline.py                          # run what is out of date
+  python pipeline.py --dry-run                # list the stages that would run
+  python pipeline.py --force train            # rerun a stage even if its key is unchanged
+  python pipeline.py --skip fetch             # offline: use the panels already in the store
+  python pipeline.py --config pipeline.json   # override CONFIG (paths, seasons to merge, ...)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+from file_hashes import Hashes
+
+ROOT = Path(__file__).resolve().parent
+# same default as panel_store.STORE_DIR; not imported from there, pandas alone takes ~0.5s to import
+STORE_DIR = os.environ.get("FPL_STORE", r"C:\Users\Asus\Desktop\fpl_data\archive\store")
+ARCHIVE = r"C:\Users\Asus\Desktop\fpl_data\archive"
+
+# ---------- CONFIG ----------
+CONFIG = {
+    "store": STORE_DIR,
+    "workers": 4,  # stages run at the same time
+    "fetch": {
+        "output": ARCHIVE + r"\players2526_panel.csv",
+        "api": None,            # None: the real FPL API (data_loader.API)
+        "refresh_hours": 6,     # refetch at most once per window; 0: only with --force fetch
+        "incremental": True,
+        "workers": 8,
+        "rate": 20.0,
+        "cache_dir": ".fpl_cache",
+    },
+    # past seasons, merged from the per-player GW folders (run_merge.py)
+    "merge": {
+        "2324": {"root": ARCHIVE + r"\players2324_weeklydata", "demo": ARCHIVE + r"\players_panel_format.csv",
+                 "output": ARCHIVE + r"\players_2324_panel.csv", "glob": "**/*.csv", "workers": 1},
+        "2425": {"root": ARCHIVE + r"\players2425_weeklydata", "demo": ARCHIVE + r"\players_2425_panel_demo.csv",
+                 "output": ARCHIVE + r"\players_2425_panel.csv", "glob": "**/*.csv", "workers": 1},
+    },
+    "models": None,  # None: <store>/models, as model.py
+    "predictions": ARCHIVE + r"\curr_gw_predictions.csv",
+    "squad": ARCHIVE + r"\curr_gw_team.csv",
+}
+# ---------------------------
+
+RAW, CONSOLIDATED, ENGINEERED = "panels", "all_panels", "all_panels_engineered"  # panel_store / model.py names
+FIXTURES, TEAM_TABLES = "fixtures", ["team_strength", "team_fixtures"]  # data_loader.py / team_strength.py
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[], None]
+    inputs: List[str]
+    outputs: List[str]
+    code: List[str]                      # modules (file names under ROOT) whose source is part of the key
+    params: dict = field(default_factory=dict)
+    deps: List[str] = field(default_factory=list)  # filled in by link()
+
+
+def stage_key(stage: Stage, hashes: Hashes) -> str:
+    key = {
+        "params": stage.params,
+        "code": {m: hashes.path(str(ROOT / m)) for m in stage.code},
+        "inputs": {p: hashes.path(p) for p in stage.inputs},
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _overlaps(a: str, b: str) -> bool:
+    a, b = os.path.abspath(a), os.path.abspath(b)
+    return a == b or a.startswith(b + os.sep) or b.startswith(a + os.sep)
+
+
+def link(stages: List[Stage]) -> List[Stage]:
+    """A stage depends on every earlier stage that writes something it reads."""
+    for i, stage in enumerate(stages):
+        stage.deps = [s.name for s in stages[:i]
+                      if any(_overlaps(out, inp) for out in s.outputs for inp in stage.inputs)]
+    return stages
+
+
+#----------
+#stages (imports are local: a run that skips everything never loads pandas / xgboost)
+def _fetch(p: dict, store: str) -> None:
+    from data_loader import refresh
+    from fpl_fetch import FetchConfig
+    kwargs = {"api": p["api"]} if p.get("api") else {}
+    refresh(p["output"], config=FetchConfig(workers=p["workers"], rate=p["rate"]), incremental=p["incremental"],
+            cache_dir=p.get("cache_dir"), store=store, **kwargs)
+
+
+def _merge(p: dict, store: str, season: int) -> None:
+    from merge_fpl_gw_to_panel import merge_folder
+    from panel_store import write_panel
+    panel = merge_folder(root=p["root"], demo_csv=p.get("demo"), csv_glob=p["glob"], workers=p["workers"])
+    Path(p["output"]).parent.mkdir(parents=True, exist_ok=True)
+    panel.to_csv(p["output"], index=False)
+    write_panel(panel, store, RAW, season=season)
+    print(f"[INFO] merge {season}: {panel.shape}")
+
+
+def _consolidate(store: str) -> None:
+    from feature_engineering import consolidate
+    consolidate(store)
+
+
+def _features(store: str) -> None:
+    import model
+    model.engineer(model.load_data(store), store)
+
+
+def _matrices(store: str):
+    import model
+    df = model.engineer(model.load_data(store), store)
+    if model.matrix_cache:
+        return model.matrices(df, store)
+    train_df, test_df = model.split(df)
+    return (train_df, test_df) + model.design_matrices(train_df, test_df)
+
+
+def _train(store: str, models: str) -> None:
+    import model
+    if model.external_memory:
+        model.engineer(model.load_data(store), store)
+        model.train_out_of_core(store, models)
+        return
+    train_df, _, X_train, y_train, _, _, period = _matrices(store)
+    model.train(X_train, y_train, period, models, position=model.player_positions(train_df))
+
+
+def _predict(store: str, models: str, output: str) -> None:
+    import model
+    _, test_df, _, _, X_test, _, _ = _matrices(store)
+    test_df = model.predict(model.load_model(models), test_df, X_test)
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    test_df.sort_values("predicted_points_next", ascending=False).to_csv(output, index=False)
+    print(f"[Saved] Predictions -> {output}")
+
+
+def _pick(predictions: str, output: str) -> None:
+    import pandas as pd
+    import model
+    selection, squad = model.pick(pd.read_csv(predictions))
+    if squad.empty:
+        raise RuntimeError(f"no feasible team ({selection.status})")
+    model.show_squad(selection, squad)
+    squad.to_csv(output, index=False)
+    print(f"[Saved] Squad -> {output}")
+
+
+def build_stages(cfg: dict) -> List[Stage]:
+    store = cfg["store"]
+    models = cfg.get("models") or os.path.join(store, "models")
+    raw, consolidated, engineered = (os.path.join(store, d) for d in (RAW, CONSOLIDATED, ENGINEERED))
+    fixtures = os.path.join(store, FIXTURES)
+    team_tables = [os.path.join(store, d) for d in TEAM_TABLES]
+    model_files = [models]  # the single model or the per-position ones (model.py per_position_models)
+    model_code = ["model.py", "feature_store.py", "features.py", "team_strength.py", "panel_store.py", "matrix_cache.py",
+                  "external_training.py"]
+
+    fetch = cfg["fetch"]
+    hours = fetch.get("refresh_hours") or 0
+    window = int(time.time() // (hours * 3600)) if hours else 0
+    curr_season = 2526  # feature_engineering.CURR_SEASON: the season data_loader.py downloads
+    stages = [Stage("fetch", lambda: _fetch(fetch, store), [],
+                    [fetch["output"], os.path.join(raw, f"season={curr_season}"),
+                     os.path.join(fixtures, f"season={curr_season}")],
+                    ["data_loader.py", "fpl_fetch.py", "api_cache.py", "panel_store.py"],
+                    {**fetch, "window": window, "store": store})]
+    for season, p in sorted(cfg["merge"].items()):
+        stages.append(Stage(f"merge_{season}", lambda p=p, s=int(season): _merge(p, store, s),
+                            [p["root"]] + ([p["demo"]] if p.get("demo") else []),
+                            [p["output"], os.path.join(raw, f"season={int(season)}")],
+                            ["merge_fpl_gw_to_panel.py", "panel_store.py"], {**p, "store": store}))
+    stages += [
+        Stage("consolidate", lambda: _consolidate(store), [raw], [consolidated, os.path.join(store, "player_index")],
+              ["feature_engineering.py", "player_index.py", "panel_store.py"]),
+        Stage("features", lambda: _features(store), [consolidated, raw, fixtures], [engineered] + team_tables,
+              model_code),
+        Stage("train", lambda: _train(store, models), [consolidated, engineered] + team_tables, model_files,
+              model_code + ["model_store.py"]),
+        Stage("predict", lambda: _predict(store, models, cfg["predictions"]),
+              [consolidated, engineered] + team_tables + model_files,
+              [cfg["predictions"]], model_code + ["model_store.py"]),
+        Stage("pick", lambda: _pick(cfg["predictions"], cfg["squad"]), [cfg["predictions"]], [cfg["squad"]],
+              ["model.py", "squad_optimizer.py"]),
+    ]
+    return link(stages)
+
+
+#----------
+#runner
+def _load_state(path: Path) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {"stages": {}, "files": {}}
+
+
+def _save_state(path: Path, state: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh)
+    os.replace(tmp, path)
+
+
+def run_pipeline(stages: List[Stage], state_path: str, workers: int = 4, force: Sequence[str] = (),
+                 skip: Sequence[str] = (), dry_run: bool = False) -> List[dict]:
+    """
+    Run the stages that are out of date, independent ones in parallel. One record per stage:
+    action is "ran", "skipped" (up to date / --skip), "failed" or "blocked" (an upstream stage failed);
+    with dry_run, "would run" / "up to date".
+    """
+    state_path = Path(state_path)
+    state = _load_state(state_path)
+    hashes = Hashes(state.get("files"))
+    done = state.setdefault("stages", {})
+    lock = threading.Lock()
+    results: Dict[str, dict] = {}
+
+    def up_to_date(stage: Stage, key: str) -> bool:
+        rec = done.get(stage.name)
+        return (rec is not None and rec["key"] == key and stage.name not in force
+                and all(hashes.path(p) == d for p, d in rec["outputs"].items()))
+
+    def execute(stage: Stage) -> dict:
+        t0 = time.perf_counter()
+        if stage.name in skip:
+            return {"action": "skipped", "reason": "--skip"}
+        key = stage_key(stage, hashes)
+        if up_to_date(stage, key):
+            return {"action": "skipped", "reason": "up to date"}
+        if dry_run:
+            return {"action": "would run"}
+        print(f"[INFO] {stage.name}: running")
+        stage.fn()
+        outputs = {p: hashes.path(p) for p in stage.outputs}
+        # the key is taken again after the run: a stage may rewrite a file it also reads
+        with lock:
+            done[stage.name] = {"key": stage_key(stage, hashes), "outputs": outputs, "finished": time.time(),
+                                "seconds": time.perf_counter() - t0}
+        return {"action": "ran"}
+
+    pending = {s.name: s for s in stages}
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                deps = [results.get(d, {}).get("action") for d in stage.deps]
+                if any(a in ("failed", "blocked") for a in deps):
+                    results[name] = {"action": "blocked", "seconds": 0.0}
+                    del pending[name]
+                elif dry_run and "would run" in deps:
+                    results[name] = {"action": "would run", "seconds": 0.0}  # its inputs are about to change
+                    del pending[name]
+                elif all(d in results for d in stage.deps):
+                    t0 = time.perf_counter()
+                    running[pool.submit(execute, stage)] = (name, t0)
+                    del pending[name]
+            if not running:
+                continue
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name, t0 = running.pop(fut)
+                try:
+                    results[name] = fut.result()
+                except Exception as e:  # the stages downstream of it are blocked, the others go on
+                    print(f"[FAIL] {name}: {type(e).__name__}: {e}")
+                    results[name] = {"action": "failed", "error": f"{type(e).__name__}: {e}"}
+                results[name]["seconds"] = time.perf_counter() - t0
+
+    if not dry_run:
+        state["files"] = hashes.used  # only files still in use; the rest drop out
+        _save_state(state_path, state)
+    return [{"stage": s.name, **results[s.name]} for s in stages]
+
+
+def _merge_config(base: dict, override: dict) -> dict:
+    out = dict(base)
+    for k, v in override.items():
+        out[k] = {**base[k], **v} if isinstance(v, dict) and isinstance(base.get(k), dict) and k != "merge" else v
+    return out
+
+
+def main():
+    t0 = time.perf_counter()
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--config", default=None, help="JSON file overriding CONFIG (sections are merged, 'merge' replaced)")
+    ap.add_argument("--store", default=None, help="Panel store (default: CONFIG / FPL_STORE)")
+    ap.add_argument("--workers", type=int, default=None, help="Stages run at the same time")
+    ap.add_argument("--force", default="", help="Comma separated stages to rerun regardless of their key")
+    ap.add_argument("--skip", default="", help="Comma separated stages not to run (e.g. fetch when offline)")
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+
+    cfg = CONFIG
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as fh:
+            cfg = _merge_config(cfg, json.load(fh))
+    if args.store:
+        cfg = {**cfg, "store": args.store}
+    stages = build_stages(cfg)
+    names = {s.name for s in stages}
+    force = [s for s in args.force.split(",") if s]
+    skip = [s for s in args.skip.split(",") if s]
+    unknown = set(force + skip) - names
+    if unknown:
+        ap.error(f"unknown stage(s) {sorted(unknown)}; stages: {', '.join(s.name for s in stages)}")
+
+    results = run_pipeline(stages, os.path.join(cfg["store"], "_pipeline", "state.json"),
+                           args.workers or cfg["workers"], force, skip, args.dry_run)
+    print(f"\n{'stage':<14}{'action':<12}{'seconds':>9}  reason")
+    for r in results:
+        print(f"{r['stage']:<14}{r['action']:<12}{r['seconds']:>9.2f}  {r.get('reason', r.get('error', ''))}")
+    ran = sum(r["action"] == "ran" for r in results)
+    print(f"[OK] {ran} of {len(results)} stages ran in {time.perf_counter() - t0:.2f}s")
+    if any(r["action"] in ("failed", "blocked") for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
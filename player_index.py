@@ -0,0 +1,243 @@
+"""
+Cross-season player identity index: (season, element) -> a stable player_id.
+
+FPL renumbers `element` every season and spells some names differently from one season to the next
+("Alisson Ramses Becker" / "Alisson Becker", "Min-Hyeok Yang" / "Yang Min-Hyeok"). The index gives
+every (season, element) a player_id that stays the same across seasons and runs:
+
+1. exact: the name key (accents stripped, casefolded, punctuation dropped, tokens sorted) matches a known
+   player; with several candidates the one with the same position, then the same team, then the most
+   recent season wins. A vectorized join over the new entries' distinct names.
+2. fuzzy, only for the entries step 1 left over: a known player whose name shares a token with the new one
+   and whose shorter name is fully covered by the other's tokens (tokens count as equal above
+   FUZZY_RATIO similarity), at least MIN_TOKENS of them, position not contradicting. Ties -> no match.
+3. anything else is a new player_id.
+
+A player_id is given to at most one element per season. Entries already in the index keep their id;
+update() only looks at the (season, element) pairs it has not seen, season by season, so a new
+gameweek costs nothing and a new season only matches its new players.
+
+Seasons 23/24 and 24/25 have no position / team in the panels; their entries match on names only.
+
+Layout (under the panel store):
+    player_index/index.parquet   <- season, element, player_id, full_name, key, position, team, match
+
+Usage:
+  python player_index.py update            # add the panels' new (season, element) pairs
+  python player_index.py update --rebuild  # start over (ids are reassigned)
+  python player_index.py show "Alisson"    # entries whose name contains the text
+"""
+
+import argparse
+import difflib
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from panel_store import RAW, STORE_DIR, _require_pyarrow, read_panel
+
+INDEX = "player_index"
+COLUMNS = ["season", "element", "player_id", "full_name", "key", "position", "team", "match"]
+FUZZY_RATIO = 0.85  # difflib ratio above which two name tokens are the same token ("bayndr" / "bayindir")
+MIN_TOKENS = 2      # a fuzzy match needs this many tokens in common (one shared first name is not enough)
+
+
+def name_keys(names: pd.Series) -> pd.Series:
+    """Matching key per row: accents stripped, casefolded, punctuation dropped, tokens sorted; one pass per distinct name."""
+    codes, uniques = pd.factorize(names.astype(str))
+    norm = (pd.Series(uniques, dtype=object).str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+            .str.casefold().str.replace("'", "", regex=False).str.replace(r"[^a-z0-9]+", " ", regex=True))
+    keys = np.array([" ".join(sorted(n.split())) for n in norm], dtype=object)
+    return pd.Series(keys[codes], index=names.index)
+
+
+def players(panel: pd.DataFrame) -> pd.DataFrame:
+    """One row per (season, element): name, position and team from its latest gameweek."""
+    cols = [c for c in ["position", "team_name_current"] if c in panel.columns]
+    df = panel[["season", "element", "gw", "full_name"] + cols]
+    df = df.sort_values(["season", "element", "gw"], kind="mergesort").drop_duplicates(["season", "element"], keep="last")
+    out = pd.DataFrame({
+        "season": df["season"].astype("int16").to_numpy(),
+        "element": df["element"].astype("int32").to_numpy(),
+        "full_name": df["full_name"].astype(str).str.strip().to_numpy(),
+        "position": df["position"].astype(object).to_numpy() if "position" in cols else None,
+        "team": df["team_name_current"].astype(object).to_numpy() if "team_name_current" in cols else None,
+    })
+    out["key"] = name_keys(out["full_name"])
+    return out.reset_index(drop=True)
+
+
+def _same(a: pd.Series, b: pd.Series) -> np.ndarray:
+    return (a.notna() & b.notna() & (a.astype(object) == b.astype(object))).to_numpy()
+
+
+def _tokens_cover(short: List[str], long: List[str]) -> int:
+    """How many tokens of `short` have a (near-)equal token in `long`, each used once; -1 if one has none."""
+    free = list(long)
+    for tok in short:
+        if tok in free:
+            free.remove(tok)
+            continue
+        near = [t for t in free if t[0] == tok[0] and difflib.SequenceMatcher(None, tok, t).ratio() >= FUZZY_RATIO]
+        if not near:
+            return -1
+        free.remove(near[0])
+    return len(short)
+
+
+class PlayerIndex:
+    def __init__(self, store: str = STORE_DIR, dataset: str = INDEX):
+        self.path = Path(store) / dataset / "index.parquet"
+
+    def load(self) -> pd.DataFrame:
+        if not self.path.exists():
+            return pd.DataFrame({c: pd.Series(dtype=t) for c, t in
+                                 zip(COLUMNS, ["int16", "int32", "int32"] + ["object"] * 5)})
+        return pd.read_parquet(self.path)
+
+    def save(self, index: pd.DataFrame) -> None:
+        _require_pyarrow()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".parquet.tmp")
+        index[COLUMNS].to_parquet(tmp, index=False)
+        os.replace(tmp, self.path)
+
+    # ---------- matching ----------
+    @staticmethod
+    def _known(index: pd.DataFrame) -> pd.DataFrame:
+        """One row per (player_id, key): its latest season, position and team."""
+        known = index.sort_values(["player_id", "season"], kind="mergesort")
+        return known.drop_duplicates(["player_id", "key"], keep="last")[["player_id", "key", "season", "position", "team"]]
+
+    @staticmethod
+    def _exact(new: pd.DataFrame, known: pd.DataFrame, taken: set) -> pd.Series:
+        cand = new.reset_index().merge(known, on="key", suffixes=("", "_known"))
+        cand = cand[~cand["player_id"].isin(taken)]
+        if cand.empty:
+            return pd.Series(dtype="float64")
+        cand["score"] = (_same(cand["position"], cand["position_known"]) * 4
+                         + _same(cand["team"], cand["team_known"]) * 2).astype(int)
+        cand = cand.sort_values(["index", "score", "season_known"], ascending=[True, False, False], kind="mergesort")
+        best = cand.drop_duplicates("index")
+        # an id goes to one element per season: the best-scoring claimant keeps it
+        best = best.sort_values(["score", "index"], ascending=[False, True], kind="mergesort")
+        best = best.drop_duplicates("player_id")
+        return best.set_index("index")["player_id"]
+
+    @staticmethod
+    def _fuzzy(new: pd.DataFrame, known: pd.DataFrame, taken: set) -> Dict[int, int]:
+        known = known[~known["player_id"].isin(taken)]
+        by_token: Dict[str, set] = {}
+        toks = {}
+        for i, key in zip(known.index, known["key"]):
+            toks[i] = key.split()
+            for t in toks[i]:
+                by_token.setdefault(t, set()).add(i)
+        out, claimed = {}, set()
+        for idx, row in new.iterrows():
+            mine = row["key"].split()
+            scored = {}
+            for j in set().union(*(by_token.get(t, set()) for t in mine)):
+                k = known.loc[j]
+                if pd.notna(row["position"]) and pd.notna(k["position"]) and row["position"] != k["position"]:
+                    continue
+                short, long = sorted([mine, toks[j]], key=len)
+                covered = _tokens_cover(short, long)
+                if covered < MIN_TOKENS:
+                    continue
+                score = (covered / len(long), bool(pd.notna(row["team"]) and row["team"] == k["team"]))
+                pid = int(k["player_id"])
+                scored[pid] = max(scored.get(pid, score), score)
+            if not scored:
+                continue
+            ranked = sorted(scored.items(), key=lambda kv: kv[1], reverse=True)
+            if len(ranked) > 1 and ranked[0][1] == ranked[1][1]:
+                continue  # two players fit equally well: do not guess
+            if ranked[0][0] not in claimed:
+                out[idx] = ranked[0][0]
+                claimed.add(ranked[0][0])
+        return out
+
+    def update(self, panel: pd.DataFrame, rebuild: bool = False) -> Tuple[pd.DataFrame, dict]:
+        """Add the panel's unseen (season, element) pairs; returns (index, counts per match kind)."""
+        index = self.load() if not rebuild else self.load().iloc[0:0]
+        entries = players(panel)
+        seen = entries.merge(index[["season", "element"]], on=["season", "element"], how="left", indicator=True)
+        new_all = entries[(seen["_merge"] == "left_only").to_numpy()]
+        counts = {"exact": 0, "fuzzy": 0, "new": 0}
+        if new_all.empty:
+            return index, counts
+
+        next_id = int(index["player_id"].max()) + 1 if len(index) else 1
+        parts = [index]
+        for season, new in new_all.groupby("season", sort=True):
+            known = self._known(pd.concat(parts, ignore_index=True))
+            new = new.reset_index(drop=True).copy()
+            taken = set(pd.concat(parts, ignore_index=True).query("season == @season")["player_id"])
+            new["player_id"] = self._exact(new, known, taken).reindex(new.index)
+            new["match"] = np.where(new["player_id"].notna(), "exact", None)
+
+            rest = new[new["player_id"].isna()]
+            if len(rest):
+                taken |= set(new["player_id"].dropna().astype(int))
+                fuzzy = self._fuzzy(rest, known, taken)
+                new.loc[list(fuzzy), "player_id"] = list(fuzzy.values())
+                new.loc[list(fuzzy), "match"] = "fuzzy"
+
+            fresh = new["player_id"].isna()
+            new.loc[fresh, "player_id"] = np.arange(next_id, next_id + int(fresh.sum()))
+            new.loc[fresh, "match"] = "new"
+            next_id += int(fresh.sum())
+            new["player_id"] = new["player_id"].astype("int32")
+            for kind in counts:
+                counts[kind] += int((new["match"] == kind).sum())
+            parts.append(new[COLUMNS])
+
+        index = pd.concat(parts, ignore_index=True).sort_values(["season", "element"], kind="mergesort")
+        index = index.reset_index(drop=True)
+        self.save(index)
+        return index, counts
+
+
+def assign_players(panel: pd.DataFrame, index: pd.DataFrame) -> pd.DataFrame:
+    """element -> player_id and full_name -> the player's name in their latest season (vectorized join)."""
+    ids = index[["season", "element", "player_id"]]
+    latest = index.sort_values("season", kind="mergesort").drop_duplicates("player_id", keep="last")
+    names = pd.Series(latest["full_name"].to_numpy(), index=latest["player_id"].to_numpy())
+    keys = pd.MultiIndex.from_arrays([panel["season"].astype("int16"), panel["element"].astype("int32")])
+    pid = pd.Series(ids["player_id"].to_numpy(), index=pd.MultiIndex.from_frame(ids[["season", "element"]]))
+    pid = pid.reindex(keys).to_numpy()
+    if np.isnan(pid.astype(float)).any():
+        raise ValueError("panel has (season, element) pairs the index does not know; run update() first")
+    panel = panel.copy()
+    panel["element"] = pid.astype("int32")
+    panel["full_name"] = pd.Categorical(names.reindex(pid).to_numpy())
+    return panel
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("command", choices=["update", "show"])
+    ap.add_argument("name", nargs="?", help="show: text to look for in the names")
+    ap.add_argument("--store", default=STORE_DIR)
+    ap.add_argument("--rebuild", action="store_true", help="update: ignore the saved index")
+    args = ap.parse_args()
+
+    idx = PlayerIndex(args.store)
+    if args.command == "update":
+        index, counts = idx.update(read_panel(args.store, RAW, columns=["element", "gw", "full_name", "position",
+                                                                        "team_name_current"]), rebuild=args.rebuild)
+        print(f"[OK] {len(index)} entries, {index['player_id'].nunique()} players; added: "
+              + ", ".join(f"{v} {k}" for k, v in counts.items()) + f" -> {idx.path}")
+    else:
+        index = idx.load()
+        hits = index[index["player_id"].isin(index.loc[index["full_name"].str.contains(args.name or "", case=False),
+                                                        "player_id"])]
+        print(hits.sort_values(["player_id", "season"]).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Per-position models for model.py: one XGBoost model each for goalkeepers, defenders, midfielders and
+forwards, trained at the same time in a process pool.
+
+Points come from different rules per position (clean sheets are worth 4 to a defender and 1 to a
+midfielder, a goal 6 / 5 / 4 ...), which one model only sees through the position dummies. Here:
+
+- every training row is routed by its player's position; 23/24 and 24/25 have no position column,
+  so those rows take the position the player has in the seasons that do (element is the player's id
+  across seasons, player_index.py). Rows whose player never has one are left out.
+- the feature matrix is written once as float32 .npy, rows grouped by position, and memory-mapped
+  read-only by every worker: a position's rows are one contiguous slice, so no worker gets a copy of
+  the matrix through the pool (XGBoost still builds its own DMatrix from the slice).
+- cores are split between the workers (n_jobs = cores // workers).
+- each model goes through model_store.fit_or_load under its own name (xgb_points_<position>), so
+  loading / warm starts work per position as for the single model.
+- PositionModels.predict routes rows by position; a row with no position or no model gets NaN.
+
+benchmarks/bench_position_models.py compares RMSE / MAE and wall time with the single model.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from model_store import MODEL_NAME, ModelStore, fit_or_load
+from squad_optimizer import POSITIONS
+
+MIN_ROWS = 200  # positions with fewer training rows get no model
+
+
+def model_name(position: str) -> str:
+    return f"{MODEL_NAME}_{position.lower()}"
+
+
+def player_positions(df: pd.DataFrame) -> pd.Series:
+    """Each row's position, filled in from the player's other rows where the season has none."""
+    position = df["position"].astype(object).where(df["position"].notna()) if "position" in df.columns \
+        else pd.Series(np.nan, index=df.index, dtype=object)
+    known = pd.DataFrame({"element": df["element"].to_numpy(), "position": position.to_numpy(),
+                          "season": df["season"].to_numpy()})
+    latest = known.dropna(subset=["position"]).sort_values("season", kind="mergesort")
+    latest = latest.drop_duplicates("element", keep="last").set_index("element")["position"]
+    filled = latest.reindex(df["element"].to_numpy()).to_numpy()
+    return position.where(position.notna(), pd.Series(filled, index=df.index))
+
+
+@dataclass
+class PositionModels:
+    models: Dict[str, xgb.XGBRegressor]
+
+    def predict(self, X: pd.DataFrame, position: pd.Series) -> np.ndarray:
+        out = np.full(len(X), np.nan, dtype=np.float32)
+        position = np.asarray(position, dtype=object)
+        for pos, model in self.models.items():
+            rows = np.flatnonzero(position == pos)
+            if len(rows):
+                out[rows] = model.predict(X.iloc[rows])
+        return out
+
+    @classmethod
+    def load(cls, root: str) -> "PositionModels":
+        models = {}
+        for pos in POSITIONS:
+            store = ModelStore(root, model_name(pos))
+            if store.model_path.exists():
+                models[pos] = store.load_model()
+        if not models:
+            raise FileNotFoundError(f"no per-position models under {root}")
+        return cls(models)
+
+
+#----------
+#process pool: every worker memory-maps the matrix once
+_X: Optional[np.ndarray] = None
+_y: Optional[np.ndarray] = None
+_period: Optional[np.ndarray] = None
+
+
+def _open(x_path: str, y_path: str, period_path: str) -> None:
+    global _X, _y, _period
+    _X = np.load(x_path, mmap_mode="r")
+    _y = np.load(y_path, mmap_mode="r")
+    _period = np.load(period_path, mmap_mode="r")
+
+
+def _close() -> None:
+    global _X, _y, _period
+    _X = _y = _period = None
+
+
+def _fit(pos: str, a: int, b: int, features: List[str], params: dict, root: str, warm_rounds: int,
+         max_warm_starts: int, retrain: bool) -> Tuple[str, xgb.XGBRegressor, dict]:
+    X = pd.DataFrame(_X[a:b], columns=features)
+    y = pd.Series(_y[a:b])
+    fitted, report = fit_or_load(xgb.XGBRegressor(**params), X, y, _period[a:b], root, name=model_name(pos),
+                                 warm_rounds=warm_rounds, max_warm_starts=max_warm_starts, retrain=retrain)
+    return pos, fitted, {**report, "rows": b - a}
+
+
+def train_by_position(X: pd.DataFrame, y: pd.Series, period: pd.Series, position: pd.Series, root: str,
+                      params: dict, workers: int = 4, warm_rounds: int = 50, max_warm_starts: int = 5,
+                      retrain: bool = False, tmp_dir: Optional[str] = None) -> Tuple[PositionModels, dict]:
+    """
+    Fit (or load / warm-start) one model per position with `params`, `workers` at a time; returns the
+    models and a report {"seconds", "action", "trees", "positions": {position: fit_or_load report}}.
+    `position` is per row of X (player_positions); rows without one are not used.
+    """
+    t0 = time.perf_counter()
+    position = np.asarray(position, dtype=object)
+    groups = [(pos, np.flatnonzero(position == pos)) for pos in POSITIONS]
+    groups = [(pos, rows) for pos, rows in groups if len(rows) >= MIN_ROWS]
+    if not groups:
+        raise ValueError("no position has enough training rows")
+    order = np.concatenate([rows for _, rows in groups])
+    bounds, start = [], 0
+    for pos, rows in groups:
+        bounds.append((pos, start, start + len(rows)))
+        start += len(rows)
+
+    workers = max(1, min(workers, len(groups)))
+    params = {**params, "n_jobs": max(1, (os.cpu_count() or 1) // workers)}
+    features = list(X.columns)
+    work = tempfile.mkdtemp(prefix="fpl_positions_", dir=tmp_dir)
+    models, reports = {}, {}
+    try:
+        paths = [os.path.join(work, f) for f in ("X.npy", "y.npy", "period.npy")]
+        np.save(paths[0], np.ascontiguousarray(X.to_numpy(dtype=np.float32)[order]))
+        np.save(paths[1], y.to_numpy(dtype=np.float32)[order])
+        np.save(paths[2], np.asarray(period)[order])
+        args = [(pos, a, b, features, params, root, warm_rounds, max_warm_starts, retrain) for pos, a, b in bounds]
+        if workers == 1:
+            _open(*paths)
+            results = [_fit(*a) for a in args]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_open, initargs=tuple(paths)) as pool:
+                futures = [pool.submit(_fit, *a) for a in args]
+                results = [fut.result() for fut in as_completed(futures)]
+    finally:
+        _close()  # drop the memmaps before the files go (Windows will not delete mapped files)
+        shutil.rmtree(work, ignore_errors=True)
+
+    for pos, fitted, report in results:
+        models[pos] = fitted
+        reports[pos] = report
+    actions = sorted({r["action"] for r in reports.values()})
+    summary = {"seconds": time.perf_counter() - t0, "action": "/".join(actions), "workers": workers,
+               "trees": sum(r["trees"] for r in reports.values()),
+               "positions": {pos: reports[pos] for pos in POSITIONS if pos in reports}}
+    return PositionModels({pos: models[pos] for pos in POSITIONS if pos in models}), summary
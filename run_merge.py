@@ -1,4 +1,5 @@
 from merge_fpl_gw_to_panel import merge_folder
+from panel_store import RAW, STORE_DIR, write_panel
 
 # panel2425 = merge_folder(
 #     root=r"C:\Users\Asus\Desktop\fpl_data\archive\players2425_weeklydata",
@@ -6,6 +7,7 @@ from merge_fpl_gw_to_panel import merge_folder
 #     csv_glob="**/*.csv"  # change if your files have a special pattern
 # )
 # panel2425.to_csv(r"C:\Users\Asus\Desktop\fpl_data\archive\players_2425_panel.csv", index=False)
+# write_panel(panel2425, STORE_DIR, RAW, season=2425)
 # print(panel2425.shape)  # rows, cols
 
 panel2324 = merge_folder(
@@ -14,6 +16,7 @@ panel2324 = merge_folder(
     csv_glob="**/*.csv"  # change if your files have a special pattern
 )
 panel2324.to_csv(r"C:\Users\Asus\Desktop\fpl_data\archive\players_2324_panel.csv", index=False)
+write_panel(panel2324, STORE_DIR, RAW, season=2324)  # what feature_engineering.py reads
 print(panel2324.shape)  # rows, cols
 
 
@@ -0,0 +1,371 @@
+"""
+Long-lived squad selection service for what-if edits: the prediction pool stays loaded, indexed by
+position, club and name, and an edit (lock / unlock a player, ban a player or a club, budget,
+formation, club cap) comes back as a new squad in tens of milliseconds instead of a model.py rerun.
+
+- a request is applied to the session's previous request (or the defaults, as model.py's CONFIG),
+  so {"ban_club": ["Arsenal"]} is "my last constraints, without Arsenal"
+- warm start from the session's previous solution: an edit that only tightens the problem (lower
+  budget or club cap, more locked / banned players or clubs, same formation) and that the previous
+  squad still satisfies gets that squad back without a solve, it is still optimal. scipy's milp
+  takes no MIP start, so every other edit is solved again, on a smaller problem:
+- banned players / clubs are left out and the dominated players dropped (squad_optimizer.dominated,
+  ~740 -> ~200 players, same optimum); the MILP is then solved with HiGHS' presolve off
+- solved requests are kept in an LRU cache (CACHE_SIZE) until the pool is reloaded
+- one service answers concurrent clients (ThreadingHTTPServer). HiGHS releases the GIL, but at most
+  `workers` (default: the cores) solves run at a time, so the others queue instead of sharing the
+  cores and cache hits / reused squads are not stuck behind them; a reload swaps the pool whole
+  (benchmarks/bench_selection_service.py: latency under N concurrent clients)
+
+HTTP (JSON):
+  POST /solve   {"session": "me", "budget": 98.5, "formation": "4-4-2", "lock": ["Haaland"], "ban_club": ["Arsenal"]}
+                also "unlock", "ban", "unban", "unban_club", "max_per_team", "squad_size" (null: XI only)
+                and "locked" / "banned" / "banned_clubs" to replace the lists
+  GET  /pool?position=Defender&club=Arsenal&top=10
+  POST /reload  re-read the predictions file
+
+Usage:
+  python selection_service.py --predictions curr_gw_predictions.csv --port 8765
+  curl -s -d '{"lock": ["Haaland"], "budget": 99}' http://127.0.0.1:8765/solve
+  (python fplpredict.py serve --gw 7 serves that GW's cached predictions)
+In process:
+  service = SelectionService.from_csv("curr_gw_predictions.csv")
+  answer = service.solve({"ban_club": ["Arsenal"]}, session="me")
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, FrozenSet, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from squad_optimizer import POSITIONS, SQUAD_SIZE, Selection, dominated, pick_squad, selectable
+
+CACHE_SIZE = 256
+COLUMNS = ["element", "full_name", "position", "team_name_current", "price_now", "predicted_points_next"]
+SHOW = ["full_name", "position", "team_name_current", "price_now", "predicted_points_next"]
+# model.py's CONFIG defaults: 3-4-3, 100.0 for the squad, 3 per club
+FORMATION = (1, 3, 4, 3)
+BUDGET = 100.0
+MAX_PER_TEAM = 3
+# list edits: key -> (field, add or remove)
+EDITS = {"lock": ("locked", True), "unlock": ("locked", False), "ban": ("banned", True),
+         "unban": ("banned", False), "ban_club": ("banned_clubs", True), "unban_club": ("banned_clubs", False)}
+
+
+def _counts(value) -> Optional[Tuple[int, ...]]:
+    """Per-position counts from {"Defender": 4, ...}, "4-4-2" (1 GK implied), "1-4-4-2" or None."""
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        unknown = set(value) - set(POSITIONS)
+        if unknown:
+            raise ValueError(f"unknown positions: {sorted(unknown)}")
+        return tuple(int(value.get(p, 0)) for p in POSITIONS)
+    counts = tuple(int(k) for k in str(value).split("-"))
+    if len(counts) == 3:
+        counts = (1,) + counts
+    if len(counts) != len(POSITIONS):
+        raise ValueError(f"formation must be GK-DEF-MID-FWD or DEF-MID-FWD, got {value!r}")
+    return counts
+
+
+@dataclass(frozen=True)
+class Request:
+    formation: Optional[Tuple[int, ...]] = FORMATION  # starters per POSITIONS; None: any legal formation
+    budget: float = BUDGET
+    max_per_team: int = MAX_PER_TEAM
+    squad_size: Optional[Tuple[int, ...]] = tuple(SQUAD_SIZE[p] for p in POSITIONS)  # None: XI only
+    locked: FrozenSet[str] = frozenset()
+    banned: FrozenSet[str] = frozenset()
+    banned_clubs: FrozenSet[str] = frozenset()
+
+    def edit(self, changes: dict) -> "Request":
+        """This request with `changes` applied (the /solve body without "session")."""
+        out = {}
+        for key, value in changes.items():
+            if key in ("formation", "squad_size"):
+                out[key] = _counts(value)
+            elif key == "budget":
+                out[key] = float(value)
+            elif key == "max_per_team":
+                out[key] = int(value)
+            elif key in ("locked", "banned", "banned_clubs"):
+                out[key] = frozenset(map(str, value))
+            elif key not in EDITS:
+                raise ValueError(f"unknown field {key!r}")
+        req = replace(self, **out)
+        for key, (name, add) in EDITS.items():
+            names = frozenset(map(str, changes.get(key, ())))
+            if not names:
+                continue
+            req = replace(req, **{name: getattr(req, name) | names if add else getattr(req, name) - names})
+            if add and name == "locked":  # locking a banned player unbans them, and the other way round
+                req = replace(req, banned=req.banned - names)
+            elif add and name == "banned":
+                req = replace(req, locked=req.locked - names)
+        return req
+
+    def tightens(self, other: "Request") -> bool:
+        """Every squad this request allows, `other` allows too."""
+        return (self.formation == other.formation and self.squad_size == other.squad_size
+                and self.budget <= other.budget and self.max_per_team <= other.max_per_team
+                and self.locked >= other.locked and self.banned >= other.banned
+                and self.banned_clubs >= other.banned_clubs)
+
+    def to_json(self) -> dict:
+        return {"formation": None if self.formation is None else dict(zip(POSITIONS, self.formation)),
+                "budget": self.budget, "max_per_team": self.max_per_team,
+                "squad_size": None if self.squad_size is None else dict(zip(POSITIONS, self.squad_size)),
+                "locked": sorted(self.locked), "banned": sorted(self.banned), "banned_clubs": sorted(self.banned_clubs)}
+
+
+@dataclass
+class Answer:
+    selection: Selection
+    request: Request
+    source: str        # "solve", "previous" (the session's last squad, still optimal) or "cache"
+    candidates: int    # players in the MILP, 0 when nothing was solved
+    seconds: float
+    version: int = 0   # pool version it was solved on
+
+    def to_json(self) -> dict:
+        squad = self.selection.squad
+        if len(squad):
+            squad = squad.sort_values(["starting", "position", "predicted_points_next"], ascending=[False, True, False])
+        captain = self.selection.captain
+        return {"status": self.selection.status, "feasible": bool(len(squad)),
+                "points": round(self.selection.points, 4), "cost": round(self.selection.cost, 1),
+                "captain": None if captain is None else captain["full_name"],
+                "squad": squad[[c for c in SHOW + ["starting", "captain"] if c in squad.columns]].to_dict("records"),
+                "source": self.source, "candidates": self.candidates, "ms": round(self.seconds * 1000, 2),
+                "request": self.request.to_json()}
+
+
+class Pool:
+    """The pickable rows of a predictions frame (squad_optimizer.selectable) as arrays + row indexes."""
+
+    def __init__(self, df: pd.DataFrame, version: int = 0):
+        self.frame = selectable(df)[[c for c in COLUMNS if c in df.columns]].reset_index(drop=True)
+        self.version = version
+        self.names = self.frame["full_name"].astype(str).to_numpy()
+        self.club = self.frame["team_name_current"].to_numpy()
+        position = self.frame["position"].astype(str).to_numpy()
+        self.by_position = {p: np.flatnonzero(position == p) for p in POSITIONS}
+        self.by_club = {c: np.flatnonzero(self.club == c) for c in np.unique(self.club)}
+        self.by_name = {n: i for i, n in enumerate(self.names)}
+
+    def rows(self, position: Optional[str] = None, club: Optional[str] = None, top: Optional[int] = None) -> pd.DataFrame:
+        """The pool's players of a position and / or club, best predicted first."""
+        idx = np.arange(len(self.frame))
+        if position:
+            idx = np.intersect1d(idx, self.by_position.get(position, idx[:0]))
+        if club:
+            idx = np.intersect1d(idx, self.by_club.get(club, idx[:0]))
+        out = self.frame.iloc[idx].sort_values("predicted_points_next", ascending=False)
+        return out.head(top) if top else out
+
+
+def _still_optimal(prev: Answer, req: Request) -> bool:
+    """prev's squad is optimal for req too: req only tightens prev's problem and the squad meets it."""
+    if not req.tightens(prev.request):
+        return False
+    squad = prev.selection.squad
+    if not len(squad):
+        return "infeasible" in prev.selection.status.lower()  # stays infeasible
+    names, clubs = set(squad["full_name"]), squad["team_name_current"]
+    return (prev.selection.cost <= req.budget + 1e-9 and clubs.value_counts().max() <= req.max_per_team
+            and req.locked <= names and not req.banned & names and not req.banned_clubs & set(clubs))
+
+
+#----------
+#service
+class SelectionService:
+    def __init__(self, predictions: pd.DataFrame, defaults: Request = Request(), cache_size: int = CACHE_SIZE,
+                 presolve: bool = False, workers: Optional[int] = None, path: Optional[str] = None):
+        self.defaults, self.cache_size, self.presolve, self.path = defaults, cache_size, presolve, path
+        self._lock = threading.Lock()
+        self._solving = threading.BoundedSemaphore(workers or os.cpu_count() or 1)
+        self._cache: "OrderedDict[Tuple[int, Request], Answer]" = OrderedDict()
+        self._sessions: Dict[str, Answer] = {}
+        self.pool = Pool(predictions)
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs) -> "SelectionService":
+        return cls(pd.read_csv(path), path=path, **kwargs)
+
+    def reload(self, predictions: Optional[pd.DataFrame] = None) -> Pool:
+        """New predictions (default: re-read the file): the cache is emptied, sessions keep their constraints."""
+        if predictions is None:
+            predictions = pd.read_csv(self.path)
+        pool = Pool(predictions, self.pool.version + 1)
+        with self._lock:
+            self.pool = pool
+            self._cache.clear()
+        return pool
+
+    def _check(self, pool: Pool, req: Request) -> None:
+        unknown = (req.locked | req.banned) - set(pool.by_name)
+        unknown |= {f"club {c}" for c in req.banned_clubs - set(pool.by_club)}
+        if unknown:
+            raise ValueError(f"not in the pool: {sorted(unknown)}")
+        clash = {n for n in req.locked if pool.club[pool.by_name[n]] in req.banned_clubs}
+        if clash:
+            raise ValueError(f"locked players of banned clubs: {sorted(clash)}")
+        if req.formation is not None and sum(req.formation) != 11:
+            raise ValueError(f"the formation has {sum(req.formation)} starters, not 11")
+
+    def _solve(self, pool: Pool, req: Request) -> Tuple[Selection, int]:
+        available = np.ones(len(pool.frame), dtype=bool)
+        for club in req.banned_clubs:
+            available[pool.by_club[club]] = False
+        available[[pool.by_name[n] for n in req.banned]] = False
+        rows = np.flatnonzero(available)
+        formation = None if req.formation is None else dict(zip(POSITIONS, req.formation))
+        squad_size = None if req.squad_size is None else dict(zip(POSITIONS, req.squad_size))
+        locked = np.isin(pool.names[rows], list(req.locked))
+        rows = rows[~dominated(pool.frame.iloc[rows], formation, req.max_per_team, squad_size, keep=locked)]
+        selection = pick_squad(pool.frame.iloc[rows], formation, req.budget, req.max_per_team, squad_size=squad_size,
+                               locked=req.locked, presolve=self.presolve)
+        return selection, len(rows)
+
+    def solve(self, changes: Optional[dict] = None, session: str = "default") -> Answer:
+        """Best squad for the session's previous request (or the defaults) with `changes` applied."""
+        t0 = time.perf_counter()
+        pool = self.pool
+        with self._lock:
+            prev = self._sessions.get(session)
+        req = (prev.request if prev is not None else self.defaults).edit(changes or {})
+        self._check(pool, req)
+
+        with self._lock:
+            hit = self._cache.get((pool.version, req))
+            if hit is not None:
+                self._cache.move_to_end((pool.version, req))
+        if hit is not None:
+            answer = replace(hit, source="cache", candidates=0)
+        elif prev is not None and prev.version == pool.version and _still_optimal(prev, req):
+            answer = replace(prev, request=req, source="previous", candidates=0)
+        else:
+            with self._solving:
+                selection, candidates = self._solve(pool, req)
+            answer = Answer(selection, req, "solve", candidates, 0.0, pool.version)
+        answer.seconds = time.perf_counter() - t0
+
+        with self._lock:
+            self._sessions[session] = answer
+            if pool.version == self.pool.version:
+                self._cache[(pool.version, req)] = answer
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return answer
+
+    def reset(self, session: str = "default") -> None:
+        """Forget the session: its next request starts from the defaults."""
+        with self._lock:
+            self._sessions.pop(session, None)
+
+
+#----------
+#HTTP
+class Handler(BaseHTTPRequestHandler):
+    service: SelectionService = None
+    quiet = True
+
+    def _send(self, code: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> dict:
+        n = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(n) or b"{}") if n else {}
+        if not isinstance(body, dict):
+            raise ValueError("the body must be a JSON object")
+        return body
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        try:
+            if path == "/solve":
+                body = self._body()
+                session = str(body.pop("session", "default"))
+                if body.pop("reset", False):
+                    self.service.reset(session)
+                self._send(200, self.service.solve(body, session).to_json())
+            elif path == "/reload":
+                pool = self.service.reload()
+                self._send(200, {"players": len(pool.frame), "version": pool.version})
+            else:
+                self._send(404, {"error": f"no {path}"})
+        except (ValueError, TypeError) as e:
+            self._send(400, {"error": str(e)})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/pool":
+            return self._send(404, {"error": f"no {url.path}"})
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        try:
+            rows = self.service.pool.rows(q.get("position"), q.get("club"), int(q["top"]) if "top" in q else None)
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        self._send(200, {"players": rows[[c for c in SHOW if c in rows.columns]].to_dict("records")})
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(service: SelectionService, host: str = "127.0.0.1", port: int = 8765,
+                quiet: bool = True) -> ThreadingHTTPServer:
+    """An HTTP server for `service` (call serve_forever(); port 0 picks a free one)."""
+    handler = type("SelectionHandler", (Handler,), {"service": service, "quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(service: SelectionService, host: str = "127.0.0.1", port: int = 8765, quiet: bool = True) -> None:
+    server = make_server(service, host, port, quiet)
+    first = service.solve()
+    print(f"[OK] {len(service.pool.frame)} players loaded, default squad in {first.seconds * 1000:.0f} ms "
+          f"({first.selection.points:.2f} points)")
+    print(f"[INFO] listening on http://{host}:{server.server_address[1]} (POST /solve, GET /pool, POST /reload)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--predictions", required=True, help="model.py's curr_gw_predictions.csv")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="solved requests kept")
+    ap.add_argument("--presolve", action="store_true", help="HiGHS presolve on (slower on the pruned pools)")
+    ap.add_argument("--workers", type=int, default=None, help="solves at a time (default: the cores)")
+    ap.add_argument("--verbose", action="store_true", help="log every request")
+    args = ap.parse_args()
+
+    service = SelectionService.from_csv(args.predictions, cache_size=args.cache_size, presolve=args.presolve,
+                                        workers=args.workers)
+    serve(service, args.host, args.port, quiet=not args.verbose)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Exact squad selection as a mixed-integer program (scipy.optimize.milp / HiGHS).
+
+For every player in the pool there are three 0/1 variables: in the squad, in the starting XI,
+captain. The solver maximises
+
+    XI points + captain points (counted twice) + bench_weight * bench points
+
+subject to
+- squad size per position (2 GK, 5 DEF, 5 MID, 3 FWD by default)
+- the XI inside the squad, in the given formation (exact counts), or with formation=None any legal
+  FPL formation (1 GK, 3-5 DEF, 2-5 MID, 1-3 FWD)
+- one captain, from the XI
+- squad cost <= budget, at most max_per_team players from one club
+- locked players in the squad, banned players out
+
+dominated() lists the players that cannot be in any optimal squad (enough cheaper, higher-rated players
+of the same position at other clubs); dropping them leaves the optimum unchanged and shrinks the MILP,
+which is what selection_service.py does before every re-solve.
+
+squad_size=None solves the XI on its own (budget and club cap on the XI), the problem the old greedy
+picker in model.py was solving; greedy_xi keeps that picker for comparison
+(benchmarks/bench_optimizer.py).
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import Bounds, LinearConstraint, milp
+from scipy.sparse import coo_matrix, vstack
+
+POSITIONS = ["Goalkeeper", "Defender", "Midfielder", "Forward"]
+SQUAD_SIZE = {"Goalkeeper": 2, "Defender": 5, "Midfielder": 5, "Forward": 3}
+XI_SIZE = 11
+# (min, max) starters per position in a legal FPL formation
+FORMATION_LIMITS = {"Goalkeeper": (1, 1), "Defender": (3, 5), "Midfielder": (2, 5), "Forward": (1, 3)}
+
+
+@dataclass
+class Selection:
+    squad: pd.DataFrame   # chosen rows of the pool + 'starting' / 'captain' flags (empty if infeasible)
+    points: float         # predicted XI points, captain counted twice
+    cost: float
+    status: str
+    solve_time: float
+
+    @property
+    def xi(self) -> pd.DataFrame:
+        return self.squad[self.squad["starting"]] if len(self.squad) else self.squad
+
+    @property
+    def bench(self) -> pd.DataFrame:
+        return self.squad[~self.squad["starting"]] if len(self.squad) else self.squad
+
+    @property
+    def captain(self) -> Optional[pd.Series]:
+        caps = self.squad[self.squad["captain"]] if len(self.squad) else self.squad
+        return caps.iloc[0] if len(caps) else None
+
+
+def selectable(df: pd.DataFrame) -> pd.DataFrame:
+    """The rows that can be picked: a prediction and a price > 0, club names normalised ("Unknown" for none)."""
+    pool = df[df["predicted_points_next"].notna() & df["price_now"].notna() & (df["price_now"] > 0)].copy()
+    pool["team_name_current"] = pool["team_name_current"].astype(str).replace({"nan": "Unknown", "None": "Unknown"})
+    return pool
+
+
+def _rows(mask: np.ndarray, offset: int, n_vars: int, coef: Optional[np.ndarray] = None) -> coo_matrix:
+    """One constraint row over the variables offset + i for i in mask."""
+    idx = np.flatnonzero(mask)
+    data = np.ones(len(idx)) if coef is None else coef[idx]
+    return coo_matrix((data, (np.zeros(len(idx), dtype=int), offset + idx)), shape=(1, n_vars))
+
+
+def _pairs(a: int, b: int, n: int, n_vars: int) -> coo_matrix:
+    """n constraint rows: variable a + i minus variable b + i."""
+    i = np.arange(n)
+    return coo_matrix((np.r_[np.ones(n), -np.ones(n)], (np.r_[i, i], np.r_[a + i, b + i])), shape=(n, n_vars))
+
+
+def pick_squad(pool: pd.DataFrame, formation: Optional[Dict[str, int]] = None, budget: float = 100.0,
+               max_per_team: int = 3, squad_size: Optional[Dict[str, int]] = SQUAD_SIZE,
+               locked: Iterable[str] = (), banned: Iterable[str] = (), captain: bool = True,
+               bench_weight: float = 0.1, points_col: str = "predicted_points_next",
+               price_col: str = "price_now", team_col: str = "team_name_current", name_col: str = "full_name",
+               time_limit: Optional[float] = None, presolve: bool = True) -> Selection:
+    """
+    Best squad / XI / captain for `pool` (one row per player). `locked` / `banned` are player names
+    (name_col). Returns a Selection; on an infeasible problem its squad is empty and status says why.
+    presolve=False skips HiGHS' presolve, ~2x faster on small (pruned) pools whose LP bound is tight.
+    """
+    t0 = time.perf_counter()
+    pool = pool.reset_index(drop=True)
+    n = len(pool)
+    pts = pool[points_col].to_numpy(dtype=float)
+    price = pool[price_col].to_numpy(dtype=float)
+    pos = pool["position"].astype(str).to_numpy()
+    team = pool[team_col].astype(str).to_numpy()
+    names = pool[name_col].astype(str).to_numpy()
+    S, X, C, n_vars = 0, n, 2 * n, 3 * n  # variable blocks: squad, starting, captain
+
+    rows, lo, hi = [], [], []
+
+    def add(block, lower, upper):
+        rows.append(block)
+        lo.extend([lower] * block.shape[0])
+        hi.extend([upper] * block.shape[0])
+
+    # starting -> in squad, captain -> starting
+    add(_pairs(X, S, n, n_vars), -np.inf, 0.0)
+    add(_pairs(C, X, n, n_vars), -np.inf, 0.0)
+    if captain:
+        add(_rows(np.ones(n, dtype=bool), C, n_vars), 1, 1)
+
+    if squad_size is None:
+        add(_pairs(S, X, n, n_vars), 0.0, 0.0)  # XI only: the squad is the XI
+    else:
+        for p in POSITIONS:
+            add(_rows(pos == p, S, n_vars), squad_size.get(p, 0), squad_size.get(p, 0))
+
+    if formation is not None:
+        for p in POSITIONS:
+            k = int(formation.get(p, 0))
+            add(_rows(pos == p, X, n_vars), k, k)
+    else:
+        for p, (mn, mx) in FORMATION_LIMITS.items():
+            add(_rows(pos == p, X, n_vars), mn, mx)
+        add(_rows(np.ones(n, dtype=bool), X, n_vars), XI_SIZE, XI_SIZE)
+
+    add(_rows(np.ones(n, dtype=bool), S, n_vars, price), -np.inf, budget + 1e-9)
+    for t in np.unique(team):
+        add(_rows(team == t, S, n_vars), -np.inf, max_per_team)
+
+    lb, ub = np.zeros(n_vars), np.ones(n_vars)
+    if not captain:
+        ub[C:] = 0
+    locked, banned = set(locked), set(banned)
+    unknown = (locked | banned) - set(names)
+    if unknown:
+        print(f"[WARN] not in the pool, ignored: {sorted(unknown)}")
+    ub[S + np.flatnonzero(np.isin(names, list(banned)))] = 0
+    lb[S + np.flatnonzero(np.isin(names, list(locked)))] = 1
+
+    # milp minimises; bench players count bench_weight, starters 1, the captain once more
+    cost = -np.r_[bench_weight * pts, (1 - bench_weight) * pts, pts]
+    options = {"presolve": presolve}
+    if time_limit:
+        options["time_limit"] = time_limit
+    res = milp(cost, integrality=np.ones(n_vars), bounds=Bounds(lb, ub),
+               constraints=LinearConstraint(vstack(rows, format="csr"), np.array(lo), np.array(hi)), options=options)
+    secs = time.perf_counter() - t0
+    if res.x is None:
+        return Selection(pool.iloc[:0].assign(starting=False, captain=False), 0.0, 0.0, res.message, secs)
+
+    x = np.round(res.x).astype(bool)
+    chosen = np.flatnonzero(x[S:X])
+    squad = pool.iloc[chosen].copy()
+    squad["starting"] = x[X + chosen]
+    squad["captain"] = x[C + chosen]
+    points = float(pts[x[X:C]].sum() + pts[x[C:]].sum())
+    return Selection(squad, points, float(price[chosen].sum()), res.message, secs)
+
+
+def dominated(pool: pd.DataFrame, formation: Optional[Dict[str, int]] = None, max_per_team: int = 3,
+              squad_size: Optional[Dict[str, int]] = SQUAD_SIZE, keep: Optional[np.ndarray] = None,
+              points_col: str = "predicted_points_next", price_col: str = "price_now",
+              team_col: str = "team_name_current") -> np.ndarray:
+    """
+    Bool mask of the pool rows pick_squad can do without: same optimum on pool[~mask].
+
+    q dominates p (same position) when q has at least p's points at no more than p's price (ties
+    broken by points, then price, then row order, so no two players dominate each other). The rest
+    of a squad with p can hold at most m of p's dominators (m < p's position quota) and fill at
+    most (squad size - 1 - m) // max_per_team other clubs; if p's dominators span more clubs than
+    that covers, one of them is outside the squad at a club with room left, and swapping p for it
+    costs no money and no points. Rows in `keep` (locked players) are never dropped.
+    """
+    pool = pool.reset_index(drop=True)
+    pts = pool[points_col].to_numpy(dtype=float)
+    price = pool[price_col].to_numpy(dtype=float)
+    pos = pool["position"].astype(str).to_numpy()
+    _, team = np.unique(pool[team_col].astype(str).to_numpy(), return_inverse=True)
+    total = sum(squad_size.values()) if squad_size is not None else XI_SIZE
+
+    out = np.zeros(len(pool), dtype=bool)
+    for p in POSITIONS:
+        if squad_size is not None:
+            quota = squad_size.get(p, 0)
+        else:
+            quota = int(formation.get(p, 0)) if formation is not None else FORMATION_LIMITS[p][1]
+        idx = np.flatnonzero(pos == p)
+        if len(idx) == 0:
+            continue
+        rank = np.empty(len(idx), dtype=int)
+        rank[np.lexsort((idx, price[idx], -pts[idx]))] = np.arange(len(idx))
+        # D[q, p]: q dominates p
+        D = ((pts[idx, None] >= pts[None, idx]) & (price[idx, None] <= price[None, idx])
+             & (rank[:, None] < rank[None, :]))
+        clubs = np.zeros((len(idx), team.max() + 1), dtype=np.float32)
+        clubs[np.arange(len(idx)), team[idx]] = 1
+        spread = ((D.T.astype(np.float32) @ clubs) > 0).sum(axis=1)
+        covered = max(m + (total - 1 - m) // max_per_team for m in range(max(quota, 1)))
+        out[idx] = spread > covered
+    if keep is not None:
+        out &= ~keep
+    return out
+
+
+def greedy_xi(pool: pd.DataFrame, formation: Dict[str, int], budget: float = 100.0,
+              max_per_team: int = 3) -> pd.DataFrame:
+    """model.py's original picker: per position, the highest predicted players that still fit."""
+    pick_pool = pool.sort_values("predicted_points_next", ascending=False)
+    remaining_budget = float(budget)
+    team_counts = {}
+    picked_rows = []
+
+    for pos in POSITIONS:
+        need = int(formation.get(pos, 0))
+        if need <= 0:
+            continue
+
+        pos_pool = pick_pool[pick_pool["position"] == pos]
+
+        for _, row in pos_pool.iterrows():
+            if need == 0:
+                break
+            price = float(row["price_now"])
+            team = str(row["team_name_current"])
+
+            if price > remaining_budget:
+                continue
+            if team_counts.get(team, 0) >= max_per_team:
+                continue
+
+            picked_rows.append(row)
+            remaining_budget -= price
+            team_counts[team] = team_counts.get(team, 0) + 1
+            need -= 1
+
+    return pd.DataFrame(picked_rows)
@@ -0,0 +1,261 @@
+"""
+Monte Carlo points scenarios for players, lineups and captains.
+
+model.py gives one number per player (predicted_points_next). Here every player gets a distribution:
+
+    points = prediction + residual
+
+where the residual is drawn from the empirical out-of-sample residuals (actual - predicted) of
+players with the same position and a similar prediction (ResidualModel, fitted on the rows
+`model_evaluation.py --predictions-out` writes), centred so a player's expected points stay the model's
+prediction. FPL points are skewed (mostly 1-2, now and then a haul), which the quantile tables keep.
+
+Players of the same club move together (a clean sheet, a 4-0 win): draws go through a Gaussian copula
+with one shared factor per club, u = Phi(sqrt(rho) * z_club + sqrt(1 - rho) * e_player), and rho is the
+within-club residual correlation estimated from the same rows.
+
+Scenarios are a (scenarios, players) float32 array. A lineup is an XI plus a captain, so all lineups at
+once are one weight matrix (players x lineups, 1 per starter, +1 for the captain) and their points in
+every scenario one matrix product, chunked over lineups so memory stays bounded. For each lineup:
+expected points, standard deviation / variance, downside quantiles and the mean of the worst tail
+(CVaR). Every legal XI and captain of a 15-man squad is ~6k lineups; 20k scenarios of them take
+~0.6s on one core (benchmarks/bench_simulation.py), cheap enough to re-rank the optimizer's squads.
+
+Usage:
+  python model_evaluation.py --season 2526 --predictions-out oos_2526.csv
+  python squad_simulation.py --residuals oos_2526.csv --predictions curr_gw_predictions.csv --squad curr_gw_team.csv
+"""
+
+import argparse
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+from squad_optimizer import FORMATION_LIMITS, POSITIONS, XI_SIZE
+
+PRED_EDGES = np.array([1.0, 2.0, 3.0, 4.5, 6.0])  # prediction buckets: the residual spread grows with the prediction
+N_QUANTILES = 200
+MIN_ROWS = 100      # smaller (position, bucket) groups borrow the position's, then everyone's residuals
+MAX_CLUB_RHO = 0.5
+
+
+def _club_rho(resid: np.ndarray, groups: np.ndarray) -> float:
+    """One-way ANOVA intraclass correlation of the residuals within (season, gw, club) groups."""
+    codes = np.unique(groups, return_inverse=True)[1]
+    sizes = np.bincount(codes)
+    keep = sizes[codes] >= 2
+    if keep.sum() < 10:
+        return 0.0
+    codes = np.unique(codes[keep], return_inverse=True)[1]
+    r = resid[keep]
+    k = np.bincount(codes).astype(float)
+    means = np.bincount(codes, weights=r) / k
+    ssw = ((r - means[codes]) ** 2).sum()
+    ssb = (k * (means - r.mean()) ** 2).sum()
+    g, n = len(k), len(r)
+    msb, msw = ssb / max(g - 1, 1), ssw / max(n - g, 1)
+    k0 = (n - (k ** 2).sum() / n) / max(g - 1, 1)  # effective group size for unequal groups
+    rho = (msb - msw) / (msb + (k0 - 1) * msw)
+    return float(np.clip(rho, 0.0, MAX_CLUB_RHO))
+
+
+@dataclass
+class ResidualModel:
+    table: np.ndarray    # (len(POSITIONS) + 1, buckets, N_QUANTILES) residual quantiles, centred; last row: unknown position
+    rho: float           # within-club correlation of the draws
+    floor: float         # lowest points a player can score
+    rows: int
+
+    @classmethod
+    def fit(cls, df: pd.DataFrame, pred_col: str = "predicted_points_next", target_col: str = "total_points_next",
+            team_col: str = "team_name_current", rho: Optional[float] = None) -> "ResidualModel":
+        """Residual quantile tables from rows with a prediction and the actual points (NaN targets are dropped)."""
+        df = df[df[target_col].notna() & df[pred_col].notna()]
+        if df.empty:
+            raise ValueError(f"no rows with both {pred_col} and {target_col}")
+        pred = df[pred_col].to_numpy(dtype=float)
+        resid = df[target_col].to_numpy(dtype=float) - pred
+        pos = _position_codes(df["position"] if "position" in df.columns else pd.Series(index=df.index, dtype=object))
+        bucket = np.searchsorted(PRED_EDGES, pred, side="right")
+        levels = (np.arange(N_QUANTILES) + 0.5) / N_QUANTILES
+
+        n_buckets = len(PRED_EDGES) + 1
+        table = np.empty((len(POSITIONS) + 1, n_buckets, N_QUANTILES))
+        everyone = np.ones(len(resid), dtype=bool)
+        for p in range(len(POSITIONS) + 1):
+            in_pos = pos == p if p < len(POSITIONS) else everyone
+            for b in range(n_buckets):
+                for mask in (in_pos & (bucket == b), everyone & (bucket == b), in_pos, everyone):
+                    if mask.sum() >= MIN_ROWS or mask is everyone:
+                        break
+                q = np.quantile(resid[mask], levels)
+                table[p, b] = q - q.mean()
+
+        if rho is None:
+            keys = [c for c in ["season", "gw", team_col] if c in df.columns]
+            rho = 0.0
+            if team_col in keys and df[team_col].notna().any():
+                has = df[team_col].notna().to_numpy()
+                groups = pd.MultiIndex.from_frame(df[keys].astype(str)).codes
+                groups = np.ravel_multi_index(tuple(groups), tuple(int(g.max()) + 1 for g in groups))
+                rho = _club_rho(resid[has], groups[has])
+        return cls(table.astype(np.float32), float(rho), float(df[target_col].min()), len(df))
+
+
+def _position_codes(position: pd.Series) -> np.ndarray:
+    """Index into POSITIONS; unknown / missing -> len(POSITIONS)."""
+    codes = pd.Categorical(position.astype(object), categories=POSITIONS).codes.astype(int)
+    codes[codes < 0] = len(POSITIONS)
+    return codes
+
+
+def simulate(model: ResidualModel, pred: np.ndarray, position: pd.Series, club: pd.Series,
+             n_scenarios: int = 20_000, seed: int = 0, chunk: int = 4096) -> np.ndarray:
+    """(n_scenarios, players) float32 points scenarios; same seed, same scenarios."""
+    pred = np.asarray(pred, dtype=np.float32)
+    n = len(pred)
+    tables = model.table[_position_codes(position), np.searchsorted(PRED_EDGES, pred, side="right")]  # (n, Q)
+    clubs = pd.factorize(club.astype(str))[0]
+    a, b = np.float32(np.sqrt(model.rho)), np.float32(np.sqrt(1.0 - model.rho))
+    rng = np.random.default_rng(seed)
+    cols = np.arange(n)
+    out = np.empty((n_scenarios, n), dtype=np.float32)
+    for s in range(0, n_scenarios, chunk):
+        m = min(chunk, n_scenarios - s)
+        x = a * rng.standard_normal((m, clubs.max() + 1 if n else 0), dtype=np.float32)[:, clubs]
+        x += b * rng.standard_normal((m, n), dtype=np.float32)
+        q = ndtr(x) * N_QUANTILES - 0.5  # position in the quantile table, linear in between
+        np.clip(q, 0, N_QUANTILES - 1, out=q)
+        lo = q.astype(np.int32)
+        hi = np.minimum(lo + 1, N_QUANTILES - 1)
+        frac = (q - lo).astype(np.float32)
+        draw = tables[cols, lo] * (1 - frac) + tables[cols, hi] * frac
+        np.maximum(pred + draw, model.floor, out=out[s:s + m])
+    return out
+
+
+def evaluate(scenarios: np.ndarray, xi: np.ndarray, captain: np.ndarray, quantiles: Sequence[float] = (0.05, 0.1),
+             chunk: int = 512) -> pd.DataFrame:
+    """
+    Points distribution of every lineup: xi is (lineups, 11) player columns of `scenarios`, captain
+    (lineups,) one of them (counted twice). One row per lineup: mean, std, var, q05 / q10 ..., and
+    cvar = the mean of the scenarios below the lowest quantile.
+
+    Mean and variance are w'mu and w'Cov w from the players' scenario mean / covariance; only the
+    quantiles need every lineup's points in every scenario, (lineups, scenarios) per chunk, cut with one
+    single-k partition per quantile (each on the part below the previous one).
+    """
+    xi, captain = np.asarray(xi), np.asarray(captain)
+    used, idx = np.unique(np.r_[xi.ravel(), captain], return_inverse=True)
+    sims_t = np.ascontiguousarray(scenarios[:, used].T)  # (players, scenarios)
+    mu = sims_t.mean(axis=1, dtype=np.float64)
+    cov = np.atleast_2d(np.cov(sims_t))
+    n_lineups = len(captain)
+    xi_idx, cap_idx = idx[:xi.size].reshape(xi.shape), idx[xi.size:]
+    S = sims_t.shape[1]
+    levels = sorted(quantiles, reverse=True)
+    ks = [min(S - 1, int(q * S)) for q in levels]
+    names = [f"q{int(round(q * 100)):02d}" for q in levels]
+    out = {"mean": np.empty(n_lineups), "var": np.empty(n_lineups)}
+    out.update({name: np.empty(n_lineups) for name in sorted(names)})
+    out["cvar"] = np.empty(n_lineups)
+    for a in range(0, n_lineups, chunk):
+        b = min(a + chunk, n_lineups)
+        w = np.zeros((b - a, len(used)), dtype=np.float32)
+        rows = np.arange(b - a)
+        np.add.at(w, (rows[:, None], xi_idx[a:b]), 1.0)
+        np.add.at(w, (rows, cap_idx[a:b]), 1.0)
+        out["mean"][a:b] = w @ mu
+        out["var"][a:b] = np.einsum("ij,ij->i", w @ cov, w)
+        part = w @ sims_t                                  # (lineups in the chunk, scenarios)
+        for name, k in zip(names, ks):
+            part = np.partition(part, k, axis=1)
+            out[name][a:b] = part[:, k]
+            part = part[:, :max(k, 1)]
+        out["cvar"][a:b] = part.mean(axis=1, dtype=np.float64)
+    res = pd.DataFrame(out)
+    res.insert(1, "std", np.sqrt(res["var"]))
+    return res
+
+
+def squad_lineups(position: Sequence[str], formation: Optional[Dict[str, int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Every legal XI of a squad with every captain in it: (xi (L, 11), captain (L,)) as row numbers of the squad.
+    formation=None allows any legal FPL formation, else exactly formation's counts.
+    """
+    position = np.asarray(position, dtype=object)
+    by_pos = [np.flatnonzero(position == p) for p in POSITIONS]
+    if formation is not None:
+        shapes = [tuple(int(formation.get(p, 0)) for p in POSITIONS)]
+    else:
+        ranges = [range(lo, hi + 1) for lo, hi in FORMATION_LIMITS.values()]
+        shapes = [s for s in itertools.product(*ranges) if sum(s) == XI_SIZE]
+    xis = []
+    for shape in shapes:
+        if any(k > len(idx) for k, idx in zip(shape, by_pos)):
+            continue
+        per_pos = [list(itertools.combinations(idx, k)) for k, idx in zip(shape, by_pos)]
+        xis += [sum(combo, ()) for combo in itertools.product(*per_pos)]
+    if not xis:
+        return np.empty((0, XI_SIZE), dtype=int), np.empty(0, dtype=int)
+    xis = np.array(xis, dtype=int)
+    return np.repeat(xis, XI_SIZE, axis=0), xis.reshape(-1)
+
+
+def rank_lineups(squad: pd.DataFrame, model: ResidualModel, formation: Optional[Dict[str, int]] = None,
+                 n_scenarios: int = 20_000, seed: int = 0, points_col: str = "predicted_points_next",
+                 team_col: str = "team_name_current", name_col: str = "full_name") -> pd.DataFrame:
+    """Every XI / captain of `squad` with its points distribution, best expected points first."""
+    squad = squad.reset_index(drop=True)
+    sims = simulate(model, squad[points_col].to_numpy(), squad["position"], squad[team_col], n_scenarios, seed)
+    xi, captain = squad_lineups(squad["position"].astype(str).to_numpy(), formation)
+    res = evaluate(sims, xi, captain)
+    names = squad[name_col].astype(str).to_numpy()
+    res.insert(0, "captain", names[captain])
+    res.insert(1, "bench", [", ".join(names[np.setdiff1d(np.arange(len(squad)), row)]) for row in xi])
+    return res.sort_values("mean", ascending=False, kind="mergesort").reset_index(drop=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--residuals", required=True, help="CSV with predicted_points_next, total_points_next, position "
+                                                       "(team_name_current, season, gw for the club correlation)")
+    ap.add_argument("--predictions", required=True, help="model.py's curr_gw_predictions.csv")
+    ap.add_argument("--squad", required=True, help="model.py's curr_gw_team.csv (15 players)")
+    ap.add_argument("--formation", default=None, help="e.g. 3-4-3 (default: any legal formation)")
+    ap.add_argument("--scenarios", type=int, default=20_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--top", type=int, default=5)
+    args = ap.parse_args()
+
+    model = ResidualModel.fit(pd.read_csv(args.residuals))
+    print(f"[INFO] residual model from {model.rows} rows, within-club correlation {model.rho:.3f}")
+    preds = pd.read_csv(args.predictions)
+    names = pd.read_csv(args.squad)["full_name"]
+    squad = preds[preds["full_name"].isin(names)].drop_duplicates("full_name")
+    formation = None
+    if args.formation:
+        formation = dict(zip(POSITIONS, [1] + [int(k) for k in args.formation.split("-")]))
+
+    t0 = time.perf_counter()
+    res = rank_lineups(squad, model, formation, args.scenarios, args.seed)
+    print(f"[INFO] {len(res)} lineups x {args.scenarios} scenarios in {time.perf_counter() - t0:.2f}s")
+    show = ["captain", "mean", "std", "q05", "q10", "cvar", "bench"]
+    fmt = lambda v: f"{v:.2f}"  # noqa: E731
+    for col, label in [("mean", "expected points"), ("q10", "10% quantile (downside)")]:
+        top = res.sort_values(col, ascending=False, kind="mergesort").head(args.top)
+        print(f"\n=== Best by {label} ===")
+        print(top[show].to_string(index=False, float_format=fmt))
+    best = res.iloc[0]
+    caps = res[res["bench"] == best["bench"]].sort_values("mean", ascending=False)
+    print("\n=== Captain options for the best XI ===")
+    print(caps[show[:-1]].to_string(index=False, float_format=fmt))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Team strength and fixture difficulty lookup tables, joined onto the player panel as model features.
+
+The model sees opponent_team as a bare id. Here every (season, team, gw) gets:
+
+    team_goals_for / team_goals_against / team_xg_for / team_xg_against
+        the team's rolling means over its last WINDOW matches up to and including the gameweek
+    next{k}_fixtures, next{k}_home
+        how many fixtures (blank / double gameweeks) and home games the team has in gw+1 .. gw+k
+    next{k}_opp_xg_for / next{k}_opp_xg_against
+        mean rolling attack / defence of those opponents, as known at the gameweek
+
+so a player row at gw (which predicts gw+1) only uses matches already played, plus the fixture list.
+
+Team matches come from the raw panels (every season has fixture / opponent_team): a fixture's two teams
+are the two opponent_team values seen in it, goals against are the exact score where was_home and
+both scores are known (25/26), else the most goals any of the team's players conceded, and xG against
+the most expected_goals_conceded (a player on for the whole match). For and against are each other's
+mirror. Future fixtures come from the fixture list data_loader.py stores next to the panels.
+
+Tables are dense per season (teams x gameweeks, forward-filled over blanks) and built with array
+indexing; the join onto the panel is one MultiIndex lookup per table, not a per-row merge. They are
+cached in the store and rebuilt per season only when that season's panel or fixture list changed
+(sha256 of the files), so a new gameweek rebuilds the current season only (a few ms).
+
+Layout (under the panel store):
+    fixtures/season=2526/part-0.parquet        <- data_loader.py: the season's fixture list
+    team_fixtures/season=2526/part-0.parquet   <- one row per team per fixture, played or scheduled
+    team_strength/season=2526/part-0.parquet   <- one row per (team, gw), gw 0 = before the season
+    team_strength/_state.json                  <- config + per-season digest of the inputs
+
+Usage:
+  python team_strength.py update [--rebuild]
+  python team_strength.py show --season 2526 --gw 7
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from features import rolling_means
+from panel_store import FIXTURES, RAW, STORE_DIR, list_seasons, read_panel, write_panel
+
+TEAM_FIXTURES = "team_fixtures"
+STRENGTH = "team_strength"
+STATS = ["goals_for", "goals_against", "xg_for", "xg_against"]
+WINDOW = 6          # matches in the rolling strength
+NEXT_K = (1, 3)     # fixture difficulty over the next k gameweeks
+PANEL_COLS = ["gw", "fixture", "opponent_team", "was_home", "team_h_score", "team_a_score", "goals_conceded",
+              "expected_goals_conceded"]
+
+
+#----------
+#team matches / schedule
+def team_matches(panel: pd.DataFrame) -> pd.DataFrame:
+    """One row per (season, fixture, team) played: gw, opp, home, goals / xG for and against."""
+    d = pd.DataFrame({
+        "season": panel["season"].astype(int).to_numpy(),
+        "fixture": panel["fixture"].astype(int).to_numpy(),
+        "gw": panel["gw"].astype(int).to_numpy(),
+        "opp": panel["opponent_team"].astype(int).to_numpy(),
+    })
+    for col in ["was_home", "team_h_score", "team_a_score"]:
+        d[col] = panel[col].astype(float).to_numpy() if col in panel.columns else np.nan
+    d["ga"] = panel["goals_conceded"].astype(float).to_numpy()
+    d["xga"] = panel["expected_goals_conceded"].astype(float).to_numpy()
+
+    # the fixture's two teams are the two opponents seen in it
+    sides = d.groupby(["season", "fixture"])["opp"].agg(["min", "max", "nunique"])
+    sides = sides[sides["nunique"] == 2]
+    pair = (sides["min"] + sides["max"]).reindex(pd.MultiIndex.from_frame(d[["season", "fixture"]])).to_numpy()
+    d["team"] = pair - d["opp"].to_numpy()
+    d = d[~np.isnan(d["team"])]
+
+    m = d.groupby(["season", "fixture", "team"], sort=True).agg(
+        gw=("gw", "first"), opp=("opp", "first"), home=("was_home", "first"), h=("team_h_score", "first"),
+        a=("team_a_score", "first"), goals_against=("ga", "max"), xg_against=("xga", "max")).reset_index()
+    exact = m["home"].notna() & m["h"].notna() & m["a"].notna()
+    m.loc[exact, "goals_against"] = np.where(m.loc[exact, "home"] == 1, m.loc[exact, "a"], m.loc[exact, "h"])
+
+    mirror = m[["season", "fixture", "team", "goals_against", "xg_against"]].rename(
+        columns={"team": "opp", "goals_against": "goals_for", "xg_against": "xg_for"})
+    m = m.merge(mirror, on=["season", "fixture", "opp"], how="left")
+    m["team"] = m["team"].astype(int)
+    return m[["season", "fixture", "gw", "team", "opp", "home"] + STATS]
+
+
+def fixture_sides(fixtures: pd.DataFrame) -> pd.DataFrame:
+    """The stored fixture list as two rows per fixture (one per team); unscheduled fixtures are left out."""
+    fx = fixtures[fixtures["gw"].notna()]
+    home = pd.DataFrame({"season": fx["season"].astype(int), "fixture": fx["fixture"].astype(int),
+                         "gw": fx["gw"].astype(int), "team": fx["team_h"].astype(int),
+                         "opp": fx["team_a"].astype(int), "home": 1.0})
+    away = home.assign(team=home["opp"], opp=home["team"], home=0.0)
+    return pd.concat([home, away], ignore_index=True)
+
+
+def schedule(matches: pd.DataFrame, fixtures: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Played matches plus the fixture list's fixtures not played yet (stats NaN)."""
+    if fixtures is None or fixtures.empty:
+        return matches.reset_index(drop=True)
+    sides = fixture_sides(fixtures)
+    played = pd.MultiIndex.from_frame(matches[["season", "fixture"]])
+    todo = sides[~pd.MultiIndex.from_frame(sides[["season", "fixture"]]).isin(played)]
+    out = pd.concat([matches, todo], ignore_index=True)
+    return out.sort_values(["season", "gw", "fixture", "team"], kind="mergesort").reset_index(drop=True)
+
+
+#----------
+#lookup tables
+def season_table(sched: pd.DataFrame, window: int = WINDOW, next_k: Sequence[int] = NEXT_K) -> pd.DataFrame:
+    """Dense (team, gw) table of one season's schedule; gw runs 0 .. last gameweek."""
+    n_teams = int(max(sched["team"].max(), sched["opp"].max())) + 1
+    n_gws = int(sched["gw"].max()) + 1
+
+    # rolling strength after each played match, oldest first per team
+    played = sched[sched["goals_against"].notna() | sched["xg_against"].notna()]
+    played = played.sort_values(["team", "gw", "fixture"], kind="mergesort")
+    team = played["team"].to_numpy()
+    start = np.r_[True, team[1:] != team[:-1]] if len(team) else np.zeros(0, dtype=bool)
+    idx = np.arange(len(team))
+    pos = idx - np.maximum.accumulate(np.where(start, idx, 0))
+    rolled = rolling_means(played[STATS].to_numpy(dtype=np.float64), pos, [window])[window]
+
+    strength = np.full((n_teams, n_gws, len(STATS)), np.nan)
+    gws = played["gw"].to_numpy()
+    last = np.r_[(team[1:] != team[:-1]) | (gws[1:] != gws[:-1]), True] if len(team) else start
+    strength[team[last], gws[last]] = rolled[last]
+    # carry the last value over blank gameweeks
+    seen = ~np.isnan(strength[..., 0])
+    carry = np.maximum.accumulate(np.where(seen, np.arange(n_gws), 0), axis=1)
+    strength = strength[np.arange(n_teams)[:, None], carry]
+
+    cols: Dict[str, np.ndarray] = {f"team_{s}": strength[..., j] for j, s in enumerate(STATS)}
+    f_team, f_gw, f_opp = (sched[c].to_numpy(dtype=int) for c in ["team", "gw", "opp"])
+    f_home = sched["home"].to_numpy(dtype=float)
+    opp_cols = [STATS.index("xg_for"), STATS.index("xg_against")]
+    for k in next_k:
+        count = np.zeros((n_teams, n_gws))
+        home, home_known = np.zeros((n_teams, n_gws)), np.zeros((n_teams, n_gws))
+        total, known = np.zeros((n_teams, n_gws, 2)), np.zeros((n_teams, n_gws, 2))
+        for d in range(1, k + 1):
+            g = f_gw - d
+            ok = g >= 0
+            at = (f_team[ok], g[ok])
+            np.add.at(count, at, 1)
+            np.add.at(home, at, np.nan_to_num(f_home[ok]))
+            np.add.at(home_known, at, ~np.isnan(f_home[ok]))
+            opp = strength[f_opp[ok], g[ok]][:, opp_cols]  # the opponent as known at the row's gameweek
+            np.add.at(total, at, np.nan_to_num(opp))
+            np.add.at(known, at, ~np.isnan(opp))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cols[f"next{k}_fixtures"] = count
+            cols[f"next{k}_home"] = np.where(home_known == count, home, np.nan)
+            cols[f"next{k}_opp_xg_for"] = np.where(known[..., 0] > 0, total[..., 0] / known[..., 0], np.nan)
+            cols[f"next{k}_opp_xg_against"] = np.where(known[..., 1] > 0, total[..., 1] / known[..., 1], np.nan)
+
+    teams = np.unique(np.r_[f_team, f_opp])  # ids that play this season
+    grid_team, grid_gw = np.meshgrid(teams, np.arange(n_gws), indexing="ij")
+    out = pd.DataFrame({"team": grid_team.ravel().astype("int8"), "gw": grid_gw.ravel().astype("int8")})
+    for name, values in cols.items():
+        out[name] = values[grid_team, grid_gw].ravel().astype("float32")
+    return out
+
+
+def feature_columns(next_k: Sequence[int] = NEXT_K) -> List[str]:
+    cols = [f"team_{s}" for s in STATS]
+    for k in next_k:
+        cols += [f"next{k}_fixtures", f"next{k}_home", f"next{k}_opp_xg_for", f"next{k}_opp_xg_against"]
+    return cols
+
+
+def add_team_features(df: pd.DataFrame, strength: pd.DataFrame, team_fixtures: pd.DataFrame) -> pd.DataFrame:
+    """
+    Join the strength table onto panel rows (season, gw, fixture, opponent_team) by the row's own team
+    (in place; returns `df`). Rows whose fixture is not in the tables get NaN.
+    """
+    pairs = team_fixtures.groupby(["season", "fixture"])["team"].sum()
+    keys = pd.MultiIndex.from_arrays([df["season"].astype(int), df["fixture"].astype(int)])
+    team = pairs.reindex(keys).to_numpy(dtype=float) - df["opponent_team"].to_numpy(dtype=float)
+
+    at = pd.MultiIndex.from_arrays([strength["season"].astype(int), strength["team"].astype(int),
+                                    strength["gw"].astype(int)])
+    rows = at.get_indexer(pd.MultiIndex.from_arrays([df["season"].astype(int), np.nan_to_num(team, nan=-1).astype(int),
+                                                     df["gw"].astype(int)]))
+    for col in [c for c in strength.columns if c not in ("season", "team", "gw")]:
+        values = strength[col].to_numpy()
+        df[col] = np.where(rows >= 0, values[rows], np.nan).astype("float32")
+    return df
+
+
+#----------
+#cache
+def _digest(paths: Sequence[Path]) -> str:
+    h = hashlib.sha256()
+    for p in paths:
+        if p.exists():
+            h.update(p.name.encode())
+            with open(p, "rb") as fh:
+                for block in iter(lambda: fh.read(1 << 20), b""):
+                    h.update(block)
+    return h.hexdigest()
+
+
+class TeamStrength:
+    def __init__(self, store: str = STORE_DIR, window: int = WINDOW, next_k: Sequence[int] = NEXT_K):
+        self.store = store
+        self.root = Path(store) / STRENGTH
+        self.window = window
+        self.next_k = list(next_k)
+
+    def _inputs(self, season: int) -> List[Path]:
+        return [Path(self.store) / d / f"season={season}" / "part-0.parquet" for d in (RAW, FIXTURES)]
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.root / "_state.json", "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state: dict) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / "_state.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(state, fh, indent=1)
+        os.replace(tmp, self.root / "_state.json")
+
+    def _build(self, season: int) -> None:
+        panel = read_panel(self.store, RAW, columns=PANEL_COLS, seasons=[season])
+        fixtures = None
+        if season in list_seasons(self.store, FIXTURES):
+            fixtures = read_panel(self.store, FIXTURES, seasons=[season])
+        sched = schedule(team_matches(panel), fixtures)
+        write_panel(sched, self.store, TEAM_FIXTURES)
+        write_panel(season_table(sched, self.window, self.next_k), self.store, STRENGTH, season=season)
+
+    def update(self, rebuild: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame, List[int]]:
+        """(strength, team_fixtures, seasons rebuilt): only seasons whose panel / fixture list changed are rebuilt."""
+        config = {"window": self.window, "next_k": self.next_k}
+        state = self._load_state()
+        digests = state.get("seasons", {}) if state.get("config") == config and not rebuild else {}
+        seasons = list_seasons(self.store, RAW)
+        rebuilt = []
+        for season in seasons:
+            digest = _digest(self._inputs(season))
+            if digests.get(str(season)) != digest:
+                self._build(season)
+                digests[str(season)] = digest
+                rebuilt.append(season)
+        for dataset in (STRENGTH, TEAM_FIXTURES):
+            for season in set(list_seasons(self.store, dataset)) - set(seasons):
+                os.remove(Path(self.store) / dataset / f"season={season}" / "part-0.parquet")
+        digests = {s: d for s, d in digests.items() if int(s) in seasons}
+        if rebuilt or digests != state.get("seasons"):
+            self._save_state({"config": config, "seasons": digests})
+        return self.load() + (rebuilt,)
+
+    def load(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        return read_panel(self.store, STRENGTH), read_panel(self.store, TEAM_FIXTURES)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("command", choices=["update", "show"])
+    ap.add_argument("--store", default=STORE_DIR)
+    ap.add_argument("--rebuild", action="store_true", help="update: rebuild every season")
+    ap.add_argument("--season", type=int, default=None, help="show: season (default: the latest)")
+    ap.add_argument("--gw", type=int, default=None, help="show: gameweek (default: the latest played)")
+    args = ap.parse_args()
+
+    ts = TeamStrength(args.store)
+    if args.command == "update":
+        strength, fixtures, rebuilt = ts.update(rebuild=args.rebuild)
+        print(f"[OK] {len(strength)} (team, gw) rows over {strength['season'].nunique()} season(s); "
+              f"rebuilt: {rebuilt or 'none'} -> {ts.root}")
+        return
+    strength, fixtures = ts.load()
+    season = args.season or int(strength["season"].max())
+    played = fixtures[(fixtures["season"] == season) & fixtures["goals_against"].notna()]
+    gw = args.gw if args.gw is not None else int(played["gw"].max())
+    view = strength[(strength["season"] == season) & (strength["gw"] == gw)]
+    print(f"=== {season}, after GW{gw} ===")
+    print(view.drop(columns=["season", "gw"]).sort_values("team_xg_for", ascending=False)
+          .to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+Multi-gameweek transfer planner: beam search over transfer sequences for the next H gameweeks.
+
+Input: the current 15-man squad (names), money in the bank, free transfers, and per-player predicted
+points for each of the next H gameweeks. Every gameweek of the plan a squad can
+- make no transfer (the free transfer is banked, up to MAX_FREE_TRANSFERS)
+- make 1..max_transfers transfers, each one past the free transfers costing HIT_COST points
+and scores its best XI for that gameweek (captain counted twice). The plan maximises the sum of XI
+points minus hits over the horizon.
+
+The search stays bounded for the full player pool:
+- in-players come from a pruned candidate set: per position the best `candidates` players over the
+  horizon, plus the best per million
+- per squad every legal single swap with a candidate is scored exactly (best XI over the rest of the
+  horizon) and only the `moves` best are expanded; multi-transfer weeks are combinations of those, capped at `max_combos` per size
+- after every gameweek only the `beam` best squads survive, ranked by points so far plus what the
+  squad would score if it made no more transfers
+so one gameweek scores at most beam x (single swaps + 1 + moves + max_combos x (max_transfers - 1))
+squads, in vectorized batches (benchmarks/bench_planner.py measures it up to H=6).
+
+Squads keep their players in slot order (2 GK, 5 DEF, 5 MID, 3 FWD); a transfer swaps a slot for a
+player of the same position, which keeps the best-XI calculation a few sorts along fixed slices.
+Prices are taken as both buy and sell price (the panel has no purchase prices).
+
+Usage:
+  python transfer_planner.py --predictions curr_gw_predictions.csv --squad curr_gw_team.csv --bank 0.5 --ft 1 --horizon 4
+  (a single predicted_points_next column is used as a flat forecast for every gameweek)
+"""
+
+import argparse
+import itertools
+import time
+from dataclasses import dataclass, field
+from math import comb
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+SLOTS = [("Goalkeeper", 2), ("Defender", 5), ("Midfielder", 5), ("Forward", 3)]
+HIT_COST = 4
+MAX_FREE_TRANSFERS = 5
+MAX_PER_TEAM = 3
+CANDIDATES = 30  # in-players per position (plan_transfers and --candidates)
+
+_BOUNDS = np.cumsum([0] + [k for _, k in SLOTS])  # slot ranges per position: [0, 2, 7, 12, 15]
+
+
+@dataclass
+class Step:
+    gw: int                               # 1 = next gameweek
+    transfers: List[Tuple[str, str]]      # (out, in)
+    free_transfers: int                   # available before the transfers
+    hits: int                             # points deducted
+    bank: float                           # after the transfers
+    points: float                         # predicted XI points, captain x2
+    captain: str
+    xi: List[str]
+
+
+@dataclass
+class Plan:
+    steps: List[Step]
+    total: float          # XI points minus hits over the horizon
+    baseline: float       # same squad, no transfers
+    evaluated: int        # squads scored during the search
+    elapsed: float
+    squad: List[str] = field(default_factory=list)  # squad after the last gameweek
+
+
+def xi_points(pts: np.ndarray, formation: Optional[Dict[str, int]] = None) -> np.ndarray:
+    """
+    Best-XI points per squad and gameweek, captain counted twice. `pts` is (squads, 15, weeks) in
+    slot order. formation=None allows any legal formation (1 GK, >=3 DEF, >=2 MID, >=1 FWD).
+    """
+    by_pos = [-np.sort(-pts[:, a:b], axis=1) for a, b in zip(_BOUNDS[:-1], _BOUNDS[1:])]  # descending
+    gk, d, m, f = by_pos
+    if formation is not None:
+        counts = [int(formation.get(p, 0)) for p, _ in SLOTS]
+        total = sum(s[:, :k].sum(axis=1) for s, k in zip(by_pos, counts))
+        best = np.max(np.stack([s[:, 0] for s, k in zip(by_pos, counts) if k > 0]), axis=0)
+        return total + best
+    # with 2/5/5/3 slots the position maxima (5/5/3) can never bind, so: the minimum per position,
+    # then the best 4 of the remaining outfield players
+    rest = np.concatenate([d[:, 3:], m[:, 2:], f[:, 1:]], axis=1)
+    rest = -np.sort(-rest, axis=1)[:, :4].sum(axis=1)
+    total = gk[:, 0] + d[:, :3].sum(axis=1) + m[:, :2].sum(axis=1) + f[:, 0] + rest
+    best = np.maximum(np.maximum(gk[:, 0], d[:, 0]), np.maximum(m[:, 0], f[:, 0]))
+    return total + best
+
+
+def _xi_members(points: np.ndarray, formation: Optional[Dict[str, int]]) -> Tuple[List[int], int]:
+    """Slot indices of the best XI for one squad / gameweek, and the captain's slot."""
+    order = [list(a + np.argsort(-points[a:b], kind="stable")) for a, b in zip(_BOUNDS[:-1], _BOUNDS[1:])]
+    if formation is not None:
+        xi = [s for (p, _), o in zip(SLOTS, order) for s in o[:int(formation.get(p, 0))]]
+    else:
+        mins = [1, 3, 2, 1]
+        xi = [s for o, k in zip(order, mins) for s in o[:k]]
+        rest = [s for o, k in zip(order[1:], mins[1:]) for s in o[k:]]
+        xi += sorted(rest, key=lambda s: -points[s])[:4]
+    return xi, max(xi, key=lambda s: points[s])
+
+
+class _Pool:
+    def __init__(self, players: pd.DataFrame, points_cols: Sequence[str], name_col: str, price_col: str,
+                 team_col: str):
+        self.players = players.reset_index(drop=True)
+        self.names = self.players[name_col].astype(str).to_numpy()
+        self.points = self.players[list(points_cols)].fillna(0).to_numpy(dtype=float)
+        self.price = self.players[price_col].to_numpy(dtype=float)
+        self.team = pd.factorize(self.players[team_col].astype(str))[0]
+        self.n_teams = int(self.team.max()) + 1 if len(self.team) else 0
+        pos = self.players["position"].astype(str).to_numpy()
+        self.pos = np.full(len(pos), -1)
+        for i, (p, _) in enumerate(SLOTS):
+            self.pos[pos == p] = i
+
+    def candidates(self, per_position: int, horizon_from: int = 0) -> List[np.ndarray]:
+        """Per position: best players over the horizon plus best per million, best first."""
+        value = self.points[:, horizon_from:].sum(axis=1)
+        out = []
+        for i in range(len(SLOTS)):
+            idx = np.flatnonzero(self.pos == i)
+            top = idx[np.argsort(-value[idx], kind="stable")[:per_position]]
+            cheap = idx[np.argsort(-value[idx] / np.maximum(self.price[idx], 0.1), kind="stable")[:per_position // 2]]
+            keep = np.unique(np.r_[top, cheap])
+            out.append(keep[np.argsort(-value[keep], kind="stable")])
+        return out
+
+
+def _squad_indices(pool: _Pool, squad: Sequence[str]) -> np.ndarray:
+    lookup = {n: i for i, n in enumerate(pool.names)}
+    missing = [n for n in squad if n not in lookup]
+    if missing:
+        raise ValueError(f"squad players not in the predictions: {missing}")
+    idx = np.array([lookup[n] for n in squad])
+    slots = []
+    for i, (p, k) in enumerate(SLOTS):
+        group = idx[pool.pos[idx] == i]
+        if len(group) != k:
+            raise ValueError(f"squad needs {k} x {p}, got {len(group)}")
+        slots.append(group)
+    return np.concatenate(slots)
+
+
+def _single_moves(pool: _Pool, squad: np.ndarray, bank: float, cands: List[np.ndarray], score, week: int,
+                  limit: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    The `limit` best single transfers (slot, player in, bank change), scored exactly: every legal
+    swap of a squad player for a candidate is evaluated over the rest of the horizon.
+    """
+    counts = np.bincount(pool.team[squad], minlength=pool.n_teams)
+    slots, ins, deltas = [], [], []
+    for slot, out in enumerate(squad):
+        c = cands[pool.pos[out]]
+        c = c[~np.isin(c, squad)]
+        delta = pool.price[out] - pool.price[c]
+        ok = (bank + delta >= -1e-9) & (counts[pool.team[c]] - (pool.team[c] == pool.team[out]) < MAX_PER_TEAM)
+        slots.append(np.full(int(ok.sum()), slot))
+        ins.append(c[ok])
+        deltas.append(delta[ok])
+    slots, ins, deltas = np.concatenate(slots), np.concatenate(ins), np.concatenate(deltas)
+    squads = np.repeat(squad[None, :], len(slots), axis=0)
+    squads[np.arange(len(slots)), slots] = ins
+    top = np.argsort(-score(squads, week).sum(axis=1), kind="stable")[:limit]
+    return slots[top], ins[top], deltas[top], len(slots)
+
+
+def _combos(m: int, k: int, max_combos: int) -> np.ndarray:
+    """Index combinations of size k among the best m moves, m shrunk until there are <= max_combos."""
+    while m > k and comb(m, k) > max_combos:
+        m -= 1
+    if m < k:
+        return np.zeros((0, k), dtype=int)
+    return np.array(list(itertools.combinations(range(m), k)), dtype=int).reshape(-1, k)
+
+
+def _club_ok(pool: _Pool, squads: np.ndarray) -> np.ndarray:
+    teams = np.sort(pool.team[squads], axis=1)
+    return ~(teams[:, MAX_PER_TEAM:] == teams[:, :-MAX_PER_TEAM]).any(axis=1)
+
+
+def plan_transfers(players: pd.DataFrame, points_cols: Sequence[str], squad: Sequence[str], bank: float = 0.0,
+                   free_transfers: int = 1, formation: Optional[Dict[str, int]] = None, max_transfers: int = 2,
+                   beam: int = 50, candidates: int = CANDIDATES, moves: int = 20, max_combos: int = 200,
+                   hit_cost: int = HIT_COST, name_col: str = "full_name", price_col: str = "price_now",
+                   team_col: str = "team_name_current") -> Plan:
+    """
+    Best transfer plan over the gameweeks in `points_cols` (one column of predicted points per
+    gameweek, in order). See the module docstring for the search and its bounds.
+    """
+    if max_transfers < 1:
+        raise ValueError(f"max_transfers must be at least 1 (holding is always an option), got {max_transfers}")
+    t0 = time.perf_counter()
+    pool = _Pool(players, points_cols, name_col, price_col, team_col)
+    start = _squad_indices(pool, squad)
+    H = len(points_cols)
+    cands = pool.candidates(candidates)
+    combos = {k: _combos(moves, k, max_combos) for k in range(2, max_transfers + 1)}
+
+    def score(squads: np.ndarray, week: int) -> np.ndarray:
+        return xi_points(pool.points[squads][:, :, week:], formation)
+
+    # the beam, one row per squad; moves[w] says how week w's beam came from week w-1's
+    sq = start[None, :]
+    bk = np.array([float(bank)])
+    ft = np.array([int(free_transfers)])
+    acc = np.zeros(1)
+    history = []
+    evaluated = 0
+    for week in range(H):
+        c_sq, c_bank, c_n, c_parent, c_slots, c_ins = [], [], [], [], [], []
+        for i in range(len(sq)):
+            slots, ins, deltas, tried = _single_moves(pool, sq[i], bk[i], cands, score, week, moves)
+            evaluated += tried
+            pad = np.full((len(slots) + 1, max_transfers), -1)
+            opt_slots, opt_ins = pad.copy(), pad.copy()
+            opt_slots[1:, 0], opt_ins[1:, 0] = slots, ins  # row 0: no transfer
+            opt_bank = np.r_[0.0, deltas]
+            opt_slots, opt_ins = [opt_slots], [opt_ins]
+            opt_bank = [opt_bank]
+            for k, idx in combos.items():
+                idx = idx[(idx < len(slots)).all(axis=1)]
+                s, p = slots[idx], ins[idx]
+                ok = ((np.sort(s, axis=1)[:, 1:] != np.sort(s, axis=1)[:, :-1]).all(axis=1)
+                      & (np.sort(p, axis=1)[:, 1:] != np.sort(p, axis=1)[:, :-1]).all(axis=1)
+                      & (bk[i] + deltas[idx].sum(axis=1) >= -1e-9))
+                s, p, d = s[ok], p[ok], deltas[idx][ok].sum(axis=1)
+                block_s = np.full((len(s), max_transfers), -1)
+                block_p = block_s.copy()
+                block_s[:, :k], block_p[:, :k] = s, p
+                opt_slots.append(block_s)
+                opt_ins.append(block_p)
+                opt_bank.append(d)
+            opt_slots, opt_ins = np.concatenate(opt_slots), np.concatenate(opt_ins)
+            new = np.repeat(sq[i][None, :], len(opt_slots), axis=0)
+            rows = np.arange(len(new))
+            for j in range(max_transfers):
+                m = opt_slots[:, j] >= 0
+                new[rows[m], opt_slots[m, j]] = opt_ins[m, j]
+            keep = _club_ok(pool, new)
+            c_sq.append(new[keep])
+            c_bank.append(bk[i] + np.concatenate(opt_bank)[keep])
+            c_n.append((opt_slots[keep] >= 0).sum(axis=1))
+            c_parent.append(np.full(int(keep.sum()), i))
+            c_slots.append(opt_slots[keep])
+            c_ins.append(opt_ins[keep])
+
+        new, new_bank, n = np.concatenate(c_sq), np.concatenate(c_bank), np.concatenate(c_n)
+        parent, slots, ins = np.concatenate(c_parent), np.concatenate(c_slots), np.concatenate(c_ins)
+        hits = np.maximum(0, n - ft[parent]) * hit_cost
+        new_ft = np.minimum(MAX_FREE_TRANSFERS, np.maximum(ft[parent] - n, 0) + 1)
+        pts = score(new, week)
+        evaluated += len(new)
+        new_acc = acc[parent] - hits + pts[:, 0]
+        rank = new_acc + pts[:, 1:].sum(axis=1)
+
+        # best first (ties: free transfers banked, then money), then one row per squad + free transfers
+        order = np.lexsort((-new_bank, -new_ft, -rank))
+        keys = np.column_stack([np.sort(new[order], axis=1), new_ft[order]])
+        _, first = np.unique(keys, axis=0, return_index=True)
+        chosen = order[np.sort(first)][:beam]
+
+        history.append((parent[chosen], slots[chosen], ins[chosen], hits[chosen], ft[parent[chosen]]))
+        sq, bk, ft, acc = new[chosen], new_bank[chosen], new_ft[chosen], new_acc[chosen]
+
+    best = int(np.lexsort((-bk, -ft, -acc))[0])
+    # walk back through the weeks
+    path = []
+    for parent, slots, ins, hits, ft_before in reversed(history):
+        path.append((slots[best], ins[best], int(hits[best]), int(ft_before[best])))
+        best = int(parent[best])
+    path.reverse()
+
+    steps, current, money = [], start.copy(), float(bank)
+    for week, (slots, ins, hits, ft_before) in enumerate(path):
+        transfers = []
+        for slot, player in zip(slots, ins):
+            if slot < 0:
+                continue
+            transfers.append((pool.names[current[slot]], pool.names[player]))
+            money += pool.price[current[slot]] - pool.price[player]
+            current[slot] = player
+        week_pts = pool.points[current, week]
+        xi, cap = _xi_members(week_pts, formation)
+        steps.append(Step(week + 1, transfers, ft_before, hits, round(money, 1),
+                          float(xi_points(week_pts[None, :, None], formation)[0, 0]),
+                          pool.names[current[cap]], [pool.names[current[s]] for s in xi]))
+    baseline = float(score(start[None, :], 0).sum())
+    total = float(sum(s.points - s.hits for s in steps))
+    return Plan(steps, total, baseline, evaluated, time.perf_counter() - t0, [pool.names[i] for i in current])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Plan transfers over the next gameweeks (beam search).")
+    ap.add_argument("--predictions", required=True,
+                    help="CSV with full_name, position, team_name_current, price_now and predicted points")
+    ap.add_argument("--points", nargs="+", default=None,
+                    help="Predicted points columns, one per gameweek (default: predicted_points_next repeated)")
+    ap.add_argument("--horizon", type=int, default=4, help="Gameweeks when a single points column is repeated")
+    ap.add_argument("--squad", required=True, help="CSV with a full_name column (e.g. curr_gw_team.csv)")
+    ap.add_argument("--bank", type=float, default=0.0)
+    ap.add_argument("--ft", type=int, default=1, help="Free transfers available now")
+    ap.add_argument("--max-transfers", type=int, default=2, help="Transfers per gameweek")
+    ap.add_argument("--beam", type=int, default=50)
+    ap.add_argument("--candidates", type=int, default=CANDIDATES, help="Candidate players per position")
+    args = ap.parse_args()
+
+    players = pd.read_csv(args.predictions, low_memory=False).drop_duplicates("full_name")
+    players = players[players["price_now"].notna() & (players["price_now"] > 0)]
+    cols = args.points
+    if cols is None:
+        cols = [f"gw{h + 1}" for h in range(args.horizon)]
+        for c in cols:
+            players[c] = players["predicted_points_next"]
+    squad = pd.read_csv(args.squad)["full_name"].astype(str).tolist()
+
+    plan = plan_transfers(players, cols, squad, args.bank, args.ft, max_transfers=args.max_transfers,
+                          beam=args.beam, candidates=args.candidates)
+    for step in plan.steps:
+        moves = ", ".join(f"{o} -> {i}" for o, i in step.transfers) or "no transfer"
+        hit = f" (-{step.hits})" if step.hits else ""
+        print(f"GW+{step.gw}: {moves}{hit} | FT {step.free_transfers} | bank {step.bank:.1f} | "
+              f"XI {step.points:.1f} | captain {step.captain}")
+    print(f"\n[OK] plan {plan.total:.1f} pts vs {plan.baseline:.1f} without transfers "
+          f"({plan.evaluated:,} squads scored in {plan.elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()